@@ -1,56 +1,330 @@
-import pyfftw.interfaces.numpy_fft as fftw
-from scipy.signal import find_peaks
+from functools import cached_property
 
-def analyze_frequency_spectrum(sound, sample_rate=44100):
+import numpy as np
+from src.automation_module import Automation
+from src.fft_backend_module import get_fft_backend
+from src.formant_tracking_module import summarize_formant_track, track_formants
+from src.instrumentation_module import instrumented
+from src.noise_module import make_rng
+from src.pitch_tracking_module import median_pitch, track_pitch
+from src.precision_module import prepare_output, resolve_dtype
+from src.render_graph_module import Decay, Oscillator, Product, RenderGraph
+from src.resonator_module import filter_formants
+from src.time_base_module import get_time_base
+from src.wavetable_module import render_oscillator
+
+class SpectrumAnalysis:
+    """
+    Spectrum of a sound computed once, with derived features evaluated lazily and memoized.
+
+    Instances can be passed anywhere a raw sound is accepted by `analyze_frequency_spectrum`,
+    `detect_formants` and `calculate_harmonic_ratios`, so that several analyses of the same
+    signal share a single FFT.
+    """
+
+    def __init__(self, sound, sample_rate=44100, dtype=None):
+        """
+        Parameters:
+        - sound: A numpy array containing the sound data.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        - dtype: The precision of the analysis (defaults to the precision policy).
+        """
+        self.sound = np.asarray(sound, dtype=resolve_dtype(dtype))
+        self.sample_rate = sample_rate
+        self._formants = {}
+        self._harmonic_ratios = {}
+
+    @cached_property
+    def freqs(self):
+        """The frequencies (in Hz) of the positive-frequency bins."""
+        n = len(self.sound)
+        return get_fft_backend().rfftfreq(n, self.sample_rate)[:n//2]
+
+    @cached_property
+    def spectrum(self):
+        """The complex spectrum of the positive-frequency bins."""
+        n = len(self.sound)
+        return get_fft_backend().rfft(self.sound)[:n//2]
+
+    @cached_property
+    def magnitude(self):
+        """The magnitude of each bin."""
+        return np.abs(self.spectrum)
+
+    @cached_property
+    def power(self):
+        """The power (squared magnitude) of each bin."""
+        return np.square(self.magnitude)
+
+    @cached_property
+    @instrumented()
+    def peaks(self):
+        """The indices of every local maximum of the magnitude spectrum."""
+        from scipy.signal import find_peaks
+        peaks, _ = find_peaks(self.magnitude)
+        return peaks
+
+    @cached_property
+    def fundamental(self):
+        """The frequency (in Hz) of the strongest bin."""
+        return self.freqs[np.argmax(self.magnitude)]
+
+    @cached_property
+    def pitch(self):
+        """The median YIN pitch (in Hz) of the voiced frames, or 0 if no frame is voiced."""
+        return median_pitch(track_pitch(self.sound, self.sample_rate)[1])
+
+    @property
+    def harmonic_ratios(self):
+        """The ratios to the pitch of the spectral peaks that lie within 3% of a harmonic."""
+        return self.harmonic_ratios_within()
+
+    def harmonic_ratios_within(self, tolerance=0.03, min_level_db=-40):
+        """
+        Return the ratios to the pitch of the spectral peaks that lie near a harmonic of it.
+
+        Parameters:
+        - tolerance: The half-width of each harmonic's band, relative to the harmonic frequency.
+        - min_level_db: Peaks quieter than this, relative to the strongest bin, are ignored.
+
+        Returns:
+        - A list of ratios, one per harmonic found (the strongest peak in each band), in harmonic order.
+        """
+        key = (tolerance, min_level_db)
+        if key not in self._harmonic_ratios:
+            _, _, ratios = _harmonic_peaks(self.freqs, self.magnitude[None, :], np.array([self.pitch]), tolerance, min_level_db)
+            self._harmonic_ratios[key] = ratios.tolist()
+        return list(self._harmonic_ratios[key])
+
+    def formants(self, num_formants=5):
+        """
+        Return the first `num_formants` peaks whose magnitude exceeds max/num_formants.
+
+        Parameters:
+        - num_formants: The number of formants to detect.
+
+        Returns:
+        - A list of tuples, where each tuple contains the formant frequency and its peak magnitude.
+        """
+        return [(self.freqs[peak], self.magnitude[peak]) for peak in self._formant_peaks(num_formants)]
+
+    def _formant_peaks(self, num_formants):
+        if num_formants not in self._formants:
+            magnitude = self.magnitude
+            self._formants[num_formants] = self.peaks[magnitude[self.peaks] >= np.max(magnitude) / num_formants][:num_formants]
+        return self._formants[num_formants]
+
+def _as_spectrum_analysis(sound, sample_rate, dtype=None):
+    if isinstance(sound, SpectrumAnalysis):
+        return sound
+    return SpectrumAnalysis(sound, sample_rate, dtype)
+
+@instrumented()
+def analyze_frequency_spectrum(sound, sample_rate=44100, dtype=None, out=None):
     """
     Analyze the frequency spectrum of a given sound.
 
     Parameters:
-    - sound: A numpy array containing the sound data.
+    - sound: A numpy array containing the sound data, or a SpectrumAnalysis of it.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - dtype: The precision of the analysis (defaults to the precision policy).
+    - out: An optional array of length len(sound) // 2 to write the amplitudes into.
 
     Returns:
     - A tuple containing the frequencies and their corresponding amplitudes.
     """
-    n = len(sound)
-    freqs = fftw.fftfreq(n, 1/sample_rate)
-    spectrum = np.abs(fftw.fft(sound))
-    return freqs[:n//2], spectrum[:n//2]
+    analysis = _as_spectrum_analysis(sound, sample_rate, resolve_dtype(dtype, out))
+    if out is None:
+        return analysis.freqs, analysis.magnitude
+    return analysis.freqs, np.abs(analysis.spectrum, out=prepare_output(out, len(analysis.freqs)))
 
-def detect_formants(sound, sample_rate=44100, num_formants=5):
+@instrumented()
+def detect_formants(sound, sample_rate=44100, num_formants=5, method='lpc'):
     """
     Detect formants in a given sound.
 
     Parameters:
-    - sound: A numpy array containing the sound data.
+    - sound: A numpy array containing the sound data, or a SpectrumAnalysis of it.
     - sample_rate: The sample rate of the sound (in samples per second).
     - num_formants: The number of formants to detect.
+    - method: 'lpc' to take the median of a frame-wise LPC formant track (see `track_formants`),
+      or 'peaks' for the first spectral peaks above max/num_formants of a whole-signal FFT, with
+      their half-power widths as bandwidths.
 
     Returns:
     - A list of tuples, where each tuple contains the formant frequency and its bandwidth.
     """
-    freqs, spectrum = analyze_frequency_spectrum(sound, sample_rate)
-    peaks, _ = find_peaks(spectrum, height=np.max(spectrum)/num_formants)
-    formants = [(freqs[peak], spectrum[peak]) for peak in peaks[:num_formants]]
-    return formants
+    analysis = _as_spectrum_analysis(sound, sample_rate)
+    if method == 'lpc':
+        _, frequencies, bandwidths = track_formants(analysis.sound, analysis.sample_rate, num_formants)
+        return summarize_formant_track(frequencies, bandwidths)
+    if method == 'peaks':
+        peaks = analysis._formant_peaks(num_formants)
+        from scipy.signal import peak_widths
+        widths = peak_widths(analysis.power, peaks, rel_height=0.5)[0]
+        return [(analysis.freqs[peak], width * analysis.sample_rate / len(analysis.sound)) for peak, width in zip(peaks, widths)]
+    raise ValueError(f"Unknown formant detection method: {method}")
 
-def calculate_harmonic_ratios(sound, sample_rate=44100):
+@instrumented()
+def calculate_harmonic_ratios(sound, sample_rate=44100, tolerance=0.03, min_level_db=-40):
     """
     Calculate the harmonic ratios of a given sound.
 
+    The pitch is tracked frame by frame with YIN (see `track_pitch`) and the median of the voiced
+    frames is taken as the fundamental. Every spectral peak within `tolerance` of a harmonic of it
+    contributes its frequency ratio to the fundamental.
+
     Parameters:
-    - sound: A numpy array containing the sound data.
+    - sound: A numpy array containing the sound data, or a SpectrumAnalysis of it.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - tolerance: The half-width of each harmonic's band, relative to the harmonic frequency.
+    - min_level_db: Peaks quieter than this, relative to the strongest bin, are ignored.
 
     Returns:
-    - A list of harmonic ratios.
+    - A list of harmonic ratios (empty if the sound has no pitch).
+    """
+    return _as_spectrum_analysis(sound, sample_rate).harmonic_ratios_within(tolerance, min_level_db)
+
+def _harmonic_peaks(freqs, spectra, fundamentals, tolerance, min_level_db):
     """
-    freqs, spectrum = analyze_frequency_spectrum(sound, sample_rate)
-    fundamental_freq = freqs[np.argmax(spectrum)]
-    harmonic_ratios = [freq / fundamental_freq for freq in freqs if freq % fundamental_freq == 0]
-    return harmonic_ratios
+    Find the strongest spectral peak near each harmonic of each row's fundamental.
 
-def filter_noise_for_formants(noise, formant_freqs, bandwidths, sample_rate=44100):
+    Returns:
+    - Three arrays (row, harmonic number, ratio) with one entry per harmonic found, ordered by row
+      and then by harmonic number.
+    """
+    is_peak = np.zeros(spectra.shape, dtype=bool)
+    is_peak[:, 1:-1] = (spectra[:, 1:-1] > spectra[:, :-2]) & (spectra[:, 1:-1] > spectra[:, 2:])
+    is_peak &= spectra >= spectra.max(axis=1, keepdims=True) * 10 ** (min_level_db / 20)
+    is_peak &= fundamentals[:, None] > 0
+    rows, cols = np.nonzero(is_peak)
+    ratios = freqs[cols] / fundamentals[rows]
+    harmonics = np.rint(ratios)
+    near = (harmonics >= 1) & (np.abs(ratios - harmonics) <= tolerance * harmonics)
+    rows, cols, ratios, harmonics = rows[near], cols[near], ratios[near], harmonics[near]
+    # Strongest peak first within each (row, harmonic), then keep the first of each.
+    order = np.lexsort((-spectra[rows, cols], harmonics, rows))
+    rows, ratios, harmonics = rows[order], ratios[order], harmonics[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (harmonics[1:] != harmonics[:-1])
+    return rows[first], harmonics[first].astype(np.int64), ratios[first]
+
+FORMANT_DTYPE = np.dtype([('frequency', np.float64), ('magnitude', np.float64)])
+
+def _stack_clips(sounds, dtype=None):
+    dtype = resolve_dtype(dtype)
+    if isinstance(sounds, np.ndarray) and sounds.ndim == 2:
+        return sounds.astype(dtype, copy=False), np.full(len(sounds), sounds.shape[1])
+    lengths = np.array([len(sound) for sound in sounds])
+    clips = np.zeros((len(lengths), lengths.max() if len(lengths) else 0), dtype=dtype)
+    for clip, sound in zip(clips, sounds):
+        clip[:len(sound)] = sound
+    return clips, lengths
+
+def _first_per_row(mask, count):
+    rank = np.cumsum(mask, axis=1)
+    rows, cols = np.nonzero(mask & (rank <= count))
+    return rows, cols, rank[rows, cols] - 1
+
+@instrumented()
+def analyze_frequency_spectrum_batch(sounds, sample_rate=44100, dtype=None, out=None):
+    """
+    Analyze the frequency spectra of many clips with a single batched FFT.
+
+    Parameters:
+    - sounds: A 2-D numpy array with one clip per row, or a list of 1-D clips of any lengths
+      (shorter clips are zero-padded to the longest one).
+    - sample_rate: The sample rate of the clips (in samples per second).
+    - dtype: The precision of the analysis (defaults to the precision policy).
+    - out: An optional (clips, samples // 2) array to write the amplitudes into.
+
+    Returns:
+    - A tuple containing the frequencies and a 2-D array with the amplitudes of each clip per row.
+    """
+    clips, _ = _stack_clips(sounds, resolve_dtype(dtype, out))
+    n = clips.shape[1]
+    backend = get_fft_backend()
+    freqs = backend.rfftfreq(n, sample_rate)[:n//2]
+    spectra = prepare_output(out, (len(clips), n//2), clips.dtype)
+    np.abs(backend.rfft(clips)[:, :n//2], out=spectra)
+    return freqs, spectra
+
+@instrumented()
+def detect_formants_batch(sounds, sample_rate=44100, num_formants=5):
+    """
+    Detect formants in many clips at once, using the same peak criterion as `detect_formants(method='peaks')`.
+
+    Peaks are strict local maxima of the magnitude spectrum; flat-topped peaks are not reported.
+
+    Parameters:
+    - sounds: A 2-D numpy array with one clip per row, or a list of 1-D clips of any lengths.
+    - sample_rate: The sample rate of the clips (in samples per second).
+    - num_formants: The number of formants to detect per clip.
+
+    Returns:
+    - A structured array of shape (clips, num_formants) with 'frequency' and 'magnitude' fields;
+      slots without a formant are NaN.
+    """
+    freqs, spectra = analyze_frequency_spectrum_batch(sounds, sample_rate)
+    is_peak = np.zeros(spectra.shape, dtype=bool)
+    is_peak[:, 1:-1] = (spectra[:, 1:-1] > spectra[:, :-2]) & (spectra[:, 1:-1] > spectra[:, 2:])
+    is_peak &= spectra >= spectra.max(axis=1, keepdims=True) / num_formants
+    rows, cols, slots = _first_per_row(is_peak, num_formants)
+    formants = np.full((len(spectra), num_formants), np.nan, dtype=FORMANT_DTYPE)
+    formants['frequency'][rows, slots] = freqs[cols]
+    formants['magnitude'][rows, slots] = spectra[rows, cols]
+    return formants
+
+@instrumented()
+def calculate_harmonic_ratios_batch(sounds, sample_rate=44100, tolerance=0.03, min_level_db=-40):
+    """
+    Calculate the harmonic ratios of many clips at once, using the same criterion as `calculate_harmonic_ratios`.
+
+    The pitch of every frame of every clip is tracked in one batched YIN pass.
+
+    Parameters:
+    - sounds: A 2-D numpy array with one clip per row, or a list of 1-D clips of any lengths.
+    - sample_rate: The sample rate of the clips (in samples per second).
+    - tolerance: The half-width of each harmonic's band, relative to the harmonic frequency.
+    - min_level_db: Peaks quieter than this, relative to the strongest bin, are ignored.
+
+    Returns:
+    - A structured array with one record per clip holding the 'fundamental' frequency, the number of
+      ratios found ('num_ratios') and the 'ratios' themselves, NaN-padded to a common width.
+    """
+    clips, _ = _stack_clips(sounds)
+    freqs, spectra = analyze_frequency_spectrum_batch(clips, sample_rate)
+    # Frames in a shorter clip's zero padding are silent, hence unvoiced, and drop out of the median.
+    _, pitch, _ = track_pitch(clips, sample_rate)
+    fundamentals = median_pitch(pitch) if len(pitch) else np.zeros(0)
+    rows, _, ratios = _harmonic_peaks(freqs, spectra, fundamentals, tolerance, min_level_db)
+    num_ratios = np.bincount(rows, minlength=len(spectra))
+    width = int(num_ratios.max()) if len(num_ratios) else 0
+    slots = np.arange(len(rows)) - np.repeat(np.cumsum(num_ratios) - num_ratios, num_ratios)
+    dtype = np.dtype([('fundamental', np.float64), ('num_ratios', np.int64), ('ratios', np.float64, (width,))])
+    result = np.zeros(len(spectra), dtype=dtype)
+    result['fundamental'] = fundamentals
+    result['num_ratios'] = num_ratios
+    result['ratios'] = np.nan
+    result['ratios'][rows, slots] = ratios
+    return result
+
+def _apply_formant_envelopes(result, formant_freqs, bandwidths, sample_rate, oscillator='sine'):
+    """
+    Multiply `result` in place by exp(-bandwidth * t) * sin(2 * pi * formant_freq * t) for each formant.
+    """
+    t = get_time_base(len(result), sample_rate)
+    scratch = np.empty_like(result)
+    for formant_freq, bandwidth in zip(formant_freqs, bandwidths):
+        np.multiply(t, -bandwidth, out=scratch)
+        np.exp(scratch, out=scratch)
+        result *= scratch
+        render_oscillator(formant_freq, len(result), sample_rate, oscillator, out=scratch)
+        result *= scratch
+    return result
+
+@instrumented()
+def filter_noise_for_formants(noise, formant_freqs, bandwidths, sample_rate=44100, method='resonator', dtype=None, out=None):
     """
     Filter noise components to create formants.
 
@@ -59,33 +333,46 @@ def filter_noise_for_formants(noise, formant_freqs, bandwidths, sample_rate=4410
     - formant_freqs: A list of formant frequencies to be emphasized.
     - bandwidths: A list of bandwidths for each formant frequency.
     - sample_rate: The sample rate of the noise (in samples per second).
+    - method: 'resonator' to sum a parallel bank of band-pass resonators (see `ResonatorBank`), or
+      'envelope' to multiply by a decaying sinusoid per formant.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the filtered noise.
     """
-    t = np.linspace(0, len(noise) / sample_rate, len(noise), endpoint=False)
-    filtered_noise = noise.copy()
-    for formant_freq, bandwidth in zip(formant_freqs, bandwidths):
-        filtered_noise *= np.exp(-bandwidth * t) * np.sin(2 * np.pi * formant_freq * t)
-    return filtered_noise
+    filtered_noise = prepare_output(out, len(noise), dtype)
+    if method == 'resonator':
+        filtered_noise[...] = filter_formants(noise, formant_freqs, bandwidths, sample_rate)
+        return filtered_noise
+    if method != 'envelope':
+        raise ValueError(f"Unknown formant method: {method}")
+    filtered_noise[...] = noise
+    return _apply_formant_envelopes(filtered_noise, formant_freqs, bandwidths, sample_rate)
 
-def manipulate_spectral_envelope(sound, envelope, sample_rate=44100):
+@instrumented()
+def manipulate_spectral_envelope(sound, envelope, sample_rate=44100, dtype=None, out=None):
     """
     Manipulate the spectral envelope to shape the timbre of the sound over time.
 
     Parameters:
     - sound: A numpy array containing the sound data.
-    - envelope: A numpy array containing the spectral envelope data.
+    - envelope: A numpy array or an Automation containing the spectral envelope.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the sound with manipulated spectral envelope.
     """
-    t = np.linspace(0, len(sound) / sample_rate, len(sound), endpoint=False)
-    manipulated_sound = sound * envelope
+    if isinstance(envelope, Automation):
+        return RenderGraph(Product(sound, envelope), sample_rate).render(len(sound), dtype, out)
+    manipulated_sound = prepare_output(out, len(sound), dtype)
+    np.multiply(sound, envelope, out=manipulated_sound)
     return manipulated_sound
 
-def apply_subharmonics(sound, subharmonic_freqs, amplitudes, sample_rate=44100):
+@instrumented()
+def apply_subharmonics(sound, subharmonic_freqs, amplitudes, sample_rate=44100, oscillator='sine', dtype=None, out=None):
     """
     Generate lower harmonics for deeper tones.
 
@@ -94,17 +381,24 @@ def apply_subharmonics(sound, subharmonic_freqs, amplitudes, sample_rate=44100):
     - subharmonic_freqs: A list of subharmonic frequencies to be added.
     - amplitudes: A list of amplitudes for each subharmonic frequency.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated sine-table lookup, or a Wavetable instance.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the sound with added subharmonics.
     """
-    t = np.linspace(0, len(sound) / sample_rate, len(sound), endpoint=False)
-    subharmonic_sound = sound.copy()
+    subharmonic_sound = prepare_output(out, len(sound), dtype)
+    subharmonic_sound[...] = sound
+    scratch = np.empty_like(subharmonic_sound)
     for subharmonic_freq, amplitude in zip(subharmonic_freqs, amplitudes):
-        subharmonic_sound += amplitude * np.sin(2 * np.pi * subharmonic_freq * t)
+        render_oscillator(subharmonic_freq, len(sound), sample_rate, oscillator, out=scratch)
+        scratch *= amplitude
+        subharmonic_sound += scratch
     return subharmonic_sound
 
-def apply_jitter_effects(sound, jitter_amount, sample_rate=44100):
+@instrumented()
+def apply_jitter_effects(sound, jitter_amount, sample_rate=44100, rng=None, dtype=None, out=None):
     """
     Introduce random variations in pitch, amplitude, or timing for more organic or "shaky" sound characteristics.
 
@@ -112,15 +406,23 @@ def apply_jitter_effects(sound, jitter_amount, sample_rate=44100):
     - sound: A numpy array containing the sound data.
     - jitter_amount: The amount of jitter to be applied.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - rng: A numpy Generator, SeedSequence or int seed; None draws from the current random stream
+      (see `make_rng`).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the sound with applied jitter effects.
     """
-    t = np.linspace(0, len(sound) / sample_rate, len(sound), endpoint=False)
-    jittered_sound = sound * (1 + jitter_amount * np.random.randn(len(sound)))
+    jittered_sound = prepare_output(out, len(sound), dtype)
+    jitter = make_rng(rng).standard_normal(len(sound))
+    jitter *= jitter_amount
+    jitter += 1
+    np.multiply(sound, jitter, out=jittered_sound)
     return jittered_sound
 
-def apply_pitch_modulation(sound, modulation_freq, modulation_depth, sample_rate=44100):
+@instrumented()
+def apply_pitch_modulation(sound, modulation_freq, modulation_depth, sample_rate=44100, oscillator='sine', dtype=None, out=None):
     """
     Control pitch bending and vibrato effects.
 
@@ -129,15 +431,21 @@ def apply_pitch_modulation(sound, modulation_freq, modulation_depth, sample_rate
     - modulation_freq: The frequency of the pitch modulation.
     - modulation_depth: The depth of the pitch modulation.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated sine-table lookup, or a Wavetable instance.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the sound with applied pitch modulation.
     """
-    t = np.linspace(0, len(sound) / sample_rate, len(sound), endpoint=False)
-    modulated_sound = sound * np.sin(2 * np.pi * modulation_freq * t) * modulation_depth
+    modulated_sound = prepare_output(out, len(sound), dtype)
+    modulation = render_oscillator(modulation_freq, len(sound), sample_rate, oscillator, dtype=modulated_sound.dtype)
+    modulation *= modulation_depth
+    np.multiply(sound, modulation, out=modulated_sound)
     return modulated_sound
 
-def generate_synthetic_speech(pitch, formant_freqs, formant_bandwidths, duration, sample_rate=44100):
+@instrumented()
+def generate_synthetic_speech(pitch, formant_freqs, formant_bandwidths, duration, sample_rate=44100, oscillator='sine', dtype=None, out=None):
     """
     Generate synthetic speech using advanced synthesis techniques.
 
@@ -147,12 +455,16 @@ def generate_synthetic_speech(pitch, formant_freqs, formant_bandwidths, duration
     - formant_bandwidths: A list of bandwidths for each formant frequency.
     - duration: The duration of the synthetic speech (in seconds).
     - sample_rate: The sample rate of the synthetic speech (in samples per second).
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated sine-table lookup, or a Wavetable instance.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
 
     Returns:
     - A numpy array containing the generated synthetic speech.
     """
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    speech = np.sin(2 * np.pi * pitch * t)
+    graph = Product(Oscillator(pitch, oscillator=oscillator))
     for formant_freq, bandwidth in zip(formant_freqs, formant_bandwidths):
-        speech *= np.exp(-bandwidth * t) * np.sin(2 * np.pi * formant_freq * t)
-    return speech
+        graph *= Decay(bandwidth) * Oscillator(formant_freq, oscillator=oscillator)
+    return RenderGraph(graph, sample_rate).render(int(sample_rate * duration), dtype, out)
+
+generate_synthetic_speech.output_length = lambda duration, sample_rate, **params: int(sample_rate * duration)
@@ -0,0 +1,308 @@
+import os
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_PCM_DTYPES = {
+    (WAVE_FORMAT_PCM, 8): np.dtype(np.uint8),
+    (WAVE_FORMAT_PCM, 16): np.dtype('<i2'),
+    (WAVE_FORMAT_PCM, 32): np.dtype('<i4'),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype('<f4'),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): np.dtype('<f8'),
+}
+
+# Largest data chunk a RIFF header can describe.
+_MAX_DATA_BYTES = 0xFFFFFFFF - 36
+
+class MappedAudio:
+    """
+    Audio samples in a file, accessed through a numpy memmap instead of being read into memory.
+
+    `data` is the memmap itself, with shape (frames,) for mono files and (frames, channels)
+    otherwise. Slices of it, `channel` and `frames` are views, so analysis functions read only
+    the pages they touch; with a writable mapping, render functions can be given `out=` views
+    and write straight into the file.
+    """
+
+    def __init__(self, path, data, sample_rate, channels, mode):
+        self.path = path
+        self.data = data
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.mode = mode
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def num_frames(self):
+        return self.data.shape[0]
+
+    @property
+    def duration(self):
+        return self.num_frames / self.sample_rate
+
+    def __len__(self):
+        return self.num_frames
+
+    def channel(self, index=0):
+        """
+        Return a view of one channel (the data itself for mono files).
+        """
+        if self.data.ndim == 1:
+            if index != 0:
+                raise IndexError(f"Channel {index} out of range for a mono file")
+            return self.data
+        return self.data[:, index]
+
+    def frames(self, frame_length, hop_length=None, channel=0):
+        """
+        Return overlapping analysis frames of one channel without copying.
+
+        Parameters:
+        - frame_length: The number of samples per frame.
+        - hop_length: The number of samples between frame starts (defaults to frame_length).
+        - channel: The channel to frame.
+
+        Returns:
+        - A read-only (num_frames, frame_length) view of the mapped samples.
+        """
+        hop_length = hop_length or frame_length
+        samples = self.channel(channel)
+        if len(samples) < frame_length:
+            return samples[:0].reshape(0, frame_length)
+        return np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop_length]
+
+    def read(self, start=0, stop=None, channel=0, dtype=np.float64):
+        """
+        Read samples of one channel as floating point in the range -1 to 1.
+
+        Float files are returned as they are stored (a view when `dtype` matches); integer PCM
+        is scaled by its full-scale value.
+
+        Parameters:
+        - start: The first sample to read.
+        - stop: The sample after the last one to read (defaults to the end of the file).
+        - channel: The channel to read.
+        - dtype: The floating-point dtype of the result.
+
+        Returns:
+        - A numpy array containing the samples.
+        """
+        return _to_float(self.channel(channel)[start:stop], dtype)
+
+    def iter_blocks(self, block_size=65536, channel=0, dtype=np.float64):
+        """
+        Yield one channel as consecutive floating-point blocks, e.g. for `stream_spectral_analysis`.
+        """
+        for start in range(0, self.num_frames, block_size):
+            yield self.read(start, start + block_size, channel, dtype)
+
+    def write(self, start, samples, channel=None):
+        """
+        Write floating-point samples into the file, converting to its sample format.
+
+        Parameters:
+        - start: The first frame to write.
+        - samples: A numpy array of samples in the range -1 to 1; 2-D arrays write every channel.
+        - channel: The channel to write 1-D samples into (defaults to all channels).
+        """
+        samples = np.asarray(samples)
+        target = self.data[start:start + len(samples)]
+        if channel is not None and target.ndim == 2:
+            target = target[:, channel]
+        elif samples.ndim == 1 and target.ndim == 2:
+            samples = samples[:, None]
+        _from_float(samples, target)
+
+    def flush(self):
+        """
+        Write pending changes of a writable mapping to disk.
+        """
+        if self.data is not None and self.mode != 'r':
+            self.data.flush()
+
+    def close(self):
+        """
+        Flush and release the mapping; `data` and the views taken from it must not be used afterwards.
+        """
+        if self.data is None:
+            return
+        self.flush()
+        mmap = getattr(self.data, '_mmap', None)
+        self.data = None
+        if mmap is not None:
+            try:
+                mmap.close()
+            except BufferError:
+                # Views are still alive; the mapping is released with the last of them.
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _to_float(samples, dtype):
+    dtype = np.dtype(dtype)
+    if samples.dtype.kind == 'f':
+        return samples if samples.dtype == dtype else samples.astype(dtype)
+    if samples.dtype == np.uint8:
+        result = samples.astype(dtype)
+        result -= 128
+        result /= 128
+        return result
+    result = samples.astype(dtype)
+    result /= -float(np.iinfo(samples.dtype).min)
+    return result
+
+def _from_float(samples, target):
+    if target.dtype.kind == 'f':
+        target[...] = samples
+        return
+    scale = -float(np.iinfo(target.dtype).min) if target.dtype != np.uint8 else 128.0
+    scaled = np.clip(np.asarray(samples, dtype=np.float64) * scale, -scale, scale - 1)
+    if target.dtype == np.uint8:
+        scaled += 128
+    np.rint(scaled, out=scaled)
+    target[...] = scaled
+
+def _sample_dtype(format_tag, bits_per_sample):
+    dtype = _PCM_DTYPES.get((format_tag, bits_per_sample))
+    if dtype is None:
+        raise ValueError(f"Unsupported WAV sample format: tag {format_tag}, {bits_per_sample} bits")
+    return dtype
+
+def _read_wav_header(handle, file_size):
+    riff, _, wave = struct.unpack('<4sI4s', handle.read(12))
+    if riff != b'RIFF' or wave != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt = None
+    while True:
+        header = handle.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+        if chunk_id == b'fmt ':
+            body = handle.read(chunk_size)
+            format_tag, channels, sample_rate, _, _, bits_per_sample = struct.unpack('<HHIIHH', body[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                format_tag = struct.unpack('<H', body[24:26])[0]
+            fmt = (format_tag, channels, sample_rate, bits_per_sample)
+            handle.seek(chunk_size % 2, os.SEEK_CUR)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes its fmt chunk")
+            offset = handle.tell()
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF; trust the file length then.
+            if chunk_size in (0, 0xFFFFFFFF) or offset + chunk_size > file_size:
+                chunk_size = file_size - offset
+            return fmt, offset, chunk_size
+        else:
+            handle.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+def open_wav(path, mode='r'):
+    """
+    Memory-map a WAV file.
+
+    Parameters:
+    - path: The path of the WAV file (8/16/32-bit integer PCM or 32/64-bit float).
+    - mode: 'r' for read-only access, 'r+' to modify the samples in place.
+
+    Returns:
+    - A MappedAudio over the file's data chunk.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        (format_tag, channels, sample_rate, bits_per_sample), offset, data_size = _read_wav_header(handle, file_size)
+    dtype = _sample_dtype(format_tag, bits_per_sample)
+    num_frames = data_size // (dtype.itemsize * channels)
+    shape = (num_frames,) if channels == 1 else (num_frames, channels)
+    if num_frames == 0:
+        data = np.zeros(shape, dtype=dtype)
+    else:
+        data = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+    return MappedAudio(path, data, sample_rate, channels, mode)
+
+def create_wav(path, num_frames, sample_rate=44100, channels=1, dtype=np.float32):
+    """
+    Create a WAV file of the given size and memory-map it for writing.
+
+    The file is allocated up front (sparsely, where the filesystem allows), so a render can
+    write into `channel()` views of it with `out=` and never hold the whole sound in memory.
+
+    Parameters:
+    - path: The path of the WAV file to create (overwritten if it exists).
+    - num_frames: The number of sample frames in the file.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - channels: The number of channels.
+    - dtype: The sample format: np.float32, np.float64, np.int16, np.int32 or np.uint8.
+
+    Returns:
+    - A writable MappedAudio.
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    format_tag = WAVE_FORMAT_IEEE_FLOAT if dtype.kind == 'f' else WAVE_FORMAT_PCM
+    bits_per_sample = dtype.itemsize * 8
+    _sample_dtype(format_tag, bits_per_sample)
+    block_align = channels * dtype.itemsize
+    data_size = int(num_frames) * block_align
+    if data_size > _MAX_DATA_BYTES:
+        raise ValueError("WAV files are limited to 4 GiB; use create_raw for larger renders")
+    header = struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, format_tag, channels,
+                         sample_rate, sample_rate * block_align, block_align, bits_per_sample, b'data', data_size)
+    with open(path, 'wb') as handle:
+        handle.write(header)
+        handle.truncate(len(header) + data_size)
+    return open_wav(path, mode='r+')
+
+def open_raw(path, sample_rate=44100, dtype=np.float32, channels=1, offset=0, mode='r'):
+    """
+    Memory-map a headerless PCM file.
+
+    Parameters:
+    - path: The path of the raw file.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - dtype: The sample format stored in the file.
+    - channels: The number of interleaved channels.
+    - offset: The number of bytes to skip at the start of the file.
+    - mode: 'r' for read-only access, 'r+' to modify the samples in place.
+
+    Returns:
+    - A MappedAudio over the file.
+    """
+    dtype = np.dtype(dtype)
+    num_frames = (os.path.getsize(path) - offset) // (dtype.itemsize * channels)
+    shape = (num_frames,) if channels == 1 else (num_frames, channels)
+    if num_frames == 0:
+        data = np.zeros(shape, dtype=dtype)
+    else:
+        data = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=shape)
+    return MappedAudio(path, data, sample_rate, channels, mode)
+
+def create_raw(path, num_frames, sample_rate=44100, channels=1, dtype=np.float32):
+    """
+    Create a headerless PCM file of the given size and memory-map it for writing.
+
+    Unlike WAV, raw files have no size limit.
+
+    Parameters:
+    - path: The path of the raw file to create (overwritten if it exists).
+    - num_frames: The number of sample frames in the file.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - channels: The number of interleaved channels.
+    - dtype: The sample format.
+
+    Returns:
+    - A writable MappedAudio.
+    """
+    dtype = np.dtype(dtype)
+    with open(path, 'wb') as handle:
+        handle.truncate(int(num_frames) * channels * dtype.itemsize)
+    return open_raw(path, sample_rate, dtype, channels, mode='r+')
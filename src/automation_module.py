@@ -0,0 +1,135 @@
+import numpy as np
+from src.render_graph_module import Node, RenderGraph
+
+class Automation(Node):
+    """
+    A control signal (an envelope) described compactly and evaluated one block at a time.
+
+    Automations are render graph nodes, so they can be passed wherever a function takes an
+    envelope array and are only expanded one tile at a time during the render.
+    """
+
+    def at(self, times):
+        """
+        Return the value of the automation at the given times (in seconds).
+        """
+        raise NotImplementedError
+
+    def render(self, num_samples, sample_rate=44100, dtype=None, out=None):
+        """
+        Expand the automation into an array, for code that needs the whole envelope.
+
+        Parameters:
+        - num_samples: The number of samples to render.
+        - sample_rate: The sample rate (in samples per second).
+        - dtype: The sample dtype of the result (defaults to the precision policy).
+        - out: An optional array to write the result into.
+
+        Returns:
+        - A numpy array containing the envelope.
+        """
+        return RenderGraph(self, sample_rate).render(num_samples, dtype, out)
+
+class Breakpoints(Automation):
+    """
+    A piecewise-linear envelope through (time, value) breakpoints.
+
+    Before the first breakpoint the envelope holds the first value, and after the last one the
+    last value. Two breakpoints at the same time make a step.
+    """
+
+    def __init__(self, times, values):
+        """
+        Parameters:
+        - times: The breakpoint times (in seconds), in non-decreasing order.
+        - values: The envelope value at each breakpoint.
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.times.ndim != 1 or len(self.times) == 0 or self.times.shape != self.values.shape:
+            raise ValueError("Breakpoints need matching, non-empty 1-D times and values")
+        if np.any(np.diff(self.times) < 0):
+            raise ValueError("Breakpoint times must be in non-decreasing order")
+        spans = np.diff(self.times)
+        self._slopes = np.divide(np.diff(self.values), spans, out=np.zeros(len(spans)), where=spans > 0)
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Create breakpoints from a list of (time, value) tuples.
+        """
+        times, values = zip(*points)
+        return cls(times, values)
+
+    def at(self, times):
+        return np.interp(times, self.times, self.values)
+
+    def evaluate(self, context, start, stop, out):
+        time = context.tile_time(start, stop)
+        # Breakpoints inside the tile split it into runs that each lie on one segment.
+        first = np.searchsorted(self.times, time[0], side='right')
+        last = np.searchsorted(self.times, time[-1], side='right')
+        edges = [0, *np.searchsorted(time, self.times[first:last]), len(time)]
+        for segment, (begin, end) in enumerate(zip(edges[:-1], edges[1:]), first - 1):
+            if begin == end:
+                continue
+            if segment < 0:
+                out[begin:end] = self.values[0]
+            elif segment >= len(self._slopes):
+                out[begin:end] = self.values[-1]
+            elif self._slopes[segment] == 0:
+                out[begin:end] = self.values[segment]
+            else:
+                run = np.subtract(time[begin:end], self.times[segment], out=out[begin:end])
+                run *= self._slopes[segment]
+                run += self.values[segment]
+
+class ADSR(Breakpoints):
+    """
+    An attack-decay-sustain-release envelope.
+
+    The envelope rises linearly from 0 to `peak` over the attack, falls to the sustain level over
+    the decay and holds it. When the note length is known, the release is a linear fall to 0 that
+    ends with the note; a note shorter than attack + decay is released from wherever it got to.
+    """
+
+    def __init__(self, attack=0.0, decay=0.0, sustain=1.0, release=0.0, duration=None, peak=1.0):
+        """
+        Parameters:
+        - attack: The attack time (in seconds).
+        - decay: The decay time (in seconds).
+        - sustain: The sustain level.
+        - release: The release time (in seconds).
+        - duration: The note length (in seconds), including the release; None holds the sustain.
+        - peak: The level at the end of the attack.
+        """
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release = release
+        self.duration = duration
+        self.peak = peak
+        times = np.array([0.0, attack, attack + decay])
+        values = np.array([0.0, peak, sustain])
+        if duration is not None:
+            note_off = max(duration - release, 0.0)
+            level = np.interp(note_off, times, values)
+            held = times < note_off
+            times = np.concatenate((times[held], [note_off, note_off + release]))
+            values = np.concatenate((values[held], [level, 0.0]))
+        super().__init__(times, values)
+
+    @classmethod
+    def from_dict(cls, params, duration=None):
+        """
+        Create an envelope from a dictionary such as {'attack': 0.1, 'decay': 0.1, 'sustain': 0.7, 'release': 0.1}.
+
+        Parameters:
+        - params: A dictionary with any of the keys 'attack', 'decay', 'sustain', 'release' and 'peak'.
+        - duration: The note length (in seconds).
+
+        Returns:
+        - An ADSR envelope.
+        """
+        return cls(params.get('attack', 0.0), params.get('decay', 0.0), params.get('sustain', 1.0),
+                   params.get('release', 0.0), duration, params.get('peak', 1.0))
@@ -0,0 +1,416 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MEMORY_THRESHOLD = 0.20
+
+def measure(func, args=(), kwargs=None, warmup=2, repeat=7, number=1, memory=True):
+    """
+    Time a function with warm-up runs and repeated `perf_counter` measurements.
+
+    Parameters:
+    - func: The function to benchmark.
+    - args: Positional arguments for the function.
+    - kwargs: Keyword arguments for the function.
+    - warmup: The number of untimed calls made first (to fill caches and FFT plans).
+    - repeat: The number of timed measurements.
+    - number: The number of calls per measurement.
+    - memory: If True, make one more call under tracemalloc to record the peak allocation.
+
+    Returns:
+    - A dictionary with the per-call 'min', 'median', 'mean' and 'stdev' wall times, the median
+      per-call 'cpu' time (in seconds), the 'repeat' and 'number' used, and 'peak_bytes' (or None).
+    """
+    kwargs = kwargs or {}
+    for _ in range(warmup):
+        func(*args, **kwargs)
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeat):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args, **kwargs)
+        wall_times.append((time.perf_counter() - start) / number)
+        cpu_times.append((time.process_time() - cpu_start) / number)
+    peak_bytes = None
+    if memory:
+        # Measured separately, as tracing slows allocation down.
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(*args, **kwargs)
+        peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+        if not was_tracing:
+            tracemalloc.stop()
+    return {
+        'min': min(wall_times),
+        'median': statistics.median(wall_times),
+        'mean': statistics.fmean(wall_times),
+        'stdev': statistics.stdev(wall_times) if len(wall_times) > 1 else 0.0,
+        'cpu': statistics.median(cpu_times),
+        'repeat': repeat,
+        'number': number,
+        'peak_bytes': peak_bytes,
+    }
+
+class BenchmarkCase:
+    """
+    One benchmark: a function and the parameters of the inputs it is run on.
+    """
+
+    def __init__(self, name, func, setup, params=None):
+        """
+        Parameters:
+        - name: The benchmark name, usually the module and function name.
+        - func: The function to benchmark.
+        - setup: A function called as setup(**params) that returns the (args, kwargs) to call func with.
+        - params: A dictionary of input parameters (e.g. signal length, harmonic count, batch size).
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.params = dict(params or {})
+
+    @property
+    def key(self):
+        """The unique result key, e.g. 'harmonic.generate_harmonic_sound[harmonics=8,length=44100]'."""
+        if not self.params:
+            return self.name
+        return f"{self.name}[{','.join(f'{name}={value}' for name, value in sorted(self.params.items()))}]"
+
+class BenchmarkSuite:
+    """
+    A collection of benchmark cases that can be run, saved and compared against a baseline.
+    """
+
+    def __init__(self, cases=()):
+        self.cases = list(cases)
+
+    def add(self, name, func, setup, **params):
+        """
+        Add a case; see `BenchmarkCase` for the arguments.
+        """
+        self.cases.append(BenchmarkCase(name, func, setup, params))
+
+    def run(self, pattern=None, warmup=2, repeat=7, number=1, memory=True, progress=None):
+        """
+        Run the cases.
+
+        Parameters:
+        - pattern: An optional fnmatch pattern; only cases whose key matches are run.
+        - warmup, repeat, number, memory: As for `measure`.
+        - progress: An optional function called as progress(key, result) after each case.
+
+        Returns:
+        - A results dictionary with 'metadata' and 'results' (one `measure` result per case key).
+        """
+        results = {}
+        for case in self.cases:
+            if pattern is not None and not fnmatch.fnmatch(case.key, pattern):
+                continue
+            args, kwargs = case.setup(**case.params)
+            result = measure(case.func, args, kwargs, warmup, repeat, number, memory)
+            result['params'] = case.params
+            results[case.key] = result
+            if progress is not None:
+                progress(case.key, result)
+        return {'metadata': environment_metadata(), 'results': results}
+
+def environment_metadata():
+    """
+    Return a description of the machine and library versions, stored alongside results.
+    """
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def save_results(results, path):
+    """
+    Write benchmark results to a JSON file.
+    """
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+
+def load_results(path):
+    """
+    Read benchmark results from a JSON file.
+    """
+    with open(path) as handle:
+        return json.load(handle)
+
+def _threshold_for(key, threshold, thresholds):
+    for pattern, value in (thresholds or {}).items():
+        if fnmatch.fnmatch(key, pattern):
+            return value
+    return threshold
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD, thresholds=None, metric='median'):
+    """
+    Compare benchmark results against a baseline.
+
+    Parameters:
+    - current: The results of the current run.
+    - baseline: The stored baseline results.
+    - threshold: The allowed relative slowdown of `metric` (0.10 means 10%).
+    - memory_threshold: The allowed relative growth of the peak allocation.
+    - thresholds: An optional dictionary of fnmatch patterns to time thresholds overriding `threshold`
+      for the matching case keys (the first matching pattern wins).
+    - metric: The timing statistic compared ('min', 'median' or 'mean').
+
+    Returns:
+    - A list of dictionaries, one per regression, with the case 'key', the 'metric' that regressed,
+      the 'baseline' and 'current' values, their 'ratio' and the 'threshold' exceeded. Cases that
+      appear in only one of the runs are ignored.
+    """
+    regressions = []
+    baseline_results = baseline.get('results', {})
+    for key, result in current.get('results', {}).items():
+        reference = baseline_results.get(key)
+        if reference is None:
+            continue
+        checks = [(metric, _threshold_for(key, threshold, thresholds))]
+        if result.get('peak_bytes') is not None and reference.get('peak_bytes'):
+            checks.append(('peak_bytes', memory_threshold))
+        for name, limit in checks:
+            if not reference.get(name):
+                continue
+            ratio = result[name] / reference[name]
+            if ratio > 1 + limit:
+                regressions.append({'key': key, 'metric': name, 'baseline': reference[name], 'current': result[name],
+                                    'ratio': ratio, 'threshold': limit})
+    return regressions
+
+def format_regressions(regressions):
+    """
+    Format regressions as a human-readable report.
+    """
+    if not regressions:
+        return "No regressions."
+    lines = [f"{len(regressions)} regression(s):"]
+    for regression in regressions:
+        lines.append(f"  {regression['key']} {regression['metric']}: {regression['baseline']:.6g} -> "
+                     f"{regression['current']:.6g} ({regression['ratio'] - 1:+.1%}, allowed {regression['threshold']:+.0%})")
+    return "\n".join(lines)
+
+HEAVY_MODULES = ('pyfftw', 'scipy', 'scipy.signal', 'scipy.fft')
+IMPORT_TIME_MODULES = ('src.acoustic_analysis_module', 'src.harmonic_sounds_module', 'src.integration_module')
+
+def measure_import_time(module, repeat=5, cwd=None):
+    """
+    Measure how long a fresh interpreter takes to import a module, using `python -X importtime`.
+
+    Parameters:
+    - module: The dotted module name, e.g. 'src.acoustic_analysis_module'.
+    - repeat: The number of fresh interpreters to time.
+    - cwd: The directory to run them from (defaults to the directory containing `src`).
+
+    Returns:
+    - A dictionary with the median cumulative import time of the module ('seconds', excluding
+      interpreter start-up), the 'min' over runs, the slowest imported modules by their own time
+      ('slowest', a list of (module, seconds) pairs) and which heavy optional dependencies the
+      import pulled in ('heavy_modules').
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = f"import {module}, sys, json; print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    totals = []
+    self_times = {}
+    heavy = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, capture_output=True, text=True, check=True)
+        heavy = json.loads(completed.stdout.strip().splitlines()[-1])
+        total = 0
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            self_times[name] = min(self_times.get(name, float('inf')), int(own) / 1e6)
+            if name == module:
+                total = int(cumulative) / 1e6
+        totals.append(total)
+    slowest = sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {'module': module, 'seconds': statistics.median(totals), 'min': min(totals), 'slowest': slowest, 'heavy_modules': heavy}
+
+def _signal(length, sample_rate=44100, seed=0):
+    t = np.arange(length) / sample_rate
+    noise = np.random.default_rng(seed).normal(0, 0.1, length)
+    return np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 440 * t) + noise
+
+def _crowd(voices, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'pitch': rng.uniform(90, 250), 'formants': [(rng.uniform(300, 900), 60), (rng.uniform(900, 2500), 90)],
+             'gain': 0.01, 'start': rng.uniform(0, 1), 'duration': rng.uniform(0.2, 1)} for _ in range(voices)]
+
+def _render_voices_looped(notes, duration, sample_rate, method):
+    # The loop `render_voices` replaces: one generator call per note, added into the mix.
+    from src.acoustic_analysis_module import generate_synthetic_speech
+    from src.harmonic_sounds_module import generate_formant_sound
+    mix = np.zeros(int(sample_rate * duration))
+    for note in notes:
+        if method == 'envelope':
+            voice = generate_synthetic_speech(note['pitch'], [freq for freq, _ in note['formants']],
+                                              [bandwidth for _, bandwidth in note['formants']], note['duration'], sample_rate)
+        else:
+            voice = generate_formant_sound(note['pitch'], note['formants'], note['duration'], sample_rate)
+        start = int(round(note['start'] * sample_rate))
+        length = max(min(len(voice), len(mix) - start), 0)
+        mix[start:start + length] += note['gain'] * voice[:length]
+    return mix
+
+def default_suite(quick=False):
+    """
+    Build the benchmark suite covering the public functions of the harmonic sounds, acoustic
+    analysis and integration modules.
+
+    Parameters:
+    - quick: If True, use a single small size per parameter (for smoke tests).
+
+    Returns:
+    - A BenchmarkSuite.
+    """
+    from src import acoustic_analysis_module as acoustic
+    from src import harmonic_sounds_module as harmonic
+    from src import integration_module as integration
+    from src import polyphony_module as polyphony
+    from src import wavetable_module as wavetable
+
+    sample_rate = 44100
+    lengths = (4096,) if quick else (4096, 44100, 441000)
+    harmonic_counts = (4,) if quick else (1, 8, 64)
+    batch_sizes = (2,) if quick else (1, 16, 64)
+    voice_counts = (4,) if quick else (16, 500)
+    formants = [(500, 50), (1500, 75), (2500, 100)]
+    formant_freqs = [freq for freq, _ in formants]
+    bandwidths = [bandwidth for _, bandwidth in formants]
+    suite = BenchmarkSuite()
+
+    def signal_args(*extra, **kwargs):
+        return lambda length: ((_signal(length),) + extra, dict(kwargs))
+
+    for length in lengths:
+        for count in harmonic_counts:
+            suite.add('harmonic.generate_harmonic_sound', harmonic.generate_harmonic_sound,
+                      lambda length, harmonics: ((220, [(number, 1.0 / number) for number in range(1, harmonics + 1)], length / sample_rate, sample_rate), {}),
+                      length=length, harmonics=count)
+            suite.add('harmonic.render_additive', harmonic.render_additive,
+                      lambda length, harmonics: ((np.arange(1, harmonics + 1) * 110.0, np.ones(harmonics), length, sample_rate), {}),
+                      length=length, harmonics=count)
+            suite.add('harmonic.control_parameters', harmonic.control_parameters,
+                      lambda length, harmonics: ((_signal(length), np.linspace(0, 1, length), [(number, 0.1) for number in range(1, harmonics + 1)],
+                                                  _signal(length, seed=1), formant_freqs, {'attack': 0.1, 'sustain': 0.7, 'decay': 0.1, 'release': 0.1}, sample_rate), {}),
+                      length=length, harmonics=count)
+        suite.add('harmonic.generate_formant_sound', harmonic.generate_formant_sound,
+                  lambda length: ((220, formants, length / sample_rate, sample_rate), {}), length=length)
+        suite.add('harmonic.generate_noise', harmonic.generate_noise,
+                  lambda length: ((length / sample_rate, sample_rate), {}), length=length)
+        suite.add('harmonic.combine_sine_and_noise', harmonic.combine_sine_and_noise,
+                  lambda length: ((_signal(length), _signal(length, seed=1)), {}), length=length)
+        suite.add('harmonic.generate_syllabic_sound', harmonic.generate_syllabic_sound,
+                  lambda length: (([_signal(length // 4)] * 2, [_signal(length // 4, seed=1)], [('vowel', 0), ('consonant', 0), ('vowel', 1)],
+                                   length / 4 / sample_rate, sample_rate), {}), length=length)
+        suite.add('harmonic.real_time_spectral_analysis', harmonic.real_time_spectral_analysis,
+                  signal_args(sample_rate), length=length)
+        suite.add('harmonic.stream_spectral_analysis', lambda chunks, rate: list(harmonic.stream_spectral_analysis(chunks, rate)),
+                  lambda length: ((np.array_split(_signal(length), max(length // 1024, 1)), sample_rate), {}), length=length)
+        suite.add('harmonic.generate_complex_acoustic_phenomena', harmonic.generate_complex_acoustic_phenomena,
+                  lambda length: (([_signal(length)] * 3, [_signal(length, seed=1)] * 3, [np.linspace(1, 0, length)] * 3, sample_rate), {}), length=length)
+
+        for oscillator in ('sine', 'wavetable'):
+            suite.add('wavetable.render_oscillator', wavetable.render_oscillator,
+                      lambda length, oscillator: ((440.0, length, sample_rate, oscillator), {'out': np.empty(length)}),
+                      length=length, oscillator=oscillator)
+
+        suite.add('acoustic.analyze_frequency_spectrum', acoustic.analyze_frequency_spectrum, signal_args(sample_rate), length=length)
+        suite.add('acoustic.detect_formants', acoustic.detect_formants, signal_args(sample_rate), length=length)
+        suite.add('acoustic.calculate_harmonic_ratios', acoustic.calculate_harmonic_ratios, signal_args(sample_rate), length=length)
+        suite.add('acoustic.filter_noise_for_formants', acoustic.filter_noise_for_formants,
+                  signal_args(formant_freqs, bandwidths, sample_rate), length=length)
+        suite.add('acoustic.manipulate_spectral_envelope', acoustic.manipulate_spectral_envelope,
+                  lambda length: ((_signal(length), np.linspace(1, 0, length), sample_rate), {}), length=length)
+        suite.add('acoustic.apply_subharmonics', acoustic.apply_subharmonics, signal_args([110, 55], [0.5, 0.25], sample_rate), length=length)
+        suite.add('acoustic.apply_jitter_effects', acoustic.apply_jitter_effects, signal_args(0.01, sample_rate), length=length)
+        suite.add('acoustic.apply_pitch_modulation', acoustic.apply_pitch_modulation, signal_args(5, 0.5, sample_rate), length=length)
+        suite.add('acoustic.generate_synthetic_speech', acoustic.generate_synthetic_speech,
+                  lambda length: ((120, formant_freqs, bandwidths, length / sample_rate, sample_rate), {}), length=length)
+        for batch in batch_sizes:
+            clips = lambda length, batch: ((np.stack([_signal(length, seed=seed) for seed in range(batch)]), sample_rate), {})
+            suite.add('acoustic.analyze_frequency_spectrum_batch', acoustic.analyze_frequency_spectrum_batch, clips, length=length, batch=batch)
+            suite.add('acoustic.detect_formants_batch', acoustic.detect_formants_batch, clips, length=length, batch=batch)
+            suite.add('acoustic.calculate_harmonic_ratios_batch', acoustic.calculate_harmonic_ratios_batch, clips, length=length, batch=batch)
+
+        suite.add('integration.integrate_theoretical_acoustics_with_practical_synthesis',
+                  integration.integrate_theoretical_acoustics_with_practical_synthesis, signal_args(sample_rate), length=length)
+        suite.add('integration.integrate_new_tools_with_existing_tools', integration.integrate_new_tools_with_existing_tools,
+                  lambda length: (([_signal(length)] * 2, [_signal(length, seed=1)] * 2, [np.linspace(1, 0, length)] * 2,
+                                   120, formant_freqs, bandwidths, length / sample_rate, sample_rate), {}), length=length)
+
+    # The polyphonic engine against one generator call per note, on the same crowd.
+    for method in ('envelope', 'resonator'):
+        for count in voice_counts:
+            suite.add('polyphony.render_voices', polyphony.render_voices,
+                      lambda voices, method: ((_crowd(voices), 2.0, sample_rate), {'method': method}), voices=count, method=method)
+            suite.add('polyphony.render_voices_looped', _render_voices_looped,
+                      lambda voices, method: ((_crowd(voices), 2.0, sample_rate, method), {}), voices=count, method=method)
+    return suite
+
+def main(argv=None):
+    """
+    Run the default suite from the command line, save the results and compare them with a baseline.
+
+    Returns:
+    - The process exit code: 1 if a regression was found, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Run the AcouSynth benchmark suite.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', help="Compare against the results stored in this JSON file.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed relative slowdown.")
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD, help="Allowed relative peak-memory growth.")
+    parser.add_argument('--case-threshold', action='append', default=[], metavar='PATTERN=VALUE',
+                        help="Override the threshold for the cases matching an fnmatch pattern.")
+    parser.add_argument('--filter', help="Only run the cases matching this fnmatch pattern.")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--quick', action='store_true', help="Use the small smoke-test sizes.")
+    parser.add_argument('--import-time', action='store_true', help="Also time the cold import of each module.")
+    options = parser.parse_args(argv)
+
+    thresholds = {}
+    for item in options.case_threshold:
+        pattern, _, value = item.rpartition('=')
+        thresholds[pattern] = float(value)
+    results = default_suite(options.quick).run(options.filter, options.warmup, options.repeat,
+                                                progress=lambda key, result: print(f"{key}: {result['median'] * 1e3:.3f} ms"))
+    if options.import_time:
+        for module in IMPORT_TIME_MODULES:
+            timing = measure_import_time(module, options.repeat)
+            print(f"import {module}: {timing['seconds'] * 1e3:.1f} ms (heavy: {', '.join(timing['heavy_modules']) or 'none'})")
+            results['results'][f'import.{module}'] = {'median': timing['seconds'], 'min': timing['min'], 'peak_bytes': None,
+                                                       'heavy_modules': timing['heavy_modules']}
+    if options.output:
+        save_results(results, options.output)
+    if options.baseline:
+        regressions = compare_results(results, load_results(options.baseline), options.threshold, options.memory_threshold, thresholds)
+        print(format_regressions(regressions))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
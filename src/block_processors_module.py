@@ -0,0 +1,187 @@
+import numpy as np
+from src.noise_module import make_rng
+from src.resonator_module import ResonatorBank
+
+class BlockProcessor:
+    """
+    Base class for effects that process a signal one block at a time.
+
+    Subclasses keep their oscillator phases, envelope position and random state between calls
+    to `process`, so that feeding a signal in blocks of any size produces the same output as
+    processing it in one call.
+    """
+
+    def __init__(self, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self.position = 0
+
+    def reset(self):
+        """
+        Return the processor to its initial state (time zero).
+        """
+        self.position = 0
+
+    def process(self, block):
+        """
+        Process the next block of the signal.
+
+        Parameters:
+        - block: A 1-D numpy array containing the next samples of the signal.
+
+        Returns:
+        - A numpy array containing the processed block.
+        """
+        block = np.asarray(block)
+        output = self._process(block)
+        self.position += len(block)
+        return output
+
+    def _process(self, block):
+        raise NotImplementedError
+
+    def process_signal(self, signal, block_size=4096):
+        """
+        Process a whole signal in fixed-size blocks, continuing from the current state.
+
+        Parameters:
+        - signal: A 1-D numpy array containing the signal.
+        - block_size: The number of samples per block.
+
+        Returns:
+        - A numpy array containing the processed signal.
+        """
+        return np.concatenate([self.process(signal[start:start + block_size]) for start in range(0, len(signal), block_size)] or [np.zeros(0)])
+
+class _OscillatorBank:
+    """
+    Sinusoids with running phases kept in cycles, so they stay continuous across blocks.
+    """
+
+    def __init__(self, freqs, sample_rate):
+        self.increments = np.asarray(freqs, dtype=np.float64) / sample_rate
+        self.phases = np.zeros(len(self.increments))
+
+    def reset(self):
+        self.phases.fill(0)
+
+    def render(self, num_samples):
+        cycles = np.outer(self.increments, np.arange(num_samples, dtype=np.float64))
+        cycles += self.phases[:, None]
+        self.phases = np.mod(self.phases + self.increments * num_samples, 1.0)
+        return np.sin(2 * np.pi * cycles)
+
+class SubharmonicProcessor(BlockProcessor):
+    """
+    Block-wise equivalent of `apply_subharmonics`.
+    """
+
+    def __init__(self, subharmonic_freqs, amplitudes, sample_rate=44100):
+        """
+        Parameters:
+        - subharmonic_freqs: A list of subharmonic frequencies to be added.
+        - amplitudes: A list of amplitudes for each subharmonic frequency.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        """
+        super().__init__(sample_rate)
+        count = min(len(subharmonic_freqs), len(amplitudes))
+        self.amplitudes = np.asarray(amplitudes[:count], dtype=np.float64)
+        self._oscillators = _OscillatorBank(subharmonic_freqs[:count], sample_rate)
+
+    def reset(self):
+        super().reset()
+        self._oscillators.reset()
+
+    def _process(self, block):
+        return block + self.amplitudes @ self._oscillators.render(len(block))
+
+class PitchModulationProcessor(BlockProcessor):
+    """
+    Block-wise equivalent of `apply_pitch_modulation`.
+    """
+
+    def __init__(self, modulation_freq, modulation_depth, sample_rate=44100):
+        """
+        Parameters:
+        - modulation_freq: The frequency of the pitch modulation.
+        - modulation_depth: The depth of the pitch modulation.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        """
+        super().__init__(sample_rate)
+        self.modulation_depth = modulation_depth
+        self._oscillator = _OscillatorBank([modulation_freq], sample_rate)
+
+    def reset(self):
+        super().reset()
+        self._oscillator.reset()
+
+    def _process(self, block):
+        return block * self._oscillator.render(len(block))[0] * self.modulation_depth
+
+class JitterProcessor(BlockProcessor):
+    """
+    Block-wise equivalent of `apply_jitter_effects`, drawing from its own random state.
+    """
+
+    def __init__(self, jitter_amount, sample_rate=44100, random_state=None):
+        """
+        Parameters:
+        - jitter_amount: The amount of jitter to be applied.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        - random_state: A seed, SeedSequence, numpy Generator or numpy.random.RandomState (see
+          `make_rng`); the same seed gives the same jitter as apply_jitter_effects(rng=seed),
+          however the signal is split into blocks.
+        """
+        super().__init__(sample_rate)
+        self.jitter_amount = jitter_amount
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = make_rng(random_state)
+        self.random_state = random_state
+        if isinstance(random_state, np.random.RandomState):
+            self._initial_state = random_state.get_state()
+        else:
+            self._initial_state = random_state.bit_generator.state
+
+    def reset(self):
+        super().reset()
+        if isinstance(self.random_state, np.random.RandomState):
+            self.random_state.set_state(self._initial_state)
+        else:
+            self.random_state.bit_generator.state = self._initial_state
+
+    def _process(self, block):
+        return block * (1 + self.jitter_amount * self.random_state.standard_normal(len(block)))
+
+class FormantNoiseFilterProcessor(BlockProcessor):
+    """
+    Block-wise equivalent of `filter_noise_for_formants`.
+    """
+
+    def __init__(self, formant_freqs, bandwidths, sample_rate=44100, method='resonator'):
+        """
+        Parameters:
+        - formant_freqs: A list of formant frequencies to be emphasized.
+        - bandwidths: A list of bandwidths for each formant frequency.
+        - sample_rate: The sample rate of the noise (in samples per second).
+        - method: 'resonator' or 'envelope', as for `filter_noise_for_formants`.
+        """
+        super().__init__(sample_rate)
+        if method not in ('resonator', 'envelope'):
+            raise ValueError(f"Unknown formant method: {method}")
+        self.method = method
+        count = min(len(formant_freqs), len(bandwidths))
+        self.bandwidths = np.asarray(bandwidths[:count], dtype=np.float64)
+        self._oscillators = _OscillatorBank(formant_freqs[:count], sample_rate)
+        self._resonators = ResonatorBank(formant_freqs[:count], bandwidths[:count], sample_rate)
+
+    def reset(self):
+        super().reset()
+        self._oscillators.reset()
+        self._resonators.reset()
+
+    def _process(self, block):
+        if self.method == 'resonator':
+            return self._resonators.process_mix(block)
+        t = (self.position + np.arange(len(block))) / self.sample_rate
+        gains = self._oscillators.render(len(block))
+        gains *= np.exp(-np.outer(self.bandwidths, t))
+        return block * np.prod(gains, axis=0)
@@ -0,0 +1,215 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from src.fft_backend_module import get_fft_backend
+from src.instrumentation_module import instrumented
+from src.precision_module import prepare_output, resolve_dtype
+
+CONVOLUTION_BLOCK_SIZE = 512
+# Offline renders have no latency budget, and longer blocks need fewer partitions per output sample.
+OFFLINE_CONVOLUTION_BLOCK_SIZE = 4096
+# Blocks transformed together when a call brings many of them; a fixed count keeps the FFT plans reusable.
+CONVOLUTION_BATCH_BLOCKS = 32
+IR_CACHE_SIZE = 32
+
+_ir_cache = OrderedDict()
+_ir_cache_lock = threading.Lock()
+
+def ir_partition_spectra(ir, block_size=CONVOLUTION_BLOCK_SIZE, dtype=None):
+    """
+    Return the spectra of an impulse response cut into uniform partitions, cached per IR.
+
+    Each partition of `block_size` samples is zero-padded to 2 * block_size and transformed with
+    the shared FFT backend. Results are cached by the content of the IR (least-recently-used
+    beyond IR_CACHE_SIZE entries), so many convolvers and renders share one set of spectra.
+
+    Parameters:
+    - ir: A 1-D numpy array containing the impulse response.
+    - block_size: The partition length (in samples).
+    - dtype: The sample dtype the spectra are computed in (defaults to the precision policy).
+
+    Returns:
+    - A read-only (partitions, block_size + 1) complex numpy array.
+    """
+    dtype = resolve_dtype(dtype)
+    ir = np.ascontiguousarray(ir, dtype=np.float64)
+    if ir.ndim != 1 or len(ir) == 0:
+        raise ValueError("An impulse response must be a non-empty 1-D array")
+    backend = get_fft_backend()
+    key = (hashlib.sha1(ir.tobytes()).hexdigest(), len(ir), block_size, dtype.str, backend.name)
+    with _ir_cache_lock:
+        spectra = _ir_cache.get(key)
+        if spectra is not None:
+            _ir_cache.move_to_end(key)
+            return spectra
+    num_partitions = -(-len(ir) // block_size)
+    padded = np.zeros(num_partitions * block_size)
+    padded[:len(ir)] = ir
+    partitions = np.zeros((num_partitions, 2 * block_size), dtype=dtype)
+    partitions[:, :block_size] = padded.reshape(num_partitions, block_size)
+    spectra = backend.rfft(partitions)
+    spectra.flags.writeable = False
+    with _ir_cache_lock:
+        _ir_cache[key] = spectra
+        if len(_ir_cache) > IR_CACHE_SIZE:
+            _ir_cache.popitem(last=False)
+    return spectra
+
+def clear_ir_cache():
+    """
+    Drop every cached impulse response spectrum.
+    """
+    with _ir_cache_lock:
+        _ir_cache.clear()
+
+class PartitionedConvolver:
+    """
+    Convolution with a long impulse response by uniformly partitioned overlap-save.
+
+    The IR is cut into partitions of `block_size` samples whose spectra are precomputed (see
+    `ir_partition_spectra`). Each input block is transformed once into a frequency-domain delay
+    line, and each output block is the inverse transform of the delay line times the partition
+    spectra, so the cost per sample grows with the IR length over the block size rather than with
+    the IR length, and no transform is longer than 2 * block_size.
+
+    Input is buffered until a block is complete, so the output lags the input by exactly
+    `latency` (= block_size) samples, however the signal is split into calls to `process`.
+    """
+
+    def __init__(self, ir, block_size=CONVOLUTION_BLOCK_SIZE, channels=None, dtype=None):
+        """
+        Parameters:
+        - ir: A 1-D numpy array containing the impulse response (a body, vocal tract or room).
+        - block_size: The partition and block length (in samples); it is also the latency.
+        - channels: None to process 1-D blocks, or the number of rows of 2-D (channels, samples)
+          blocks, all convolved with the same IR.
+        - dtype: The sample dtype (defaults to the precision policy).
+        """
+        self.block_size = block_size
+        self.latency = block_size
+        self.channels = channels
+        self.dtype = resolve_dtype(dtype)
+        self.spectra = ir_partition_spectra(ir, block_size, self.dtype)
+        self.num_partitions = len(self.spectra)
+        self._backend = get_fft_backend()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the input buffer, the delay line and the pending output.
+        """
+        rows = self.channels or 1
+        bins = self.block_size + 1
+        # The frequency-domain delay line is a ring of input block spectra with room for the
+        # partitions - 1 previous blocks and one batch of new ones; _head is the next slot to write.
+        self._slots = self.num_partitions - 1 + CONVOLUTION_BATCH_BLOCKS
+        self._ring = np.zeros((rows, self._slots, bins), dtype=self.spectra.dtype)
+        self._head = 0
+        self._products = np.empty((rows, CONVOLUTION_BATCH_BLOCKS, bins), dtype=self.spectra.dtype)
+        self._scratch = np.empty_like(self._products)
+        # The previous input block and the samples of the incomplete current one.
+        self._input = np.zeros((rows, self.block_size), dtype=self.dtype)
+        self._output = np.zeros((rows, self.latency), dtype=self.dtype)
+
+    def _ring_runs(self, start, count):
+        """
+        Split `count` consecutive ring slots from `start` (taken modulo the ring size) into
+        contiguous (slot, offset, length) runs, where offset counts blocks from the first slot.
+        """
+        start %= self._slots
+        first = min(count, self._slots - start)
+        yield start, 0, first
+        if first < count:
+            yield 0, first, count - first
+
+    def _convolve_blocks(self, frames):
+        """
+        Convolve (rows, count, 2 * block_size) overlapping input frames, returning (rows, count * block_size) samples.
+        """
+        rows, count, size = frames.shape
+        spectra = self._backend.rfft(frames.reshape(rows * count, size)).reshape(rows, count, -1)
+        for slot, offset, length in self._ring_runs(self._head, count):
+            self._ring[:, slot:slot + length] = spectra[:, offset:offset + length]
+        # Output block j sums partition p times the spectrum of input block j - p, one partition at a
+        # time over all the blocks, which keeps every operand a contiguous run of the ring.
+        products = self._products[:, :count]
+        scratch = self._scratch[:, :count]
+        for slot, offset, length in self._ring_runs(self._head, count):
+            np.multiply(self._ring[:, slot:slot + length], self.spectra[0], out=products[:, offset:offset + length])
+        for partition in range(1, self.num_partitions):
+            for slot, offset, length in self._ring_runs(self._head - partition, count):
+                np.multiply(self._ring[:, slot:slot + length], self.spectra[partition], out=scratch[:, offset:offset + length])
+            products += scratch
+        self._head = (self._head + count) % self._slots
+        blocks = self._backend.irfft(products.reshape(rows * count, -1), size)
+        return blocks[:, self.block_size:].reshape(rows, count * self.block_size)
+
+    @instrumented()
+    def process(self, block):
+        """
+        Convolve the next block of the signal.
+
+        Parameters:
+        - block: A 1-D numpy array, or a (channels, samples) array when the convolver has channels.
+
+        Returns:
+        - A numpy array of the same shape, delayed by `latency` samples.
+        """
+        block = np.asarray(block)
+        samples = np.atleast_2d(block).astype(self.dtype, copy=False)
+        buffered = np.concatenate((self._input, samples), axis=1)
+        complete = (buffered.shape[1] - self.block_size) // self.block_size
+        produced = [self._output]
+        for first in range(0, complete, CONVOLUTION_BATCH_BLOCKS):
+            count = CONVOLUTION_BATCH_BLOCKS if complete - first >= CONVOLUTION_BATCH_BLOCKS else 1
+            for start in range(first, min(first + CONVOLUTION_BATCH_BLOCKS, complete), count):
+                frames = np.lib.stride_tricks.sliding_window_view(buffered, 2 * self.block_size, axis=1)
+                frames = frames[:, start * self.block_size:(start + count) * self.block_size:self.block_size]
+                produced.append(self._convolve_blocks(frames))
+        self._input = buffered[:, complete * self.block_size:].copy()
+        output = np.concatenate(produced, axis=1)
+        length = samples.shape[1]
+        self._output = output[:, length:].copy()
+        output = output[:, :length]
+        return output[0] if block.ndim == 1 else output
+
+@instrumented()
+def convolve_ir(sound, ir, block_size=OFFLINE_CONVOLUTION_BLOCK_SIZE, include_tail=True, dtype=None, out=None):
+    """
+    Convolve a sound with an impulse response by uniformly partitioned overlap-save.
+
+    The result equals np.convolve(sound, ir) (or its first len(sound) samples without the tail),
+    with the convolver's latency removed.
+
+    Parameters:
+    - sound: A 1-D numpy array, or a 2-D array with one signal per row.
+    - ir: A 1-D numpy array containing the impulse response.
+    - block_size: The partition length (in samples).
+    - include_tail: Whether to keep the len(ir) - 1 samples of decay after the sound ends.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
+
+    Returns:
+    - A numpy array containing the convolved sound.
+    """
+    sound = np.asarray(sound)
+    num_samples = sound.shape[-1]
+    length = num_samples + len(ir) - 1 if include_tail else num_samples
+    result = prepare_output(out, sound.shape[:-1] + (length,), dtype)
+    convolver = PartitionedConvolver(ir, block_size, sound.shape[0] if sound.ndim == 2 else None, result.dtype)
+    chunk = CONVOLUTION_BATCH_BLOCKS * block_size
+    # Feed the sound, then silence for the tail; the first `latency` output samples are dropped.
+    skip = convolver.latency
+    written = 0
+    for start in range(0, length + convolver.latency, chunk):
+        stop = min(start + chunk, length + convolver.latency)
+        samples = sound[..., start:stop]
+        if samples.shape[-1] < stop - start:
+            samples = np.concatenate((samples, np.zeros(sound.shape[:-1] + (stop - start - samples.shape[-1],), dtype=result.dtype)), axis=-1)
+        output = convolver.process(samples)[..., skip:]
+        skip = max(skip - (stop - start), 0)
+        result[..., written:written + output.shape[-1]] = output
+        written += output.shape[-1]
+    return result
@@ -0,0 +1,359 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from src.instrumentation_module import instrumented
+
+DEFAULT_BACKEND_ORDER = ('pyfftw', 'scipy', 'numpy')
+
+# Wisdom files hold the (double, single, long double) wisdom strings as length-prefixed raw bytes.
+WISDOM_MAGIC = b'ACOUSYNTH-FFTW-WISDOM\x00'
+WISDOM_SETS = 3
+
+def _encode_wisdom(wisdom):
+    if len(wisdom) != WISDOM_SETS or not all(isinstance(item, bytes) for item in wisdom):
+        raise ValueError("FFTW wisdom must be a tuple of three bytes objects")
+    return WISDOM_MAGIC + b''.join(struct.pack('<Q', len(item)) + item for item in wisdom)
+
+def _decode_wisdom(data):
+    if not data.startswith(WISDOM_MAGIC):
+        raise ValueError("Not an FFTW wisdom file")
+    wisdom = []
+    offset = len(WISDOM_MAGIC)
+    for _ in range(WISDOM_SETS):
+        if offset + 8 > len(data):
+            raise ValueError("Truncated FFTW wisdom file")
+        (size,) = struct.unpack_from('<Q', data, offset)
+        offset += 8
+        if offset + size > len(data):
+            raise ValueError("Truncated FFTW wisdom file")
+        wisdom.append(data[offset:offset + size])
+        offset += size
+    if offset != len(data):
+        raise ValueError("Unexpected data after FFTW wisdom")
+    return tuple(wisdom)
+
+def _import_pyfftw():
+    # Imported on first use: pyfftw is slow to import and not needed until a transform runs.
+    import pyfftw
+    import pyfftw.builders
+    return pyfftw
+
+class FFTBackend:
+    """
+    Shared FFT engine that reuses FFTW plans and aligned buffers across calls.
+
+    Plans are cached per (shape, dtype, direction) and evicted least-recently-used
+    once more than `max_plans` are held. Real-input transforms are used throughout.
+    """
+
+    name = 'pyfftw'
+
+    def __init__(self, threads=1, planner_effort='FFTW_MEASURE', max_plans=32, wisdom_path=None):
+        """
+        Create an FFT backend.
+
+        Parameters:
+        - threads: The number of threads FFTW may use for each transform.
+        - planner_effort: The FFTW planner flag (e.g. 'FFTW_ESTIMATE', 'FFTW_MEASURE', 'FFTW_PATIENT').
+        - max_plans: The maximum number of plans kept in the cache.
+        - wisdom_path: An optional file to load FFTW wisdom from on creation and to save it to.
+        """
+        if max_plans < 1:
+            raise ValueError("max_plans must be at least 1")
+        self._pyfftw = _import_pyfftw()
+        self.threads = threads
+        self.planner_effort = planner_effort
+        self.max_plans = max_plans
+        self.wisdom_path = wisdom_path
+        self._plans = OrderedDict()
+        self._lock = threading.RLock()
+        if wisdom_path is not None and os.path.exists(wisdom_path):
+            self.load_wisdom(wisdom_path)
+
+    def _get_plan(self, shape, dtype, direction):
+        key = (tuple(shape), np.dtype(dtype).str, direction)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+        pyfftw = self._pyfftw
+        if direction == 'rfft':
+            buffer = pyfftw.empty_aligned(shape, dtype=dtype)
+            plan = pyfftw.builders.rfft(buffer, threads=self.threads, planner_effort=self.planner_effort)
+        elif direction == 'irfft':
+            complex_dtype = np.result_type(dtype, np.complex64)
+            spectrum_shape = tuple(shape[:-1]) + (shape[-1] // 2 + 1,)
+            buffer = pyfftw.empty_aligned(spectrum_shape, dtype=complex_dtype)
+            plan = pyfftw.builders.irfft(buffer, n=shape[-1], threads=self.threads, planner_effort=self.planner_effort)
+        else:
+            raise ValueError(f"Unknown FFT direction: {direction}")
+        self._plans[key] = plan
+        if len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+        return plan
+
+    @instrumented()
+    def rfft(self, signal):
+        """
+        Compute the real-input FFT along the last axis.
+
+        Parameters:
+        - signal: A real numpy array (1-D, or 2-D with one signal per row).
+
+        Returns:
+        - A complex numpy array containing the non-negative frequency terms.
+        """
+        signal = np.asarray(signal)
+        dtype = np.float32 if signal.dtype == np.float32 else np.float64
+        with self._lock:
+            plan = self._get_plan(signal.shape, dtype, 'rfft')
+            plan.input_array[...] = signal
+            return plan().copy()
+
+    @instrumented()
+    def irfft(self, spectrum, n):
+        """
+        Compute the inverse of `rfft` along the last axis.
+
+        Parameters:
+        - spectrum: A complex numpy array containing the non-negative frequency terms.
+        - n: The length of the real output signal.
+
+        Returns:
+        - A real numpy array of length `n` along the last axis.
+        """
+        spectrum = np.asarray(spectrum)
+        dtype = np.float32 if spectrum.dtype == np.complex64 else np.float64
+        shape = tuple(spectrum.shape[:-1]) + (n,)
+        with self._lock:
+            plan = self._get_plan(shape, dtype, 'irfft')
+            plan.input_array[...] = spectrum
+            return plan().copy()
+
+    def rfftfreq(self, n, sample_rate=44100):
+        """
+        Return the frequencies (in Hz) of the bins produced by `rfft` for a signal of length `n`.
+        """
+        return np.fft.rfftfreq(n, 1 / sample_rate)
+
+    def clear(self):
+        """
+        Drop every cached plan.
+        """
+        with self._lock:
+            self._plans.clear()
+
+    def cache_info(self):
+        """
+        Return a dictionary describing the plan cache (current size, capacity and cached keys).
+        """
+        with self._lock:
+            return {'size': len(self._plans), 'max_plans': self.max_plans, 'keys': list(self._plans)}
+
+    def save_wisdom(self, path=None):
+        """
+        Save the accumulated FFTW wisdom to disk.
+
+        Parameters:
+        - path: The file to write to (defaults to `wisdom_path`).
+        """
+        path = path or self.wisdom_path
+        if path is None:
+            raise ValueError("No wisdom path given")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_encode_wisdom(self._pyfftw.export_wisdom()))
+        os.replace(tmp_path, path)
+
+    def load_wisdom(self, path=None):
+        """
+        Load FFTW wisdom from disk so that plans can be created without re-measuring.
+
+        The file is parsed as the raw wisdom strings written by `save_wisdom`; nothing in it is
+        executed, and a file of any other structure raises ValueError.
+
+        Parameters:
+        - path: The file to read from (defaults to `wisdom_path`).
+
+        Returns:
+        - A tuple of booleans reporting which wisdom sets (double, single, long double) were imported.
+        """
+        path = path or self.wisdom_path
+        if path is None:
+            raise ValueError("No wisdom path given")
+        with open(path, 'rb') as f:
+            wisdom = _decode_wisdom(f.read())
+        return self._pyfftw.import_wisdom(wisdom)
+
+class ScipyFFTBackend:
+    """
+    FFT backend built on scipy.fft, for machines without pyfftw.
+
+    It has the same transform interface as FFTBackend; scipy.fft keeps single precision and can
+    use several worker threads, but has no plan cache to manage.
+    """
+
+    name = 'scipy'
+
+    def __init__(self, threads=1, **options):
+        """
+        Parameters:
+        - threads: The number of workers scipy.fft may use for each transform.
+        """
+        import scipy.fft
+        self._fft = scipy.fft
+        self.threads = threads
+
+    @instrumented()
+    def rfft(self, signal):
+        """
+        Compute the real-input FFT along the last axis (see `FFTBackend.rfft`).
+        """
+        return self._fft.rfft(np.asarray(signal), workers=self.threads)
+
+    @instrumented()
+    def irfft(self, spectrum, n):
+        """
+        Compute the inverse of `rfft` along the last axis (see `FFTBackend.irfft`).
+        """
+        return self._fft.irfft(np.asarray(spectrum), n, workers=self.threads)
+
+    def rfftfreq(self, n, sample_rate=44100):
+        """
+        Return the frequencies (in Hz) of the bins produced by `rfft` for a signal of length `n`.
+        """
+        return np.fft.rfftfreq(n, 1 / sample_rate)
+
+    def clear(self):
+        """
+        Nothing is cached; present for interface compatibility.
+        """
+
+    def cache_info(self):
+        """
+        Return a dictionary describing the (empty) plan cache.
+        """
+        return {'size': 0, 'max_plans': 0, 'keys': []}
+
+class NumpyFFTBackend(ScipyFFTBackend):
+    """
+    FFT backend built on numpy.fft, which is always available.
+    """
+
+    name = 'numpy'
+
+    def __init__(self, threads=1, **options):
+        """
+        Parameters:
+        - threads: Ignored; numpy.fft is single-threaded.
+        """
+        self._fft = np.fft
+        self.threads = 1
+
+    @instrumented()
+    def rfft(self, signal):
+        """
+        Compute the real-input FFT along the last axis (see `FFTBackend.rfft`).
+        """
+        signal = np.asarray(signal)
+        spectrum = np.fft.rfft(signal)
+        return spectrum.astype(np.complex64, copy=False) if signal.dtype == np.float32 else spectrum
+
+    @instrumented()
+    def irfft(self, spectrum, n):
+        """
+        Compute the inverse of `rfft` along the last axis (see `FFTBackend.irfft`).
+        """
+        spectrum = np.asarray(spectrum)
+        signal = np.fft.irfft(spectrum, n)
+        return signal.astype(np.float32, copy=False) if spectrum.dtype == np.complex64 else signal
+
+_backend_factories = {
+    'pyfftw': FFTBackend,
+    'scipy': ScipyFFTBackend,
+    'numpy': NumpyFFTBackend,
+}
+
+def register_fft_backend(name, factory):
+    """
+    Register an FFT backend so that it can be selected by name.
+
+    Parameters:
+    - name: The backend name used by `create_fft_backend` and ACOUSYNTH_FFT_BACKEND.
+    - factory: A callable taking keyword options (threads, planner_effort, wisdom_path, ...) and
+      returning an object with rfft, irfft, rfftfreq, clear and cache_info methods. It should raise
+      ImportError when its library is missing, so that the next backend is tried.
+    """
+    _backend_factories[name] = factory
+
+def available_fft_backends():
+    """
+    Return the names of the registered backends whose libraries can be imported.
+    """
+    from importlib.util import find_spec
+    modules = {'pyfftw': 'pyfftw', 'scipy': 'scipy'}
+    return [name for name in _backend_factories if name not in modules or find_spec(modules[name]) is not None]
+
+def create_fft_backend(preference=None, **options):
+    """
+    Create the first backend in order of preference whose library is available.
+
+    Parameters:
+    - preference: A backend name, a comma-separated string or a list of names (defaults to the
+      ACOUSYNTH_FFT_BACKEND environment variable, then 'pyfftw,scipy,numpy').
+    - options: Keyword options passed to the backend factory (e.g. threads, planner_effort).
+
+    Returns:
+    - An FFT backend instance.
+    """
+    if preference is None:
+        preference = os.environ.get('ACOUSYNTH_FFT_BACKEND') or DEFAULT_BACKEND_ORDER
+    if isinstance(preference, str):
+        preference = [name.strip() for name in preference.split(',') if name.strip()]
+    errors = []
+    for name in preference:
+        factory = _backend_factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown FFT backend: {name}")
+        try:
+            return factory(**options)
+        except ImportError as error:
+            errors.append(f"{name}: {error}")
+    raise ImportError("No FFT backend could be loaded (" + "; ".join(errors) + ")")
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+def get_fft_backend():
+    """
+    Return the process-wide FFT backend, creating it on first use.
+
+    The backend is chosen with `create_fft_backend` (falling back from pyfftw to scipy.fft to
+    numpy.fft, or following ACOUSYNTH_FFT_BACKEND) and configured from the ACOUSYNTH_FFT_THREADS,
+    ACOUSYNTH_FFT_PLANNER and ACOUSYNTH_FFT_WISDOM environment variables when they are set.
+    """
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = create_fft_backend(
+                threads=int(os.environ.get('ACOUSYNTH_FFT_THREADS', 1)),
+                planner_effort=os.environ.get('ACOUSYNTH_FFT_PLANNER', 'FFTW_MEASURE'),
+                wisdom_path=os.environ.get('ACOUSYNTH_FFT_WISDOM'),
+            )
+        return _default_backend
+
+def set_fft_backend(backend):
+    """
+    Replace the process-wide FFT backend.
+
+    Parameters:
+    - backend: An FFT backend instance, or the name of a registered backend.
+    """
+    global _default_backend
+    if isinstance(backend, str):
+        backend = create_fft_backend([backend])
+    with _default_backend_lock:
+        _default_backend = backend
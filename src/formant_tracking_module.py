@@ -0,0 +1,189 @@
+from math import gcd
+
+import numpy as np
+from src.instrumentation_module import instrumented
+
+FORMANT_BATCH_FRAMES = 1024
+
+def frame_signal(sound, frame_length, hop_length):
+    """
+    Split a signal into overlapping frames without copying it.
+
+    Parameters:
+    - sound: A 1-D numpy array containing the sound data.
+    - frame_length: The number of samples per frame.
+    - hop_length: The number of samples between frame starts.
+
+    Returns:
+    - A read-only (num_frames, frame_length) view of the signal.
+    """
+    sound = np.asarray(sound)
+    if len(sound) < frame_length:
+        return np.zeros((0, frame_length), dtype=sound.dtype)
+    return np.lib.stride_tricks.sliding_window_view(sound, frame_length)[::hop_length]
+
+def autocorrelate_frames(frames, order):
+    """
+    Compute the autocorrelation of every frame at lags 0 to `order`.
+
+    Parameters:
+    - frames: A (num_frames, frame_length) numpy array.
+    - order: The highest lag.
+
+    Returns:
+    - A (num_frames, order + 1) numpy array.
+    """
+    length = frames.shape[1]
+    r = np.empty((len(frames), order + 1))
+    for lag in range(order + 1):
+        r[:, lag] = np.einsum('ij,ij->i', frames[:, :length - lag], frames[:, lag:])
+    return r
+
+def levinson_durbin(r, order):
+    """
+    Solve the LPC normal equations of many frames at once with the Levinson-Durbin recursion.
+
+    Parameters:
+    - r: A (num_frames, order + 1) numpy array of autocorrelations.
+    - order: The LPC order.
+
+    Returns:
+    - A tuple containing the (num_frames, order + 1) prediction polynomials (a[0] = 1) and the
+      prediction error power of each frame. Silent frames get the trivial polynomial.
+    """
+    a = np.zeros((len(r), order + 1))
+    a[:, 0] = 1
+    error = r[:, 0].copy()
+    for i in range(1, order + 1):
+        acc = r[:, i] + np.einsum('ij,ij->i', a[:, 1:i], r[:, i - 1:0:-1])
+        k = np.divide(-acc, error, out=np.zeros_like(acc), where=error > 0)
+        a[:, 1:i] += k[:, None] * a[:, i - 1:0:-1]
+        a[:, i] = k
+        error *= 1 - k * k
+    return a, error
+
+def lpc_roots(a):
+    """
+    Return the roots of many prediction polynomials, from the eigenvalues of their companion matrices.
+
+    Parameters:
+    - a: A (num_frames, order + 1) numpy array of prediction polynomials with a[:, 0] = 1.
+
+    Returns:
+    - A (num_frames, order) complex numpy array.
+    """
+    order = a.shape[1] - 1
+    companion = np.zeros((len(a), order, order))
+    companion[:, 0, :] = -a[:, 1:]
+    companion[:, np.arange(1, order), np.arange(order - 1)] = 1
+    return np.linalg.eigvals(companion)
+
+def _select_formants(roots, analysis_rate, num_formants, min_frequency, max_frequency, max_bandwidth, frequencies, bandwidths):
+    """
+    Write the lowest `num_formants` valid resonances of each frame's roots into `frequencies` and `bandwidths`.
+    """
+    with np.errstate(divide='ignore'):
+        candidates = np.angle(roots) * (analysis_rate / (2 * np.pi))
+        widths = -np.log(np.abs(roots)) * (analysis_rate / np.pi)
+    valid = (roots.imag > 0) & (candidates >= min_frequency) & (candidates <= max_frequency) & (widths <= max_bandwidth)
+    candidates = np.where(valid, candidates, np.inf)
+    ranking = np.argsort(candidates, axis=1)[:, :num_formants]
+    found = ranking.shape[1]
+    frequencies[:, :found] = np.take_along_axis(candidates, ranking, axis=1)
+    bandwidths[:, :found] = np.take_along_axis(widths, ranking, axis=1)
+    frequencies[:, found:] = np.nan
+    bandwidths[:, found:] = np.nan
+    missing = np.isinf(frequencies)
+    frequencies[missing] = np.nan
+    bandwidths[missing] = np.nan
+
+@instrumented()
+def track_formants(sound, sample_rate=44100, num_formants=5, frame_duration=0.025, hop_duration=0.01, order=None,
+                   max_frequency=5500, min_frequency=90, max_bandwidth=400, pre_emphasis=0.97):
+    """
+    Track formants frame by frame with linear prediction.
+
+    The signal is resampled to twice `max_frequency`, pre-emphasized and cut into Hamming-windowed
+    frames. Frames are analyzed FORMANT_BATCH_FRAMES at a time: one batched autocorrelation, one
+    vectorized Levinson-Durbin recursion and one batched eigenvalue solve for the polynomial roots
+    per batch, with only the batch's frames copied out of the signal and windowed. Each root
+    in the upper half plane is a resonance at angle * rate / (2 * pi) Hz with a bandwidth of
+    -ln|root| * rate / pi Hz.
+
+    Parameters:
+    - sound: A 1-D numpy array containing the sound data, or a 2-D array with one clip per row
+      (the frames of every clip are batched together).
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - num_formants: The number of formants to report per frame.
+    - frame_duration: The length of each analysis frame (in seconds).
+    - hop_duration: The time between frame starts (in seconds).
+    - order: The LPC order (defaults to the rule of thumb 2 + analysis rate in kHz, 13 for the default
+      max_frequency).
+    - max_frequency: The highest formant frequency searched for (in Hz).
+    - min_frequency: Resonances below this frequency are ignored (in Hz).
+    - max_bandwidth: Resonances wider than this are ignored (in Hz).
+    - pre_emphasis: The first-order pre-emphasis coefficient (0 to disable).
+
+    Returns:
+    - A tuple containing the frame center times (in seconds) and two (num_frames, num_formants)
+      arrays with the formant frequencies and bandwidths (in Hz), sorted by frequency and
+      NaN-padded where a frame has fewer formants. For 2-D input the arrays have shape
+      (clips, num_frames, num_formants).
+    """
+    from scipy.signal import get_window, resample_poly
+
+    sound = np.asarray(sound, dtype=np.float64)
+    clips = np.atleast_2d(sound)
+    analysis_rate = sample_rate
+    if sample_rate > 2 * max_frequency:
+        analysis_rate = int(2 * max_frequency)
+        divisor = gcd(analysis_rate, int(sample_rate))
+        clips = resample_poly(clips, analysis_rate // divisor, int(sample_rate) // divisor, axis=1)
+    order = order or int(2 + analysis_rate / 1000)
+    if pre_emphasis:
+        clips = np.concatenate((clips[:, :1], clips[:, 1:] - pre_emphasis * clips[:, :-1]), axis=1)
+
+    frame_length = max(int(round(frame_duration * analysis_rate)), order + 1)
+    hop_length = max(int(round(hop_duration * analysis_rate)), 1)
+    # One strided view of frames per clip; frames are numbered clip by clip across the batches.
+    frames = [frame_signal(clip, frame_length, hop_length) for clip in clips]
+    num_frames = len(frames[0])
+    total_frames = len(clips) * num_frames
+    times = (np.arange(num_frames) * hop_length + frame_length / 2) / analysis_rate
+    window = get_window('hamming', frame_length)
+
+    frequencies = np.empty((total_frames, num_formants))
+    bandwidths = np.empty((total_frames, num_formants))
+    batch = np.empty((min(FORMANT_BATCH_FRAMES, total_frames), frame_length))
+    for start in range(0, total_frames, FORMANT_BATCH_FRAMES):
+        stop = min(start + FORMANT_BATCH_FRAMES, total_frames)
+        position = start
+        while position < stop:
+            clip, frame = divmod(position, num_frames)
+            count = min(stop - position, num_frames - frame)
+            np.multiply(frames[clip][frame:frame + count], window, out=batch[position - start:position - start + count])
+            position += count
+        a, _ = levinson_durbin(autocorrelate_frames(batch[:stop - start], order), order)
+        _select_formants(lpc_roots(a), analysis_rate, num_formants, min_frequency, max_frequency, max_bandwidth,
+                         frequencies[start:stop], bandwidths[start:stop])
+    frequencies = frequencies.reshape(len(clips), num_frames, num_formants)
+    bandwidths = bandwidths.reshape(len(clips), num_frames, num_formants)
+    if sound.ndim == 1:
+        return times, frequencies[0], bandwidths[0]
+    return times, frequencies, bandwidths
+
+def summarize_formant_track(frequencies, bandwidths):
+    """
+    Reduce a formant track to one (frequency, bandwidth) pair per formant, the median over frames.
+
+    Parameters:
+    - frequencies: A (num_frames, num_formants) numpy array as returned by `track_formants`.
+    - bandwidths: The matching bandwidths.
+
+    Returns:
+    - A list of (frequency, bandwidth) tuples for the formant slots found in at least one frame.
+    """
+    found = ~np.all(np.isnan(frequencies), axis=0)
+    if not found.any():
+        return []
+    return list(zip(np.nanmedian(frequencies[:, found], axis=0), np.nanmedian(bandwidths[:, found], axis=0)))
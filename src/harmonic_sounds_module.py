@@ -1,6 +1,129 @@
 import numpy as np
+from src.automation_module import ADSR, Automation
+from src.instrumentation_module import instrumented, stage
+from src.noise_module import NoiseGenerator
+from src.precision_module import prepare_output, resolve_dtype
+from src.time_base_module import get_time_base
+from src.render_graph_module import Oscillator, Product, RenderGraph, Sum
+from src.resonator_module import filter_formants
+from src.wavetable_module import Wavetable, get_sawtooth_table, render_oscillator
+from src.sequence_module import SegmentSequence
 
-def generate_harmonic_sound(fundamental_freq, harmonics, duration, sample_rate=44100):
+ADDITIVE_BLOCK_SIZE = 2048
+ROTATION_MIN_PARTIALS = 2
+
+def _interpolate_envelopes(envelopes, start, stop, num_samples):
+    """
+    Linearly interpolate per-partial control envelopes (one row per partial, points spread evenly
+    over the whole render) at samples [start, stop).
+    """
+    num_points = envelopes.shape[1]
+    if num_points == 1:
+        return np.repeat(envelopes, stop - start, axis=1)
+    position = np.arange(start, stop) * ((num_points - 1) / max(num_samples - 1, 1))
+    index = np.minimum(position.astype(np.int64), num_points - 2)
+    frac = position - index
+    return envelopes[:, index] * (1 - frac) + envelopes[:, index + 1] * frac
+
+@instrumented()
+def render_additive(freqs, amplitudes, num_samples, sample_rate=44100, method='auto', amplitude_envelopes=None, frequency_envelopes=None, block_size=ADDITIVE_BLOCK_SIZE, dtype=None, out=None):
+    """
+    Render a sum of sinusoidal partials with an additive oscillator bank.
+
+    With constant frequencies, the 'rotation' method advances every partial by complex rotation:
+    each block is the sine/cosine table of its first samples rotated by the partial's phase at the
+    block start, so a block of all partials costs two matrix-vector products and no per-sample
+    transcendental calls. The 'direct' method evaluates one np.sin per partial and is cheaper for a
+    single partial or a render shorter than one block; 'auto' picks between the two from the
+    partial count and the render length.
+    Frequency envelopes require a running phase, so they are rendered with a per-block phase
+    accumulator regardless of `method`.
+
+    Parameters:
+    - freqs: A list of partial frequencies (in Hz).
+    - amplitudes: A list of amplitudes for each partial.
+    - num_samples: The number of samples to render.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - method: 'auto', 'rotation' or 'direct'.
+    - amplitude_envelopes: An optional array with one row of amplitude multipliers per partial; the
+      points are spread evenly over the render and linearly interpolated.
+    - frequency_envelopes: An optional array with one row of frequency multipliers per partial,
+      interpolated in the same way.
+    - block_size: The number of samples rendered per block.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
+
+    Returns:
+    - A numpy array containing the rendered sound.
+    """
+    freqs = np.asarray(freqs, dtype=np.float64)
+    amplitudes = np.asarray(amplitudes, dtype=np.float64)
+    if method not in ('auto', 'rotation', 'direct'):
+        raise ValueError(f"Unknown additive synthesis method: {method}")
+    if amplitude_envelopes is not None:
+        amplitude_envelopes = np.atleast_2d(np.asarray(amplitude_envelopes, dtype=np.float64))
+    if frequency_envelopes is not None:
+        frequency_envelopes = np.atleast_2d(np.asarray(frequency_envelopes, dtype=np.float64))
+    sound = prepare_output(out, num_samples, dtype)
+    sound.fill(0)
+    if len(freqs) == 0 or num_samples == 0:
+        return sound
+    omegas = 2 * np.pi * freqs / sample_rate
+
+    if frequency_envelopes is not None:
+        phases = np.zeros(len(freqs))
+        for start in range(0, num_samples, block_size):
+            stop = min(start + block_size, num_samples)
+            increments = omegas[:, None] * _interpolate_envelopes(frequency_envelopes, start, stop, num_samples)
+            block_phases = np.cumsum(increments, axis=1)
+            block_phases -= increments
+            block_phases += phases[:, None]
+            partials = np.sin(block_phases)
+            partials *= amplitudes[:, None]
+            if amplitude_envelopes is not None:
+                partials *= _interpolate_envelopes(amplitude_envelopes, start, stop, num_samples)
+            sound[start:stop] = partials.sum(axis=0)
+            phases = np.mod(block_phases[:, -1] + increments[:, -1], 2 * np.pi)
+        return sound
+
+    if method == 'auto':
+        use_rotation = len(freqs) >= ROTATION_MIN_PARTIALS and num_samples > block_size
+        method = 'rotation' if use_rotation else 'direct'
+
+    if method == 'direct':
+        partial = np.empty_like(sound)
+        for index, (freq, amplitude) in enumerate(zip(freqs, amplitudes)):
+            render_oscillator(freq, num_samples, sample_rate, out=partial)
+            partial *= amplitude
+            if amplitude_envelopes is not None:
+                partial *= _interpolate_envelopes(amplitude_envelopes[index:index + 1], 0, num_samples, num_samples)[0]
+            sound += partial
+        return sound
+
+    block_size = min(block_size, num_samples)
+    block_angles = np.outer(omegas, np.arange(block_size))
+    block_sin = np.sin(block_angles)
+    block_cos = np.cos(block_angles)
+    cycles_per_sample = freqs / sample_rate
+    for start in range(0, num_samples, block_size):
+        stop = min(start + block_size, num_samples)
+        length = stop - start
+        start_phases = 2 * np.pi * np.mod(cycles_per_sample * start, 1.0)
+        # sin(a + b) = cos(a) sin(b) + sin(a) cos(b), with a the phase at the block start.
+        cos_weights = amplitudes * np.cos(start_phases)
+        sin_weights = amplitudes * np.sin(start_phases)
+        if amplitude_envelopes is None:
+            sound[start:stop] = cos_weights @ block_sin[:, :length] + sin_weights @ block_cos[:, :length]
+        else:
+            envelope = _interpolate_envelopes(amplitude_envelopes, start, stop, num_samples)
+            partials = cos_weights[:, None] * block_sin[:, :length]
+            partials += sin_weights[:, None] * block_cos[:, :length]
+            partials *= envelope
+            sound[start:stop] = partials.sum(axis=0)
+    return sound
+
+@instrumented()
+def generate_harmonic_sound(fundamental_freq, harmonics, duration, sample_rate=44100, method='auto', oscillator='sine', interpolation='linear', dtype=None, out=None):
     """
     Generate a harmonic sound with given fundamental frequency and harmonics.
 
@@ -9,17 +132,34 @@ def generate_harmonic_sound(fundamental_freq, harmonics, duration, sample_rate=4
     - harmonics: A list of tuples, where each tuple contains the harmonic number and its amplitude.
     - duration: The duration of the sound (in seconds).
     - sample_rate: The sample rate of the sound (in samples per second).
+    - method: The additive synthesis method passed to `render_additive` when oscillator is 'sine'.
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated sine-table lookup, or a Wavetable instance.
+    - interpolation: 'linear' or 'cubic' table lookup for the wavetable oscillators.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
 
     Returns:
     - A numpy array containing the generated harmonic sound.
     """
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    sound = np.zeros_like(t)
-    for harmonic, amplitude in harmonics:
-        sound += amplitude * np.sin(2 * np.pi * harmonic * fundamental_freq * t)
+    num_samples = int(sample_rate * duration)
+    harmonic_numbers = [harmonic for harmonic, _ in harmonics]
+    amplitudes = [amplitude for _, amplitude in harmonics]
+    freqs = np.multiply(harmonic_numbers, fundamental_freq, dtype=np.float64)
+    if isinstance(oscillator, str) and oscillator == 'sine':
+        return render_additive(freqs, amplitudes, num_samples, sample_rate, method=method, dtype=dtype, out=out)
+    sound = prepare_output(out, num_samples, dtype)
+    sound.fill(0)
+    partial = np.empty_like(sound)
+    for freq, amplitude in zip(freqs, amplitudes):
+        render_oscillator(freq, num_samples, sample_rate, oscillator, interpolation, out=partial)
+        partial *= amplitude
+        sound += partial
     return sound
 
-def generate_formant_sound(fundamental_freq, formants, duration, sample_rate=44100):
+generate_harmonic_sound.output_length = lambda duration, sample_rate, **params: int(sample_rate * duration)
+
+@instrumented()
+def generate_formant_sound(fundamental_freq, formants, duration, sample_rate=44100, oscillator='sine', method='resonator', interpolation='linear', dtype=None, out=None):
     """
     Generate a sound with given fundamental frequency and formants.
 
@@ -28,30 +168,65 @@ def generate_formant_sound(fundamental_freq, formants, duration, sample_rate=441
     - formants: A list of tuples, where each tuple contains the formant frequency and its bandwidth.
     - duration: The duration of the sound (in seconds).
     - sample_rate: The sample rate of the sound (in samples per second).
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated sine-table lookup, or a Wavetable instance.
+    - method: 'resonator' to pass a band-limited sawtooth (or the given Wavetable) through a cascade
+      of formant resonators, normalized to a peak of 1, or 'envelope' to multiply the oscillator by
+      a decaying sinusoid per formant.
+    - interpolation: 'linear' or 'cubic' table lookup for the wavetable oscillators and the sawtooth source.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
 
     Returns:
     - A numpy array containing the generated formant sound.
     """
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    sound = np.sin(2 * np.pi * fundamental_freq * t)
+    num_samples = int(sample_rate * duration)
+    if method == 'resonator':
+        source = oscillator if isinstance(oscillator, Wavetable) else get_sawtooth_table()
+        sound = render_oscillator(fundamental_freq, num_samples, sample_rate, source, interpolation, dtype=dtype, out=out)
+        sound[...] = filter_formants(sound, [freq for freq, _ in formants], [bandwidth for _, bandwidth in formants], sample_rate, 'cascade')
+        peak = np.max(np.abs(sound)) if num_samples else 0
+        if peak > 0:
+            sound /= peak
+        return sound
+    if method != 'envelope':
+        raise ValueError(f"Unknown formant method: {method}")
+    t = get_time_base(num_samples, sample_rate)
+    sound = render_oscillator(fundamental_freq, num_samples, sample_rate, oscillator, interpolation, dtype=dtype, out=out)
+    scratch = np.empty_like(sound)
     for formant_freq, bandwidth in formants:
-        sound *= np.exp(-bandwidth * t) * np.sin(2 * np.pi * formant_freq * t)
+        np.multiply(t, -bandwidth, out=scratch)
+        np.exp(scratch, out=scratch)
+        sound *= scratch
+        render_oscillator(formant_freq, num_samples, sample_rate, oscillator, interpolation, out=scratch)
+        sound *= scratch
     return sound
 
-def generate_noise(duration, sample_rate=44100):
+generate_formant_sound.output_length = lambda duration, sample_rate, **params: int(sample_rate * duration)
+
+@instrumented()
+def generate_noise(duration, sample_rate=44100, color='white', rng=None, dtype=None, out=None):
     """
     Generate a noise component.
 
     Parameters:
     - duration: The duration of the noise (in seconds).
     - sample_rate: The sample rate of the noise (in samples per second).
+    - color: 'white', 'pink' or 'brown' (see `NoiseGenerator`).
+    - rng: A numpy Generator, SeedSequence or int seed; None draws from the current random stream
+      (see `make_rng`).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
 
     Returns:
     - A numpy array containing the generated noise.
     """
-    return np.random.normal(0, 1, int(sample_rate * duration))
+    noise = prepare_output(out, int(sample_rate * duration), dtype)
+    return NoiseGenerator(color, rng, sample_rate=sample_rate).render(len(noise), out=noise)
+
+generate_noise.output_length = lambda duration, sample_rate, **params: int(sample_rate * duration)
 
-def combine_sine_and_noise(sine_wave, noise_component, noise_level=0.5):
+@instrumented()
+def combine_sine_and_noise(sine_wave, noise_component, noise_level=0.5, dtype=None, out=None):
     """
     Combine a sine wave and a noise component.
 
@@ -59,13 +234,31 @@ def combine_sine_and_noise(sine_wave, noise_component, noise_level=0.5):
     - sine_wave: A numpy array containing the sine wave data.
     - noise_component: A numpy array containing the noise component data.
     - noise_level: The level of the noise component to be combined with the sine wave (default is 0.5).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be either input.
 
     Returns:
     - A numpy array containing the combined sound.
     """
-    return sine_wave + noise_level * noise_component
+    combined_sound = prepare_output(out, np.shape(sine_wave), dtype)
+    if np.shares_memory(combined_sound, sine_wave):
+        combined_sound += noise_level * noise_component
+    else:
+        np.multiply(noise_component, noise_level, out=combined_sound)
+        combined_sound += sine_wave
+    return combined_sound
+
+def _syllable_segments(vowels, consonants, structure):
+    segments = []
+    for element, index in structure:
+        if element == 'vowel':
+            segments.append(vowels[index])
+        elif element == 'consonant':
+            segments.append(consonants[index])
+    return segments
 
-def generate_syllabic_sound(vowels, consonants, structure, duration, sample_rate=44100):
+@instrumented()
+def generate_syllabic_sound(vowels, consonants, structure, duration, sample_rate=44100, crossfade=0.0, lazy=False, dtype=None, out=None):
     """
     Create sound sequences representing human vocalizations by combining basic sounds (such as vowels or consonants) into syllabic structures.
 
@@ -75,18 +268,30 @@ def generate_syllabic_sound(vowels, consonants, structure, duration, sample_rate
     - structure: A list of tuples representing the syllabic structure (e.g., [('vowel', 0), ('consonant', 1), ('vowel', 2)]).
     - duration: The duration of each sound component (in seconds).
     - sample_rate: The sample rate of the sound (in samples per second).
+    - crossfade: The overlap between consecutive sounds (in seconds); 0 joins them back to back.
+    - lazy: If True, return a SegmentSequence that references the sounds instead of copying them.
+    - dtype: The sample dtype of the result (defaults to the common dtype of the sounds).
+    - out: An optional array to write the result into.
 
     Returns:
-    - A numpy array containing the generated syllabic sound.
+    - A numpy array containing the generated syllabic sound, or a SegmentSequence if lazy is True.
     """
-    syllabic_sound = np.array([])
-    for element, index in structure:
-        if element == 'vowel':
-            syllabic_sound = np.concatenate((syllabic_sound, vowels[index]))
-        elif element == 'consonant':
-            syllabic_sound = np.concatenate((syllabic_sound, consonants[index]))
-    return syllabic_sound
+    sequence = SegmentSequence(_syllable_segments(vowels, consonants, structure), int(round(crossfade * sample_rate)))
+    if lazy:
+        return sequence
+    if out is None and dtype is not None:
+        out = np.empty(len(sequence), dtype=resolve_dtype(dtype))
+    return sequence.to_array(out)
+
+def _syllabic_sound_length(vowels, consonants, structure, sample_rate, crossfade, lazy, **params):
+    # A lazy render returns a SegmentSequence, which cannot be written into a buffer.
+    if lazy:
+        return None
+    return len(SegmentSequence(_syllable_segments(vowels, consonants, structure), int(round(crossfade * sample_rate))))
+
+generate_syllabic_sound.output_length = _syllabic_sound_length
 
+@instrumented()
 def real_time_spectral_analysis(sound, sample_rate=44100):
     """
     Implement real-time tools for spectral analysis (Fourier Transforms, spectrograms).
@@ -102,46 +307,81 @@ def real_time_spectral_analysis(sound, sample_rate=44100):
     frequencies, times, spectrogram_data = spectrogram(sound, sample_rate)
     return frequencies, times, spectrogram_data
 
-def control_parameters(sound, amplitude_envelope, harmonic_content, noise_component, formant_frequencies, temporal_evolution, sample_rate=44100):
+def stream_spectral_analysis(chunks, sample_rate=44100, nperseg=256, noverlap=None, callback=None):
+    """
+    Incrementally compute a spectrogram from audio that arrives in chunks, using constant memory.
+
+    Parameters:
+    - chunks: An iterable of numpy arrays containing consecutive parts of the sound (any sizes).
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - nperseg: The length of each spectrogram frame (in samples).
+    - noverlap: The number of samples shared by consecutive frames (defaults to nperseg // 8).
+    - callback: An optional function called as callback(time, frame) for every frame.
+
+    Returns:
+    - A generator of (time, frame) tuples; frames match the columns of `real_time_spectral_analysis`.
+    """
+    from src.streaming_analysis_module import StreamingSTFT
+    stft = StreamingSTFT(sample_rate, nperseg=nperseg, noverlap=noverlap, callback=callback)
+    for chunk in chunks:
+        # The work happens as the generator is consumed, so each step is timed as a stage of its
+        # own: one per frame, and one per chunk buffering the samples after its last frame. The
+        # consumer's time between frames is left out, and only one frame is held at a time.
+        frames = stft.process(chunk)
+        while True:
+            with stage('harmonic_sounds.stream_spectral_analysis'):
+                item = next(frames, None)
+            if item is None:
+                break
+            yield item
+
+@instrumented()
+def control_parameters(sound, amplitude_envelope, harmonic_content, noise_component, formant_frequencies, temporal_evolution, sample_rate=44100, dtype=None, out=None):
     """
     Manipulate parameters such as amplitude envelopes, harmonic content, noise components, formant frequencies, and temporal evolution.
 
     Parameters:
     - sound: A numpy array containing the sound data.
-    - amplitude_envelope: A numpy array containing the amplitude envelope data.
+    - amplitude_envelope: A numpy array or an Automation containing the amplitude envelope.
     - harmonic_content: A list of tuples representing the harmonic content (e.g., [(harmonic_number, amplitude)]).
     - noise_component: A numpy array containing the noise component data.
     - formant_frequencies: A list of formant frequencies to be emphasized.
-    - temporal_evolution: A dictionary containing the temporal evolution parameters (e.g., {'attack': 0.1, 'sustain': 0.7, 'decay': 0.1, 'release': 0.1}).
+    - temporal_evolution: A dictionary of ADSR parameters applied over the length of the sound
+      (e.g., {'attack': 0.1, 'sustain': 0.7, 'decay': 0.1, 'release': 0.1}, see `ADSR`), or an Automation.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into; it may be the input sound itself.
 
     Returns:
     - A numpy array containing the sound with manipulated parameters.
     """
-    t = np.linspace(0, len(sound) / sample_rate, len(sound), endpoint=False)
-    manipulated_sound = sound * amplitude_envelope
-    for harmonic, amplitude in harmonic_content:
-        manipulated_sound += amplitude * np.sin(2 * np.pi * harmonic * t)
-    manipulated_sound += noise_component
-    for formant_freq in formant_frequencies:
-        manipulated_sound *= np.sin(2 * np.pi * formant_freq * t)
-    manipulated_sound *= np.exp(-temporal_evolution['decay'] * t) * np.sin(2 * np.pi * temporal_evolution['attack'] * t)
-    return manipulated_sound
+    harmonics = [Oscillator(harmonic, amplitude) for harmonic, amplitude in harmonic_content]
+    mixed = Sum(Product(sound, amplitude_envelope), *harmonics, noise_component)
+    formants = [Oscillator(formant_freq) for formant_freq in formant_frequencies]
+    if not isinstance(temporal_evolution, Automation):
+        temporal_evolution = ADSR.from_dict(temporal_evolution, len(sound) / sample_rate)
+    graph = Product(mixed, *formants, temporal_evolution)
+    return RenderGraph(graph, sample_rate).render(len(sound), dtype, out)
 
-def generate_complex_acoustic_phenomena(sine_waves, noise_components, spectral_envelopes, sample_rate=44100):
+@instrumented()
+def generate_complex_acoustic_phenomena(sine_waves, noise_components, spectral_envelopes, sample_rate=44100, dtype=None, out=None):
     """
     Generate complex acoustic phenomena by combining sine waves, noise components, and parametric spectral envelopes.
 
     Parameters:
     - sine_waves: A list of numpy arrays containing the sine wave data.
     - noise_components: A list of numpy arrays containing the noise component data.
-    - spectral_envelopes: A list of numpy arrays containing the spectral envelope data.
+    - spectral_envelopes: A list of numpy arrays or Automations containing the spectral envelopes.
     - sample_rate: The sample rate of the sound (in samples per second).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
 
     Returns:
     - A numpy array containing the generated complex acoustic phenomena.
     """
-    combined_sound = np.zeros_like(sine_waves[0])
-    for sine_wave, noise_component, spectral_envelope in zip(sine_waves, noise_components, spectral_envelopes):
-        combined_sound += combine_sine_and_noise(sine_wave, noise_component) * spectral_envelope
-    return combined_sound
+    # Each layer is combine_sine_and_noise(sine_wave, noise_component) times its envelope.
+    layers = [Sum(sine_wave, Product(noise_component, 0.5)) * spectral_envelope
+              for sine_wave, noise_component, spectral_envelope in zip(sine_waves, noise_components, spectral_envelopes)]
+    return RenderGraph(Sum(*layers), sample_rate).render(len(sine_waves[0]), dtype, out)
+
+generate_complex_acoustic_phenomena.output_length = lambda sine_waves, **params: len(sine_waves[0])
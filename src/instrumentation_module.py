@@ -0,0 +1,258 @@
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+# The profiles currently recording. Instrumented functions test this list first, so they cost one
+# global lookup and a truth test when nothing is being profiled.
+_active_profiles = []
+_lock = threading.Lock()
+_local = threading.local()
+
+STAT_FIELDS = ('calls', 'wall_seconds', 'cpu_seconds', 'allocated_bytes', 'input_elements', 'output_elements', 'max_array_bytes')
+
+class Profile:
+    """
+    Per-stage cost statistics recorded while the profile is active.
+
+    Every instrumented function and `stage` block adds to a record keyed by its name: the call
+    count, wall and CPU time (inclusive of nested stages), the peak bytes allocated during the
+    call (only when memory tracking is on), the number of array elements passed in and returned,
+    and the largest array seen.
+    """
+
+    def __init__(self, memory=False):
+        """
+        Parameters:
+        - memory: If True, trace allocations with tracemalloc while active (which slows allocation
+          down noticeably); otherwise 'allocated_bytes' stays 0.
+        """
+        self.memory = memory
+        self.stats = {}
+        self._started_tracing = False
+
+    def start(self):
+        """
+        Start recording.
+        """
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        with _lock:
+            _active_profiles.append(self)
+        return self
+
+    def stop(self):
+        """
+        Stop recording.
+        """
+        with _lock:
+            if self in _active_profiles:
+                _active_profiles.remove(self)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self):
+        """
+        Discard the recorded statistics.
+        """
+        with _lock:
+            self.stats = {}
+
+    def _record(self, name, wall, cpu, allocated, input_elements, output_elements, max_array_bytes):
+        entry = self.stats.get(name)
+        if entry is None:
+            entry = self.stats[name] = dict.fromkeys(STAT_FIELDS, 0)
+        entry['calls'] += 1
+        entry['wall_seconds'] += wall
+        entry['cpu_seconds'] += cpu
+        entry['allocated_bytes'] += allocated
+        entry['input_elements'] += input_elements
+        entry['output_elements'] += output_elements
+        entry['max_array_bytes'] = max(entry['max_array_bytes'], max_array_bytes)
+
+    def to_dict(self):
+        """
+        Return a copy of the statistics, keyed by stage name.
+        """
+        with _lock:
+            return {name: dict(entry) for name, entry in self.stats.items()}
+
+    def to_json(self, indent=2):
+        """
+        Return the statistics as a JSON document.
+        """
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    def to_prometheus(self, prefix='acousynth', labels=None):
+        """
+        Return the statistics in the Prometheus text exposition format.
+
+        Parameters:
+        - prefix: The metric name prefix.
+        - labels: An optional dictionary of extra labels added to every sample (e.g. a job name).
+
+        Returns:
+        - A string with one counter family per statistic and one sample per stage.
+        """
+        stats = self.to_dict()
+        extra = ''.join(f',{key}="{_escape_label(value)}"' for key, value in sorted((labels or {}).items()))
+        descriptions = {
+            'calls': ('calls_total', 'counter', 'Number of calls.'),
+            'wall_seconds': ('wall_seconds_total', 'counter', 'Wall-clock time spent, including nested stages.'),
+            'cpu_seconds': ('cpu_seconds_total', 'counter', 'CPU time of the calling thread, including nested stages.'),
+            'allocated_bytes': ('allocated_bytes_total', 'counter', 'Peak bytes allocated during each call, summed.'),
+            'input_elements': ('input_elements_total', 'counter', 'Array elements passed in.'),
+            'output_elements': ('output_elements_total', 'counter', 'Array elements returned.'),
+            'max_array_bytes': ('max_array_bytes', 'gauge', 'Largest array passed in or returned.'),
+        }
+        lines = []
+        for field in STAT_FIELDS:
+            suffix, kind, description = descriptions[field]
+            metric = f'{prefix}_{suffix}'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {kind}')
+            for name in sorted(stats):
+                lines.append(f'{metric}{{stage="{_escape_label(name)}"{extra}}} {stats[name][field]:.17g}')
+        return '\n'.join(lines) + '\n'
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+@contextmanager
+def profile(memory=False):
+    """
+    Record the cost of every instrumented function and stage run inside the block.
+
+    Parameters:
+    - memory: If True, also record the bytes allocated per stage (see `Profile`).
+
+    Returns:
+    - A context manager yielding the Profile.
+    """
+    recorder = Profile(memory)
+    with recorder:
+        yield recorder
+
+def is_profiling():
+    """
+    Return True if any profile is recording.
+    """
+    return bool(_active_profiles)
+
+def _array_elements(value):
+    if isinstance(value, np.ndarray):
+        return value.size, value.nbytes
+    if isinstance(value, (tuple, list)):
+        elements = 0
+        largest = 0
+        for item in value:
+            if isinstance(item, np.ndarray):
+                elements += item.size
+                largest = max(largest, item.nbytes)
+        return elements, largest
+    return 0, 0
+
+class _Timer:
+    """
+    Measures one stage; nested timers keep the enclosing stage's allocation peak intact.
+    """
+
+    def __init__(self, name, memory):
+        self.name = name
+        self.memory = memory
+
+    def start(self):
+        if self.memory:
+            stack = getattr(_local, 'peaks', None)
+            if stack is None:
+                stack = _local.peaks = []
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+            self.base = current
+            stack.append(current)
+            tracemalloc.reset_peak()
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+
+    def stop(self, inputs, output):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        allocated = 0
+        if self.memory:
+            stack = _local.peaks
+            peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+            allocated = max(peak - self.base, 0)
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+        input_elements = 0
+        largest = 0
+        for value in inputs:
+            elements, nbytes = _array_elements(value)
+            input_elements += elements
+            largest = max(largest, nbytes)
+        output_elements, nbytes = _array_elements(output)
+        largest = max(largest, nbytes)
+        with _lock:
+            for recorder in _active_profiles:
+                recorder._record(self.name, wall, cpu, allocated, input_elements, output_elements, largest)
+
+def _memory_enabled():
+    return any(recorder.memory for recorder in _active_profiles) and tracemalloc.is_tracing()
+
+def instrumented(name=None):
+    """
+    Decorator that reports a function's cost to the active profiles.
+
+    When no profile is active the wrapper only checks an empty list before calling the function.
+
+    Parameters:
+    - name: The stage name (defaults to 'module.function', without the '_module' suffix).
+    """
+    def decorate(func):
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1].removesuffix('_module')}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active_profiles:
+                return func(*args, **kwargs)
+            timer = _Timer(stage_name, _memory_enabled())
+            timer.start()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                timer.stop(args + tuple(kwargs.values()), result)
+        return wrapper
+    return decorate
+
+@contextmanager
+def stage(name):
+    """
+    Context manager that reports the cost of the enclosed block as a stage of its own.
+
+    Parameters:
+    - name: The stage name.
+    """
+    if not _active_profiles:
+        yield
+        return
+    timer = _Timer(name, _memory_enabled())
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.stop((), None)
@@ -0,0 +1,214 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+import numpy as np
+from src.instrumentation_module import instrumented
+from src.precision_module import prepare_output
+
+NOISE_BLOCK_SIZE = 65536
+NOISE_COLORS = ('white', 'pink', 'brown')
+# Brown noise is integrated white noise with a slight leak below this frequency, so it cannot drift.
+BROWN_NOISE_CORNER = 5.0
+
+# Paul Kellet's three-pole, three-zero approximation of a -3 dB/octave slope.
+_PINK_B = np.array([0.049922035, -0.095993537, 0.050612699, -0.004408786])
+_PINK_A = np.array([1.0, -2.494956002, 2.017265875, -0.522189400])
+
+_random_stream = ContextVar('acousynth_random_stream', default=None)
+
+def _seed_sequence(seed=None):
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if seed is not None:
+        return np.random.SeedSequence(seed)
+    stream = _random_stream.get()
+    if stream is not None:
+        return stream.spawn(1)[0]
+    # Without a stream, seed from the legacy global state, so np.random.seed still makes renders reproducible.
+    return np.random.SeedSequence(np.random.randint(0, 2 ** 32, size=4, dtype=np.uint64))
+
+def make_rng(seed=None):
+    """
+    Return a numpy random Generator.
+
+    Parameters:
+    - seed: A Generator (returned as is), a SeedSequence, an int, or None to take the next child
+      of the current `random_stream` (or, outside one, a stream seeded from np.random's global state).
+
+    Returns:
+    - A numpy.random.Generator.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(_seed_sequence(seed))
+
+def spawn_rngs(seed, count):
+    """
+    Return independent Generators for parallel work, one per worker.
+
+    Parameters:
+    - seed: An int, a SeedSequence, or None (see `make_rng`).
+    - count: The number of Generators.
+
+    Returns:
+    - A list of numpy.random.Generator, each on its own child of the seed's SeedSequence.
+    """
+    return [np.random.default_rng(child) for child in _seed_sequence(seed).spawn(count)]
+
+def block_seed(seed_sequence, index):
+    """
+    Return the SeedSequence of block `index` of a stream, without spawning the blocks before it.
+    """
+    return np.random.SeedSequence(seed_sequence.entropy, spawn_key=tuple(seed_sequence.spawn_key) + (index,),
+                                  pool_size=seed_sequence.pool_size)
+
+@contextmanager
+def random_stream(seed):
+    """
+    Context manager that makes every unseeded random draw in the code it wraps reproducible.
+
+    Functions given rng=None take successive children of SeedSequence(seed), so the same seed gives
+    the same render in any thread or process, without touching np.random's global state.
+
+    Parameters:
+    - seed: An int or a SeedSequence.
+    """
+    token = _random_stream.set(seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed))
+    try:
+        yield
+    finally:
+        _random_stream.reset(token)
+
+@lru_cache(maxsize=None)
+def _pink_gain():
+    from scipy.signal import lfilter
+    impulse = np.zeros(1 << 18)
+    impulse[0] = 1
+    return 1 / np.sqrt(np.sum(lfilter(_PINK_B, _PINK_A, impulse) ** 2))
+
+class NoiseGenerator:
+    """
+    Streaming white, pink or brown Gaussian noise, rendered block by block.
+
+    White noise is drawn straight into the output buffer in its own dtype. Pink noise is white
+    noise through a fixed three-pole pinking filter and brown noise through a leaky integrator,
+    both with their filter state carried from one call to the next, so there is no full-length
+    FFT shaping. Every colour has a standard deviation of about `level`.
+
+    When seeded (rather than given a Generator), each block of NOISE_BLOCK_SIZE samples draws from
+    its own child SeedSequence, so the noise does not depend on how the render is split into calls.
+    """
+
+    def __init__(self, color='white', seed=None, level=1.0, sample_rate=44100):
+        """
+        Parameters:
+        - color: 'white', 'pink' or 'brown'.
+        - seed: A Generator, a SeedSequence, an int, or None (see `make_rng`).
+        - level: The standard deviation of the noise.
+        - sample_rate: The sample rate (in samples per second), which sets the brown noise leak.
+        """
+        if color not in NOISE_COLORS:
+            raise ValueError(f"Unknown noise color: {color}")
+        self.color = color
+        self.level = float(level)
+        self.sample_rate = sample_rate
+        if isinstance(seed, np.random.Generator):
+            self._rng = seed
+            self._seed_sequence = None
+        else:
+            self._rng = None
+            self._seed_sequence = _seed_sequence(seed)
+        if color == 'pink':
+            self._b = _PINK_B * (_pink_gain() * self.level)
+            self._a = _PINK_A
+        elif color == 'brown':
+            # A one-pole integrator y[n] = r y[n-1] + g x[n] with unit output variance.
+            radius = np.exp(-2 * np.pi * BROWN_NOISE_CORNER / sample_rate)
+            self._b = np.array([np.sqrt(1 - radius * radius) * self.level])
+            self._a = np.array([1.0, -radius])
+        self.reset()
+
+    def reset(self):
+        """
+        Return to the start of the noise (a Generator passed as the seed is not rewound).
+        """
+        self.position = 0
+        self._block_rng = None
+        if self.color != 'white':
+            self._zi = np.zeros(len(self._a) - 1)
+
+    def _draw(self, out):
+        """
+        Fill `out` with standard normal samples from the block streams.
+        """
+        if self._rng is not None:
+            self._rng.standard_normal(len(out), dtype=out.dtype, out=out)
+            self.position += len(out)
+            return
+        offset = 0
+        while offset < len(out):
+            block, within = divmod(self.position, NOISE_BLOCK_SIZE)
+            if self._block_rng is None or within == 0:
+                self._block_rng = np.random.default_rng(block_seed(self._seed_sequence, block))
+            length = min(NOISE_BLOCK_SIZE - within, len(out) - offset)
+            self._block_rng.standard_normal(length, dtype=out.dtype, out=out[offset:offset + length])
+            offset += length
+            self.position += length
+
+    def _draw_block(self, num_samples, dtype):
+        block = np.empty(num_samples, dtype=dtype)
+        self._draw(block)
+        return block
+
+    def render(self, num_samples, dtype=None, out=None):
+        """
+        Render the next `num_samples` samples.
+
+        Parameters:
+        - num_samples: The number of samples to render.
+        - dtype: The sample dtype of the result (defaults to the precision policy).
+        - out: An optional array to write into.
+
+        Returns:
+        - A numpy array containing the noise.
+        """
+        noise = prepare_output(out, num_samples, dtype)
+        if self.color == 'white':
+            if noise.flags.c_contiguous:
+                self._draw(noise)
+            else:
+                noise[...] = self._draw_block(num_samples, noise.dtype)
+            if self.level != 1.0:
+                noise *= self.level
+            return noise
+        from scipy.signal import lfilter
+        # The filters run in double precision, one bounded scratch block at a time.
+        scratch = np.empty(max(min(num_samples, NOISE_BLOCK_SIZE), 1))
+        for start in range(0, num_samples, len(scratch)):
+            stop = min(start + len(scratch), num_samples)
+            white = scratch[:stop - start]
+            self._draw(white)
+            noise[start:stop], self._zi = lfilter(self._b, self._a, white, zi=self._zi)
+        return noise
+
+@instrumented()
+def render_noise(num_samples, color='white', seed=None, level=1.0, sample_rate=44100, dtype=None, out=None):
+    """
+    Render Gaussian noise of the given colour.
+
+    Parameters:
+    - num_samples: The number of samples to render.
+    - color: 'white', 'pink' or 'brown'.
+    - seed: A Generator, a SeedSequence, an int, or None (see `make_rng`).
+    - level: The standard deviation of the noise.
+    - sample_rate: The sample rate (in samples per second).
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
+
+    Returns:
+    - A numpy array containing the noise.
+    """
+    return NoiseGenerator(color, seed, level, sample_rate).render(num_samples, dtype, out)
+
+render_noise.output_length = lambda num_samples, **params: int(num_samples)
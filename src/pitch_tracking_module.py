@@ -0,0 +1,131 @@
+import numpy as np
+from src.fft_backend_module import get_fft_backend
+from src.instrumentation_module import instrumented
+
+PITCH_BATCH_FRAMES = 1024
+
+def _difference_function(frames, window_length, max_lag):
+    """
+    YIN difference function d(tau) = sum_j (x[j] - x[j + tau])^2 for every frame, from one batched FFT.
+    """
+    from scipy.fft import next_fast_len
+    backend = get_fft_backend()
+    n = next_fast_len(frames.shape[1])
+    head = np.zeros((len(frames), n))
+    head[:, :window_length] = frames[:, :window_length]
+    padded = np.zeros((len(frames), n))
+    padded[:, :frames.shape[1]] = frames
+    cross = backend.irfft(np.conj(backend.rfft(head)) * backend.rfft(padded), n)[:, :max_lag + 1]
+    energy = np.zeros((len(frames), frames.shape[1] + 1))
+    np.cumsum(frames ** 2, axis=1, out=energy[:, 1:])
+    lagged_energy = energy[:, window_length:window_length + max_lag + 1] - energy[:, :max_lag + 1]
+    difference = energy[:, window_length:window_length + 1] + lagged_energy - 2 * cross
+    np.maximum(difference, 0, out=difference)
+    return difference
+
+def _cumulative_mean_normalized(difference):
+    normalized = np.ones_like(difference)
+    running = np.cumsum(difference[:, 1:], axis=1)
+    lags = np.arange(1, difference.shape[1])
+    np.divide(difference[:, 1:] * lags, running, out=normalized[:, 1:], where=running > 0)
+    return normalized
+
+def _yin_frames(frames, window_length, min_lag, max_lag, threshold):
+    normalized = _cumulative_mean_normalized(_difference_function(frames, window_length, max_lag))
+    lags = np.arange(normalized.shape[1])
+    rows = np.arange(len(frames))
+    search = lags >= min_lag
+    # The first dip below the threshold, followed down to its local minimum.
+    below = (normalized < threshold) & search
+    voiced = below.any(axis=1)
+    first = np.where(voiced, np.argmax(below, axis=1), np.argmin(np.where(search, normalized, np.inf), axis=1))
+    rising = np.ones_like(below)
+    rising[:, :-1] = normalized[:, 1:] >= normalized[:, :-1]
+    lag = np.argmax(rising & (lags >= first[:, None]), axis=1)
+    # Parabolic interpolation of the minimum between its neighbours.
+    inner = np.clip(lag, 1, normalized.shape[1] - 2)
+    left = normalized[rows, inner - 1]
+    centre = normalized[rows, inner]
+    right = normalized[rows, inner + 1]
+    curvature = left - 2 * centre + right
+    shift = np.divide(left - right, 2 * curvature, out=np.zeros_like(curvature), where=curvature > 0)
+    shift = np.where(inner == lag, np.clip(shift, -1, 1), 0)
+    return lag + shift, normalized[rows, lag], voiced
+
+@instrumented()
+def track_pitch(sound, sample_rate=44100, frame_duration=0.04, hop_duration=0.01, min_frequency=60, max_frequency=1000, threshold=0.1):
+    """
+    Track the fundamental frequency frame by frame with the YIN algorithm.
+
+    Frames are processed in batches: the difference function of every frame in a batch comes from
+    one batched FFT, and the cumulative-mean normalization, threshold search and parabolic
+    refinement are vectorized across frames.
+
+    Parameters:
+    - sound: A 1-D numpy array containing the sound data, or a 2-D array with one clip per row.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - frame_duration: The length of the YIN integration window (in seconds); it should cover at
+      least two periods of `min_frequency`.
+    - hop_duration: The time between frame starts (in seconds).
+    - min_frequency: The lowest detectable pitch (in Hz).
+    - max_frequency: The highest detectable pitch (in Hz).
+    - threshold: The YIN aperiodicity threshold; frames with no dip below it are unvoiced.
+
+    Returns:
+    - A tuple containing the frame start times (in seconds), the pitch of each frame (in Hz, NaN
+      where unvoiced) and the periodicity of each frame (1 minus the YIN aperiodicity, 0 to 1). For
+      2-D input the pitch and periodicity arrays have one row per clip.
+    """
+    sound = np.asarray(sound, dtype=np.float64)
+    clips = np.atleast_2d(sound)
+    window_length = int(round(frame_duration * sample_rate))
+    min_lag = max(int(np.floor(sample_rate / max_frequency)), 2)
+    max_lag = int(np.ceil(sample_rate / min_frequency))
+    frame_length = window_length + max_lag + 1
+    hop_length = max(int(round(hop_duration * sample_rate)), 1)
+    if clips.shape[1] < frame_length:
+        clips = np.pad(clips, ((0, 0), (0, frame_length - clips.shape[1])))
+    num_frames = (clips.shape[1] - frame_length) // hop_length + 1
+    # A (clips, frames, frame_length) view; only one batch of frames is ever copied out of it.
+    frames = np.lib.stride_tricks.sliding_window_view(clips, frame_length, axis=1)[:, ::hop_length]
+    total_frames = len(clips) * num_frames
+
+    lags = np.empty(total_frames)
+    aperiodicity = np.empty(total_frames)
+    voiced = np.empty(total_frames, dtype=bool)
+    batch_frames = min(PITCH_BATCH_FRAMES, total_frames)
+    batch = np.zeros((batch_frames, frame_length))
+    for start in range(0, total_frames, batch_frames):
+        stop = min(start + batch_frames, total_frames)
+        # A fixed batch shape lets every batch reuse the same FFT plans. Frames are numbered clip
+        # by clip, so a batch may take the end of one clip and the start of the next.
+        position = start
+        while position < stop:
+            clip, frame = divmod(position, num_frames)
+            count = min(stop - position, num_frames - frame)
+            batch[position - start:position - start + count] = frames[clip, frame:frame + count]
+            position += count
+        batch[stop - start:] = 0
+        lag, value, is_voiced = _yin_frames(batch, window_length, min_lag, max_lag, threshold)
+        lags[start:stop] = lag[:stop - start]
+        aperiodicity[start:stop] = value[:stop - start]
+        voiced[start:stop] = is_voiced[:stop - start]
+
+    pitch = np.where(voiced, sample_rate / lags, np.nan).reshape(len(clips), num_frames)
+    periodicity = np.clip(1 - aperiodicity, 0, 1).reshape(len(clips), num_frames)
+    times = np.arange(num_frames) * hop_length / sample_rate
+    if sound.ndim == 1:
+        return times, pitch[0], periodicity[0]
+    return times, pitch, periodicity
+
+def median_pitch(pitch):
+    """
+    Return the median of the voiced frames of a pitch track (along the last axis), or 0 if none is voiced.
+    """
+    pitch = np.asarray(pitch)
+    voiced = ~np.isnan(pitch)
+    result = np.zeros(pitch.shape[:-1])
+    any_voiced = voiced.any(axis=-1)
+    if np.any(any_voiced):
+        result[any_voiced] = np.nanmedian(pitch[any_voiced], axis=-1)
+    return result if pitch.ndim > 1 else float(result)
@@ -0,0 +1,129 @@
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+SUPPORTED_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+# The process-wide default, seen by every thread, and a per-context override set by `precision`.
+# Threads and executor workers start from an empty context, so they see the process default.
+_process_default_dtype = np.dtype(np.float64)
+_default_dtype = ContextVar('acousynth_default_dtype', default=None)
+
+class OutputShapeError(ValueError):
+    """
+    Raised when a caller-provided output array does not have the shape a function produces.
+
+    `expected` holds the required shape, so a caller can retry with a buffer of the right length.
+    """
+
+    def __init__(self, shape, expected):
+        super().__init__(f"out has shape {shape}, expected {expected}")
+        self.shape = shape
+        self.expected = expected
+
+def _check_dtype(dtype):
+    dtype = np.dtype(dtype)
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported sample dtype: {dtype} (expected float32 or float64)")
+    return dtype
+
+def get_default_dtype():
+    """
+    Return the sample dtype used by synthesis, effect and analysis functions when none is given.
+    """
+    dtype = _default_dtype.get()
+    return _process_default_dtype if dtype is None else dtype
+
+def set_default_dtype(dtype):
+    """
+    Set the sample dtype used when a function is not given `dtype` or `out`, for the whole process.
+
+    The default applies in every thread, including threads and pool workers started earlier;
+    code inside a `precision` block keeps the block's dtype.
+
+    Parameters:
+    - dtype: np.float32 or np.float64.
+    """
+    global _process_default_dtype
+    _process_default_dtype = _check_dtype(dtype)
+
+@contextmanager
+def precision(dtype):
+    """
+    Context manager that sets the default sample dtype for the code it wraps.
+
+    The override is held in a context variable, so it is local to the current thread or asyncio
+    task and does not reach threads or executor workers started inside the block (they use the
+    process default from `set_default_dtype`).
+
+    Parameters:
+    - dtype: np.float32 or np.float64.
+    """
+    token = _default_dtype.set(_check_dtype(dtype))
+    try:
+        yield
+    finally:
+        _default_dtype.reset(token)
+
+def resolve_dtype(dtype=None, out=None):
+    """
+    Return the dtype a function should compute in: that of `out` if given, else `dtype`, else the default.
+    """
+    if out is not None:
+        return _check_dtype(out.dtype)
+    if dtype is not None:
+        return _check_dtype(dtype)
+    return get_default_dtype()
+
+def prepare_output(out, shape, dtype=None):
+    """
+    Return `out` after checking its shape, or a new uninitialized array of the given shape.
+
+    Parameters:
+    - out: An optional caller-provided destination array.
+    - shape: The required shape.
+    - dtype: The dtype of a newly allocated array (resolved with `resolve_dtype`).
+
+    Returns:
+    - A numpy array to write the result into.
+    """
+    if not isinstance(shape, tuple):
+        shape = (int(shape),)
+    if out is None:
+        return np.empty(shape, dtype=resolve_dtype(dtype))
+    if out.shape != shape:
+        raise OutputShapeError(out.shape, shape)
+    resolve_dtype(out=out)
+    return out
+
+def output_length(render_func, params):
+    """
+    Return the number of samples render_func(**params) produces, without rendering it.
+
+    Synthesis functions declare their length with an `output_length` attribute: a function that
+    takes the render's arguments (with defaults filled in) and returns the number of samples, or
+    None when those arguments do not produce an array.
+
+    Parameters:
+    - render_func: The synthesis function.
+    - params: A dictionary of keyword arguments for the function.
+
+    Returns:
+    - The number of samples, or None if the function does not declare its length.
+    """
+    helper = getattr(render_func, 'output_length', None)
+    if helper is None:
+        return None
+    arguments = inspect.signature(render_func).bind(**params)
+    arguments.apply_defaults()
+    length = helper(**arguments.arguments)
+    return None if length is None else int(length)
+
+def blocks(num_samples, block_size=16384):
+    """
+    Yield (start, stop) bounds that split `num_samples` samples into blocks of at most `block_size`.
+    """
+    for start in range(0, num_samples, block_size):
+        yield start, min(start + block_size, num_samples)
@@ -0,0 +1,373 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from src.noise_module import random_stream
+from src.precision_module import resolve_dtype
+
+# Part of every key, so that changing how keys or files are laid out invalidates old entries.
+CACHE_FORMAT = 2
+
+_source_digests = {}
+_source_digests_lock = threading.Lock()
+
+def _normalize(value):
+    """
+    Turn a parameter value into a JSON-serializable form that is equal for equal values.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else repr(value)
+    if isinstance(value, np.random.SeedSequence):
+        # The state a SeedSequence spawns from; children already spawned would change what it
+        # gives next, so they are part of the key too.
+        return {'seed_sequence': [_normalize(value.entropy), list(value.spawn_key), value.pool_size,
+                                  value.n_children_spawned]}
+    if isinstance(value, np.random.Generator):
+        raise TypeError("Cannot derive a cache key from a numpy Generator, whose state changes as it "
+                        "is drawn from; pass an int seed or a SeedSequence instead")
+    if isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+        return {'dtype': np.dtype(value).str}
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest = hashlib.sha256(array.view(np.uint8).reshape(-1) if array.size else b'').hexdigest()
+        return {'array': digest, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in sorted(value.items(), key=lambda entry: str(entry[0]))}
+    if callable(value) and hasattr(value, '__qualname__'):
+        return {'callable': f'{value.__module__}.{value.__qualname__}'}
+    if hasattr(value, '__dict__'):
+        # Objects such as a Wavetable are identified by their class and their contents.
+        return {'object': f'{type(value).__module__}.{type(value).__qualname__}', 'state': _normalize(vars(value))}
+    raise TypeError(f"Cannot derive a cache key from a parameter of type {type(value).__name__}")
+
+def _source_digest(path):
+    stat = os.stat(path)
+    signature = (path, stat.st_mtime_ns, stat.st_size)
+    with _source_digests_lock:
+        digest = _source_digests.get(signature)
+    if digest is None:
+        with open(path, 'rb') as source:
+            digest = hashlib.sha256(source.read()).hexdigest()
+        with _source_digests_lock:
+            _source_digests[signature] = digest
+    return digest
+
+@lru_cache(maxsize=None)
+def _package_digest():
+    # The package's modules are imported once per process, so their sources are hashed once.
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256(np.__version__.encode())
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            digest.update(_source_digest(os.path.join(package, name)).encode())
+    return digest.hexdigest()
+
+def code_version(render_func):
+    """
+    Return a hash of the code a render runs: every module of this package, and the module defining the function.
+
+    A render can reach any module of the package (the render graph, the noise streams, the FFT
+    backend), so all of them are hashed, along with the numpy version. The function's own module
+    is hashed again whenever its size or modification time changes.
+
+    Parameters:
+    - render_func: The synthesis function.
+
+    Returns:
+    - A hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(_package_digest().encode())
+    try:
+        path = inspect.getsourcefile(inspect.unwrap(render_func))
+    except TypeError:
+        path = None
+    if path is not None and os.path.exists(path):
+        digest.update(_source_digest(os.path.abspath(path)).encode())
+    return digest.hexdigest()
+
+def render_key(render_func, params, seed=None):
+    """
+    Return the content address of a render: a hash of the function, its normalized arguments and the seed.
+
+    The key also covers the code version (see `code_version`), so entries rendered by an older
+    version of the code are not returned. Arguments left at their defaults are filled in, so generate_harmonic_sound(440, h, 1.0) and
+    generate_harmonic_sound(440, h, 1.0, sample_rate=44100) share an entry. A `dtype` argument
+    is resolved against the current precision policy. A SeedSequence argument (such as `rng`) is
+    keyed by its state; a Generator cannot be, so it is rejected with a TypeError.
+
+    Parameters:
+    - render_func: The synthesis function.
+    - params: A dictionary of keyword arguments for the function.
+    - seed: The seed the render runs with (None for an unseeded render).
+
+    Returns:
+    - A hexadecimal SHA-256 digest.
+    """
+    signature = inspect.signature(render_func)
+    arguments = signature.bind(**params)
+    arguments.apply_defaults()
+    arguments = dict(arguments.arguments)
+    if arguments.get('out') is not None:
+        raise ValueError("Cached renders cannot write into `out`")
+    arguments.pop('out', None)
+    if 'dtype' in signature.parameters:
+        arguments['dtype'] = resolve_dtype(arguments['dtype'])
+    document = {
+        'format': CACHE_FORMAT,
+        'function': f'{render_func.__module__}.{render_func.__qualname__}',
+        'code': code_version(render_func),
+        'arguments': _normalize(arguments),
+        'seed': _normalize(seed),
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+class RenderCache:
+    """
+    Rendered sounds memoized by content address, in a memory LRU backed by a directory of .npy files.
+
+    Results are returned read-only. With a directory they are memory-mapped from their .npy
+    files, so the memory tier holds only the mappings and the operating system's page cache
+    keeps the data. Both tiers evict least-recently-used entries once they exceed their size
+    caps; the disk tier orders entries by file modification time, which is refreshed on every hit,
+    so the order survives a restart.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=256 * 1024 * 1024, max_disk_bytes=4 * 1024 * 1024 * 1024):
+        """
+        Parameters:
+        - directory: The directory of the disk tier (None for a memory-only cache).
+        - max_memory_bytes: The maximum total size (in bytes) of the results held in memory.
+        - max_disk_bytes: The maximum total size (in bytes) of the .npy files on disk.
+        """
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.uncached = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scan()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime_ns, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def _remember(self, key, array):
+        self._memory[key] = array
+        self._memory.move_to_end(key)
+        self._memory_bytes += array.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get(self, key):
+        """
+        Return the cached result for `key`, or None.
+        """
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return array
+            if key not in self._disk:
+                self.misses += 1
+                return None
+            try:
+                array = np.load(self._path(key), mmap_mode='r')
+                os.utime(self._path(key))
+            except (OSError, ValueError):
+                # Removed by another process, or a truncated file: treat it as a miss.
+                self._disk_bytes -= self._disk.pop(key)
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.hits += 1
+            self.disk_hits += 1
+            if array.nbytes <= self.max_memory_bytes:
+                self._remember(key, array)
+            return array
+
+    def put(self, key, array):
+        """
+        Store a result and return the cached, read-only copy (memory-mapped when there is a disk tier).
+        """
+        array = np.asarray(array)
+        if self.directory is None:
+            array = array.copy()
+            array.setflags(write=False)
+        else:
+            # Write to a temporary file and rename it, so readers never see a partial file.
+            handle, temporary = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(handle, 'wb') as file:
+                    np.save(file, array)
+                os.replace(temporary, self._path(key))
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+            array = np.load(self._path(key), mmap_mode='r')
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key).nbytes
+            if array.nbytes <= self.max_memory_bytes:
+                self._remember(key, array)
+            if self.directory is not None:
+                self._disk_bytes -= self._disk.pop(key, 0)
+                self._disk[key] = os.path.getsize(self._path(key))
+                self._disk_bytes += self._disk[key]
+                self._evict_disk(keep=key)
+        return array
+
+    def _evict_disk(self, keep):
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            key = next(iter(self._disk))
+            if key == keep:
+                self._disk.move_to_end(key)
+                continue
+            self._disk_bytes -= self._disk.pop(key)
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key).nbytes
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                # Still mapped on a platform that forbids removing open files; it is retried
+                # the next time the directory is scanned.
+                pass
+
+    def render(self, render_func, params, seed=None):
+        """
+        Return the cached result of render_func(**params), rendering and storing it on a miss.
+
+        Without a seed, the render runs inside a random stream of fresh entropy. If it draws from
+        that stream (unseeded noise, or an `rng` left at None), its result is random, so it is
+        returned without being stored and the next call renders again.
+
+        Parameters:
+        - render_func: The synthesis function, e.g. generate_harmonic_sound.
+        - params: A dictionary of keyword arguments for the function (without `out`).
+        - seed: If given, the render runs inside `random_stream(seed)` and the seed is part of the
+          key. The stream is local to the calling thread or task, so renders on different threads
+          do not interfere; np.random's global state is left alone.
+
+        Returns:
+        - A read-only numpy array (writable for an unseeded random render, which is not stored).
+        """
+        key = render_key(render_func, params, seed)
+        array = self.get(key)
+        if array is not None:
+            return array
+        if seed is None:
+            stream = np.random.SeedSequence()
+            with random_stream(stream):
+                result = render_func(**params)
+            if stream.n_children_spawned:
+                with self._lock:
+                    self.uncached += 1
+                return result
+        else:
+            with random_stream(seed):
+                result = render_func(**params)
+        return self.put(key, result)
+
+    def clear(self):
+        """
+        Drop every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+
+    def cache_info(self):
+        """
+        Return a dictionary describing the cache (hits, misses, unseeded random renders that were
+        not stored, and the entries and bytes of each tier).
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'uncached': self.uncached,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+            }
+
+_default_cache = None
+
+def get_render_cache():
+    """
+    Return the process-wide RenderCache.
+
+    Its disk tier lives in the directory named by the ACOUSYNTH_RENDER_CACHE environment
+    variable; without it the cache is memory-only.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RenderCache(os.environ.get('ACOUSYNTH_RENDER_CACHE') or None)
+    return _default_cache
+
+def set_render_cache(cache):
+    """
+    Replace the process-wide RenderCache.
+    """
+    global _default_cache
+    _default_cache = cache
+
+def cached_render(render_func, seed=None, cache=None, **params):
+    """
+    Render through a RenderCache, so a repeated parameter set is a lookup.
+
+    Parameters:
+    - render_func: The synthesis function, e.g. generate_synthetic_speech.
+    - seed: An optional seed for functions that draw random numbers; without one their renders
+      are random and are not cached.
+    - cache: The RenderCache to use (defaults to `get_render_cache()`).
+    - params: The keyword arguments of the function.
+
+    Returns:
+    - A read-only numpy array.
+    """
+    return (cache or get_render_cache()).render(render_func, params, seed)
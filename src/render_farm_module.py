@@ -0,0 +1,162 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+from src.noise_module import random_stream
+from src.precision_module import output_length
+
+_worker_output = None
+_worker_memory = None
+
+def _init_worker(memory_name, shape, dtype):
+    global _worker_output, _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_output = np.ndarray(shape, dtype=dtype, buffer=_worker_memory.buf)
+
+def _render_job(index, render_func, params, seed_sequence):
+    row = _worker_output[index]
+    # Functions that declare their length render straight into the shared row.
+    length = None if 'out' in params else output_length(render_func, params)
+    # Functions on the legacy global state are seeded too, not only those drawing from random streams.
+    np.random.seed(seed_sequence.generate_state(4))
+    with random_stream(seed_sequence):
+        if length is not None and length <= len(row):
+            render_func(**params, out=row[:length])
+            row[length:] = 0
+            return index, length
+        sound = np.asarray(render_func(**params))
+    # Other functions, and results longer than the row, are rendered and copied.
+    length = min(len(sound), len(row))
+    row[:length] = sound[:length]
+    row[length:] = 0
+    return index, length
+
+class SharedRenderBuffer:
+    """
+    Rendered results held in shared memory, one row per parameter set.
+
+    Use it as a context manager, or call `close` once the results have been consumed; the
+    array is invalid afterwards.
+    """
+
+    def __init__(self, memory, shape, dtype):
+        self._memory = memory
+        self.array = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        self.lengths = np.zeros(shape[0], dtype=np.int64)
+        self.completed = np.zeros(shape[0], dtype=bool)
+        self.cancelled = False
+
+    def close(self):
+        """
+        Release the shared memory block.
+        """
+        if self._memory is None:
+            return
+        self.array = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class RenderFarm:
+    """
+    Render many parameter sets of a synthesis function across a process pool.
+
+    Workers write each result straight into a shared-memory output buffer, so rendered audio is
+    never pickled back to the parent; functions that declare their length (see `output_length`)
+    render into their row in place. Every job is seeded from its own child of one SeedSequence,
+    so results do not depend on which worker runs which job: unseeded noise inside a job draws from
+    `random_stream(child)`, and np.random's global state is seeded from the same child.
+    """
+
+    def __init__(self, max_workers=None, seed=None, mp_context=None):
+        """
+        Parameters:
+        - max_workers: The number of worker processes (defaults to the number of CPUs).
+        - seed: The root seed from which every job's random state is derived.
+        - mp_context: An optional multiprocessing context for the pool.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = seed
+        self.mp_context = mp_context
+
+    def render(self, render_func, param_sets, num_samples, dtype=np.float64, progress=None, cancel_event=None):
+        """
+        Render every parameter set.
+
+        Parameters:
+        - render_func: A picklable module-level function, e.g. generate_synthetic_speech.
+        - param_sets: A list of keyword-argument dictionaries, one per job.
+        - num_samples: The number of samples reserved per job; longer results are truncated and
+          shorter ones zero-padded (their true lengths are reported in `lengths`).
+        - dtype: The dtype of the output buffer.
+        - progress: An optional function called as progress(completed_jobs, total_jobs).
+        - cancel_event: An optional threading.Event; once set, pending jobs are cancelled and the
+          buffer is returned with `cancelled` set and only the finished rows marked `completed`.
+
+        Returns:
+        - A SharedRenderBuffer holding one row per parameter set.
+        """
+        param_sets = list(param_sets)
+        shape = (len(param_sets), int(num_samples))
+        dtype = np.dtype(dtype)
+        memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        result = SharedRenderBuffer(memory, shape, dtype)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(param_sets))
+        cancel_event = cancel_event or threading.Event()
+        try:
+            with ProcessPoolExecutor(self.max_workers, mp_context=self.mp_context, initializer=_init_worker,
+                                     initargs=(memory.name, shape, dtype)) as executor:
+                pending = {executor.submit(_render_job, index, render_func, params, seeds[index])
+                           for index, params in enumerate(param_sets)}
+                while pending:
+                    done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, length = future.result()
+                        result.lengths[index] = length
+                        result.completed[index] = True
+                    if done and progress is not None:
+                        progress(int(result.completed.sum()), len(param_sets))
+                    if cancel_event.is_set() and pending:
+                        for future in pending:
+                            future.cancel()
+                        result.cancelled = True
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        for future in pending:
+                            if future.done() and not future.cancelled() and future.exception() is None:
+                                index, length = future.result()
+                                result.lengths[index] = length
+                                result.completed[index] = True
+                        break
+        except BaseException:
+            result.close()
+            raise
+        return result
+
+def render_batch(render_func, param_sets, num_samples, max_workers=None, seed=None, dtype=np.float64, progress=None, cancel_event=None):
+    """
+    Render parameter sets across a process pool and return the results as a regular array.
+
+    Parameters:
+    - render_func: A picklable module-level function, e.g. generate_synthetic_speech.
+    - param_sets: A list of keyword-argument dictionaries, one per job.
+    - num_samples: The number of samples reserved per job.
+    - max_workers: The number of worker processes.
+    - seed: The root seed from which every job's random state is derived.
+    - dtype: The dtype of the output.
+    - progress: An optional function called as progress(completed_jobs, total_jobs).
+    - cancel_event: An optional threading.Event that cancels the remaining jobs when set.
+
+    Returns:
+    - A 2-D numpy array with one rendered row per parameter set.
+    """
+    farm = RenderFarm(max_workers=max_workers, seed=seed)
+    with farm.render(render_func, param_sets, num_samples, dtype, progress, cancel_event) as result:
+        return result.array.copy()
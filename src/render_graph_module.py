@@ -0,0 +1,460 @@
+import numpy as np
+from src.instrumentation_module import instrumented
+from src.noise_module import NoiseGenerator
+from src.precision_module import blocks, prepare_output
+from src.wavetable_module import Wavetable, get_sine_table
+
+# 4096 float64 samples are 32 KiB, so a tile and a couple of pooled operands stay in L2.
+RENDER_TILE_SIZE = 4096
+
+class Node:
+    """
+    A node of a render graph: a generator, an effect applied to other nodes, or a mix.
+
+    Nodes describe a signal without computing it; `RenderGraph` evaluates them tile by tile.
+    `*` and `+` between nodes (or a node and a number) build `Product` and `Sum` nodes.
+    """
+
+    inputs = ()
+
+    def evaluate(self, context, start, stop, out):
+        """
+        Write samples [start, stop) of the node into `out`.
+
+        Parameters:
+        - context: The RenderContext of the running render.
+        - start: The first sample of the tile.
+        - stop: The sample after the last one of the tile.
+        - out: A numpy array of length stop - start.
+        """
+        raise NotImplementedError
+
+    def view(self, context, start, stop):
+        """
+        Return samples [start, stop) without copying, or None if the node has to be evaluated.
+        """
+        return None
+
+    def reset(self):
+        """
+        Clear any state carried from tile to tile, before a new render.
+        """
+        for node in self.inputs:
+            node.reset()
+
+    def __mul__(self, other):
+        return Product(self, other)
+
+    def __rmul__(self, other):
+        return Product(other, self)
+
+    def __add__(self, other):
+        return Sum(self, other)
+
+    def __radd__(self, other):
+        return Sum(other, self)
+
+def as_node(value):
+    """
+    Return `value` as a Node: nodes are returned as is, numbers become Constant and arrays become Signal.
+    """
+    if isinstance(value, Node):
+        return value
+    if np.ndim(value) == 0:
+        return Constant(value)
+    return Signal(value)
+
+class Constant(Node):
+    """
+    A constant value.
+    """
+
+    def __init__(self, value):
+        self.value = float(value)
+
+    def evaluate(self, context, start, stop, out):
+        out.fill(self.value)
+
+class Signal(Node):
+    """
+    An existing array (a recording, a precomputed envelope), read tile by tile without copying.
+    """
+
+    def __init__(self, samples):
+        """
+        Parameters:
+        - samples: A 1-D numpy array at least as long as the render.
+        """
+        self.samples = np.asarray(samples)
+
+    def view(self, context, start, stop):
+        return self.samples[start:stop]
+
+    def evaluate(self, context, start, stop, out):
+        out[...] = self.samples[start:stop]
+
+class Oscillator(Node):
+    """
+    sin(2 * pi * freq * t), or another waveform, times an amplitude.
+
+    The sine is evaluated from the same phases as the shared phase table, in double precision
+    whatever the output dtype, as `render_oscillator` does, so a tiled render matches a
+    whole-signal one.
+    """
+
+    def __init__(self, freq, amplitude=1.0, oscillator='sine'):
+        """
+        Parameters:
+        - freq: The frequency of the oscillator (in Hz).
+        - amplitude: The peak amplitude.
+        - oscillator: 'sine', 'wavetable' or a Wavetable instance (see `render_oscillator`).
+        """
+        if not isinstance(oscillator, Wavetable) and oscillator not in ('sine', 'wavetable'):
+            raise ValueError(f"Unknown oscillator: {oscillator}")
+        self.freq = float(freq)
+        self.amplitude = float(amplitude)
+        self.oscillator = oscillator
+
+    def evaluate(self, context, start, stop, out):
+        if self.oscillator == 'sine':
+            phase = context.tile_phase(start, stop)
+            phase *= self.freq
+            np.sin(phase, out=out)
+        else:
+            wavetable = get_sine_table() if self.oscillator == 'wavetable' else self.oscillator
+            cycles = (self.freq / context.sample_rate * start) % 1.0
+            wavetable.render(self.freq, stop - start, context.sample_rate, cycles, out=out)
+        if self.amplitude != 1.0:
+            out *= self.amplitude
+
+class Decay(Node):
+    """
+    The exponential decay exp(-rate * t).
+    """
+
+    def __init__(self, rate):
+        """
+        Parameters:
+        - rate: The decay rate (in 1/s); a formant bandwidth, for example.
+        """
+        self.rate = float(rate)
+
+    def evaluate(self, context, start, stop, out):
+        exponent = context.tile_time(start, stop)
+        exponent *= -self.rate
+        np.exp(exponent, out=out)
+
+class Noise(Node):
+    """
+    Gaussian noise times a level, streamed tile by tile from a NoiseGenerator.
+
+    Tiles are rendered in order, so the samples are the same as generate_noise with the same
+    colour and rng (or as `rng.standard_normal` for white noise from a Generator).
+    """
+
+    def __init__(self, level=1.0, rng=None, color='white'):
+        """
+        Parameters:
+        - level: The standard deviation of the noise.
+        - rng: A numpy Generator, SeedSequence or int seed; None draws a new stream for every
+          render from the current random stream (see `make_rng`).
+        - color: 'white', 'pink' or 'brown'.
+        """
+        self.level = float(level)
+        self.rng = rng
+        self.color = color
+        self._generator = None
+
+    def reset(self):
+        super().reset()
+        self._generator = None
+
+    def evaluate(self, context, start, stop, out):
+        if self._generator is None:
+            self._generator = NoiseGenerator(self.color, self.rng, self.level, context.sample_rate)
+        self._generator.render(stop - start, out=out)
+
+class Effect(Node):
+    """
+    An elementwise function applied to the tiles of another node, in place.
+    """
+
+    def __init__(self, source, func):
+        """
+        Parameters:
+        - source: The input node (or a value accepted by `as_node`).
+        - func: A function func(block) that modifies the block in place (for example
+          `lambda block: np.tanh(block, out=block)`).
+        """
+        self.inputs = [as_node(source)]
+        self.func = func
+
+    def evaluate(self, context, start, stop, out):
+        context.render_into(self.inputs[0], start, stop, out)
+        self.func(out)
+
+class Filter(Node):
+    """
+    A stateful block processor, such as a FormantCascade, fed the tiles of another node in order.
+
+    The processor carries its state from tile to tile, so the result equals filtering the whole
+    signal at once. Its `reset` method is called at the start of each render.
+    """
+
+    def __init__(self, source, processor):
+        """
+        Parameters:
+        - source: The input node (or a value accepted by `as_node`).
+        - processor: An object whose process(block) method returns the filtered block.
+        """
+        self.inputs = [as_node(source)]
+        self.processor = processor
+
+    def evaluate(self, context, start, stop, out):
+        context.render_into(self.inputs[0], start, stop, out)
+        out[...] = self.processor.process(out)
+
+    def reset(self):
+        super().reset()
+        if hasattr(self.processor, 'reset'):
+            self.processor.reset()
+
+class _Chain(Node):
+    """
+    An elementwise chain of operands combined with one binary ufunc.
+
+    Nested chains of the same kind are flattened and their constants folded on first use, so
+    a * b * (c * 2) * 3 is evaluated as a * b * c * 6, each operand applied in place to the
+    output tile.
+    """
+
+    ufunc = None
+    identity = None
+
+    def __init__(self, *operands):
+        self.inputs = [as_node(operand) for operand in operands]
+        self._fused = None
+
+    def _fuse(self):
+        if self._fused is None:
+            constant = self.identity
+            operands = []
+            pending = list(self.inputs)
+            while pending:
+                operand = pending.pop(0)
+                if isinstance(operand, _Chain) and operand.ufunc is self.ufunc:
+                    pending[:0] = operand.inputs
+                elif isinstance(operand, Constant):
+                    constant = self.ufunc(constant, operand.value)
+                else:
+                    operands.append(operand)
+            self._fused = (constant, operands)
+        return self._fused
+
+    def evaluate(self, context, start, stop, out):
+        constant, operands = self._fuse()
+        if not operands:
+            out.fill(constant)
+            return
+        context.render_into(operands[0], start, stop, out)
+        for operand in operands[1:]:
+            samples = operand.view(context, start, stop)
+            if samples is not None:
+                self.ufunc(out, samples, out=out)
+                continue
+            scratch = context.acquire(stop - start)
+            try:
+                operand.evaluate(context, start, stop, scratch)
+                self.ufunc(out, scratch, out=out)
+            finally:
+                context.release(scratch)
+        if constant != self.identity:
+            self.ufunc(out, constant, out=out)
+
+class Product(_Chain):
+    """
+    The elementwise product of several nodes (a gain, an envelope or a ring modulator).
+    """
+
+    ufunc = np.multiply
+    identity = 1.0
+
+class Sum(_Chain):
+    """
+    The elementwise sum of several nodes.
+    """
+
+    ufunc = np.add
+    identity = 0.0
+
+class Mix(Sum):
+    """
+    The weighted sum of several nodes.
+    """
+
+    def __init__(self, sources, gains=None):
+        """
+        Parameters:
+        - sources: A list of nodes (or values accepted by `as_node`).
+        - gains: Optional gains, one per source (defaults to 1).
+        """
+        if gains is None:
+            super().__init__(*sources)
+        else:
+            super().__init__(*[as_node(source) * gain for source, gain in zip(sources, gains)])
+
+class RenderContext:
+    """
+    The state shared by the nodes of one render: a pool of tile-sized buffers and a float64 scratch tile.
+
+    Buffers are handed out by `acquire` and returned by `release`, so a render allocates as many
+    tile buffers as its graph is deep, however long the signal is. The times and phases of a tile
+    are computed from its sample indices when a node needs them, rather than sliced from arrays as
+    long as the signal.
+    """
+
+    def __init__(self, num_samples, sample_rate, tile_size, dtype):
+        self.num_samples = num_samples
+        self.sample_rate = sample_rate
+        self.tile_size = tile_size
+        self.dtype = dtype
+        self._free = []
+        self.buffers_allocated = 0
+        self._double = None
+        self._indices = None
+
+    def acquire(self, length):
+        """
+        Return a pooled buffer of `length` samples (at most one tile).
+        """
+        if self._free:
+            buffer = self._free.pop()
+        else:
+            buffer = np.empty(self.tile_size, dtype=self.dtype)
+            self.buffers_allocated += 1
+        return buffer[:length]
+
+    def release(self, buffer):
+        """
+        Return a buffer obtained from `acquire` to the pool.
+        """
+        self._free.append(buffer.base if buffer.base is not None else buffer)
+
+    def double_scratch(self, length):
+        """
+        Return a float64 scratch tile for generators that reduce phases in double precision.
+
+        Generators use it only between reading their inputs and writing their output, so one buffer
+        serves the whole graph.
+        """
+        if self._double is None:
+            self._double = np.empty(self.tile_size)
+        return self._double[:length]
+
+    def _tile_indices(self, start, stop):
+        if self._indices is None:
+            self._indices = np.arange(self.tile_size, dtype=np.float64)
+        return np.add(self._indices[:stop - start], start, out=self.double_scratch(stop - start))
+
+    def tile_time(self, start, stop):
+        """
+        Return the times (in seconds) of samples [start, stop) in the float64 scratch tile.
+
+        The values equal `get_time_base(num_samples, sample_rate)[start:stop]`.
+        """
+        time = self._tile_indices(start, stop)
+        time /= self.sample_rate
+        return time
+
+    def tile_phase(self, start, stop):
+        """
+        Return the phases of a 1 Hz sine at samples [start, stop) in the float64 scratch tile.
+
+        The values equal `get_phase_table(num_samples, sample_rate)[start:stop]`.
+        """
+        phase = self._tile_indices(start, stop)
+        phase *= 2 * np.pi / self.sample_rate
+        return phase
+
+    def render_into(self, node, start, stop, out):
+        """
+        Write samples [start, stop) of `node` into `out`, copying a view when the node has one.
+        """
+        samples = node.view(self, start, stop)
+        if samples is None:
+            node.evaluate(self, start, stop, out)
+        elif not np.shares_memory(samples, out):
+            out[...] = samples
+
+def _signals(node):
+    if isinstance(node, Signal):
+        yield node
+    for child in node.inputs:
+        yield from _signals(child)
+
+class RenderGraph:
+    """
+    A render graph evaluated in cache-sized tiles.
+
+    Chains of products and sums are fused: each chain is computed in one output tile, operand by
+    operand, with at most one pooled scratch tile per level of nesting. No full-length
+    intermediate is allocated; only the result is.
+    """
+
+    def __init__(self, output, sample_rate=44100, tile_size=RENDER_TILE_SIZE):
+        """
+        Parameters:
+        - output: The node whose samples are rendered (or a value accepted by `as_node`).
+        - sample_rate: The sample rate (in samples per second).
+        - tile_size: The number of samples evaluated per tile.
+        """
+        self.output = as_node(output)
+        self.sample_rate = sample_rate
+        self.tile_size = int(tile_size)
+        self.buffers_allocated = 0
+
+    @instrumented()
+    def render(self, num_samples, dtype=None, out=None):
+        """
+        Render the graph.
+
+        Parameters:
+        - num_samples: The number of samples to render.
+        - dtype: The sample dtype of the result (defaults to the precision policy).
+        - out: An optional array to write the result into. It may be the array of a Signal node
+          (to process a sound in place); each tile is then rendered into a pooled buffer first.
+
+        Returns:
+        - A numpy array containing the rendered signal.
+        """
+        result = prepare_output(out, num_samples, dtype)
+        context = RenderContext(num_samples, self.sample_rate, min(self.tile_size, max(num_samples, 1)), result.dtype)
+        self.output.reset()
+        in_place = out is not None and any(np.may_share_memory(node.samples, out) for node in _signals(self.output))
+        for start, stop in blocks(num_samples, context.tile_size):
+            if in_place:
+                tile = context.acquire(stop - start)
+                context.render_into(self.output, start, stop, tile)
+                result[start:stop] = tile
+                context.release(tile)
+            else:
+                context.render_into(self.output, start, stop, result[start:stop])
+        self.buffers_allocated = context.buffers_allocated
+        return result
+
+def render(output, num_samples, sample_rate=44100, tile_size=RENDER_TILE_SIZE, dtype=None, out=None):
+    """
+    Render a graph node.
+
+    Parameters:
+    - output: The node to render (or a value accepted by `as_node`).
+    - num_samples: The number of samples to render.
+    - sample_rate: The sample rate (in samples per second).
+    - tile_size: The number of samples evaluated per tile.
+    - dtype: The sample dtype of the result (defaults to the precision policy).
+    - out: An optional array to write the result into.
+
+    Returns:
+    - A numpy array containing the rendered signal.
+    """
+    return RenderGraph(output, sample_rate, tile_size).render(num_samples, dtype, out)
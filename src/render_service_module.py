@@ -0,0 +1,601 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from src.acoustic_analysis_module import (
+    analyze_frequency_spectrum,
+    analyze_frequency_spectrum_batch,
+    detect_formants,
+    generate_synthetic_speech
+)
+from src.formant_tracking_module import summarize_formant_track, track_formants
+
+DEFAULT_PORT = 8765
+LATENCY_WINDOW = 10000
+
+class ServiceError(Exception):
+    """
+    An error reported back to a client of the render service.
+    """
+
+def encode_array(array, encoding='list'):
+    """
+    Encode a numpy array for a JSON message.
+
+    Parameters:
+    - array: The numpy array.
+    - encoding: 'list' for a (nested) JSON list, or 'base64' for {'dtype', 'shape', 'data'} with the
+      raw bytes in base64, which is much smaller and faster for long signals.
+
+    Returns:
+    - A JSON-serializable value.
+    """
+    if encoding == 'base64':
+        array = np.ascontiguousarray(array)
+        return {'dtype': array.dtype.str, 'shape': list(array.shape), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+    if encoding == 'list':
+        return array.tolist()
+    raise ValueError(f"Unknown array encoding: {encoding}")
+
+def decode_array(value):
+    """
+    Decode an array encoded by `encode_array` (either form).
+    """
+    if isinstance(value, np.ndarray):
+        return value
+    if isinstance(value, dict):
+        return np.frombuffer(base64.b64decode(value['data']), dtype=np.dtype(value['dtype'])).reshape(value['shape'])
+    return np.asarray(value, dtype=np.float64)
+
+def _to_json(value, encoding):
+    if isinstance(value, np.ndarray):
+        return encode_array(value, encoding)
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item, encoding) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json(item, encoding) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _from_json(value):
+    if isinstance(value, dict) and set(value) == {'dtype', 'shape', 'data'}:
+        return decode_array(value)
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _from_json(item) for key, item in value.items()}
+    return value
+
+class ServiceMethod:
+    """
+    A function exposed by the render service, with an optional batched implementation.
+
+    Requests whose `batch_key` is equal (and not None) may be merged into one call of `batch`,
+    which receives the parameter dictionaries of every request and returns their results in order.
+    """
+
+    def __init__(self, func, array_params=(), batch_key=None, batch=None):
+        """
+        Parameters:
+        - func: The function, called as func(**params) for a single request.
+        - array_params: The names of parameters decoded into numpy arrays.
+        - batch_key: An optional function of the params returning a hashable key (or None to run
+          the request on its own).
+        - batch: An optional function taking a list of params and returning a list of results.
+        """
+        self.func = func
+        self.array_params = tuple(array_params)
+        self.batch_key = batch_key
+        self.batch = batch
+
+def _spectrum_key(params):
+    return (len(params['sound']), params.get('sample_rate', 44100), str(params.get('dtype')))
+
+def _spectrum_batch(param_list):
+    first = param_list[0]
+    freqs, spectra = analyze_frequency_spectrum_batch(np.stack([params['sound'] for params in param_list]),
+                                                      first.get('sample_rate', 44100), first.get('dtype'))
+    return [(freqs, spectrum) for spectrum in spectra]
+
+def _formants_key(params):
+    if params.get('method', 'lpc') != 'lpc':
+        return None
+    return (len(params['sound']), params.get('sample_rate', 44100), params.get('num_formants', 5))
+
+def _formants_batch(param_list):
+    first = param_list[0]
+    clips = np.stack([params['sound'] for params in param_list])
+    _, frequencies, bandwidths = track_formants(clips, first.get('sample_rate', 44100), first.get('num_formants', 5))
+    return [summarize_formant_track(clip_frequencies, clip_bandwidths) for clip_frequencies, clip_bandwidths in zip(frequencies, bandwidths)]
+
+def _speech_key(params):
+    # Renders share no work across parameter sets, so only identical requests are merged (and
+    # rendered once); different ones run in parallel in the executor.
+    return json.dumps(params, sort_keys=True, default=str)
+
+def _speech_batch(param_list):
+    return [generate_synthetic_speech(**param_list[0])] * len(param_list)
+
+_methods = {
+    'analyze_frequency_spectrum': ServiceMethod(analyze_frequency_spectrum, ('sound',), _spectrum_key, _spectrum_batch),
+    'detect_formants': ServiceMethod(detect_formants, ('sound',), _formants_key, _formants_batch),
+    'generate_synthetic_speech': ServiceMethod(generate_synthetic_speech, (), _speech_key, _speech_batch),
+}
+
+def register_service_method(name, func, array_params=(), batch_key=None, batch=None):
+    """
+    Expose another function through the render service (see `ServiceMethod` for the parameters).
+    """
+    _methods[name] = ServiceMethod(func, array_params, batch_key, batch)
+
+def available_service_methods():
+    """
+    Return the names of the functions the render service exposes.
+    """
+    return sorted(_methods)
+
+def _error(exception):
+    return {'type': type(exception).__name__, 'message': str(exception)}
+
+def _execute(method, param_list, encodings):
+    """
+    Run a group of requests in a worker thread and return one (error, result) pair per request.
+
+    If the batched call fails, the requests are retried one by one, so a single bad request
+    does not fail the others.
+    """
+    if method.batch is not None and len(param_list) > 1:
+        try:
+            results = method.batch(param_list)
+            return [(None, _to_json(result, encoding)) for result, encoding in zip(results, encodings)]
+        except Exception:
+            pass
+    outcomes = []
+    for params, encoding in zip(param_list, encodings):
+        try:
+            outcomes.append((None, _to_json(method.func(**params), encoding)))
+        except Exception as exception:
+            outcomes.append((_error(exception), None))
+    return outcomes
+
+class _Request:
+    __slots__ = ('method', 'params', 'encoding', 'key', 'future', 'enqueued')
+
+    def __init__(self, method, params, encoding, key, future, enqueued):
+        self.method = method
+        self.params = params
+        self.encoding = encoding
+        self.key = key
+        self.future = future
+        self.enqueued = enqueued
+
+class RenderService:
+    """
+    A local asyncio service that answers analysis and synthesis requests sent as JSON lines.
+
+    Each line is {"id": ..., "method": ..., "params": {...}, "encoding": "list" | "base64"} and is
+    answered by {"id": ..., "result": ...} or {"id": ..., "error": {"type", "message"}}, possibly out of
+    order. Requests are queued and merged into micro-batches: the batcher waits at most
+    `max_batch_delay` seconds after the first request of a batch, then groups the requests by
+    method and batch key (equal signal lengths, say) and runs each group in one call in the
+    executor, so concurrent analyses share one batched FFT or LPC solve. Backpressure comes from
+    the bounded queue and the limit on batches in flight: once they are full the service stops
+    reading from the connections, so clients block instead of growing the queue without bound.
+    The method "metrics" returns `metrics()`.
+    """
+
+    def __init__(self, max_batch_size=32, max_batch_delay=0.002, max_queue=1024, max_workers=None, executor=None,
+                 max_line_bytes=64 * 1024 * 1024):
+        """
+        Parameters:
+        - max_batch_size: The maximum number of requests merged into one batch.
+        - max_batch_delay: The latency budget (in seconds) the batcher may wait for more requests.
+        - max_queue: The maximum number of queued requests.
+        - max_workers: The number of executor threads (defaults to the number of CPUs).
+        - executor: An optional concurrent.futures executor to run the work in instead.
+        - max_line_bytes: The maximum length of one request line.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_queue = max_queue
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_line_bytes = max_line_bytes
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._server = None
+        self._batcher = None
+        self._queue = None
+        self._slots = None
+        self._started = None
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Clear the counters and latency samples.
+        """
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queue_waits = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        """
+        Start listening on a localhost TCP port, or on a Unix socket if `path` is given.
+
+        Parameters:
+        - host: The address to bind (keep it on localhost; the service has no authentication).
+        - port: The TCP port (0 picks a free one, see `address`).
+        - path: The path of a Unix socket to listen on instead.
+
+        Returns:
+        - The service.
+        """
+        self._ensure_running()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path, limit=self.max_line_bytes)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port, limit=self.max_line_bytes)
+        return self
+
+    def _ensure_running(self):
+        if self._batcher is not None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='acousynth-service')
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(2 * self.max_workers)
+        self._started = time.monotonic()
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+
+    @property
+    def address(self):
+        """
+        The address the service listens on: (host, port) for TCP, or the socket path.
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        """
+        Serve until the task is cancelled.
+        """
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stop listening, cancel the batcher and shut down the executor if the service created it.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __aenter__(self):
+        self._ensure_running()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def submit(self, method, params=None, encoding='list'):
+        """
+        Queue a request, waiting while the queue is full.
+
+        Parameters:
+        - method: The name of an exposed function (see `available_service_methods`).
+        - params: A dictionary of keyword arguments; arrays may be lists or `encode_array` dictionaries.
+        - encoding: How arrays in the result are encoded (see `encode_array`).
+
+        Returns:
+        - An asyncio future resolving to the JSON-ready result, or raising ServiceError.
+        """
+        self._ensure_running()
+        if method not in _methods:
+            raise ServiceError(f"Unknown method: {method}")
+        if encoding not in ('list', 'base64'):
+            raise ServiceError(f"Unknown array encoding: {encoding}")
+        service_method = _methods[method]
+        params = dict(params or {})
+        for name in service_method.array_params:
+            if name in params:
+                params[name] = decode_array(params[name])
+        try:
+            key = service_method.batch_key(params) if service_method.batch_key is not None else None
+        except (KeyError, TypeError, ValueError) as exception:
+            raise ServiceError(f"Invalid parameters for {method}: {exception}") from exception
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(service_method, params, encoding, None if key is None else (method, key), future, time.perf_counter()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return future
+
+    async def call(self, method, encoding='list', **params):
+        """
+        Queue a request and wait for its result.
+        """
+        return await (await self.submit(method, params, encoding))
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = loop.time() + self.max_batch_delay - (time.perf_counter() - first.enqueued)
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.key if request.key is not None else id(request), []).append(request)
+            for group in groups.values():
+                await self._slots.acquire()
+                asyncio.ensure_future(self._run_group(group))
+
+    async def _run_group(self, group):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.in_flight += 1
+        self.batches += 1
+        self.batched_requests += len(group)
+        try:
+            outcomes = await loop.run_in_executor(self._executor, _execute, group[0].method,
+                                                  [request.params for request in group],
+                                                  [request.encoding for request in group])
+        except Exception as exception:
+            outcomes = [(_error(exception), None)] * len(group)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+        finished = time.perf_counter()
+        for request, (error, result) in zip(group, outcomes):
+            self.requests += 1
+            self.queue_waits.append(started - request.enqueued)
+            self.latencies.append(finished - request.enqueued)
+            if request.future.done():
+                continue
+            if error is not None:
+                self.errors += 1
+                request.future.set_exception(ServiceError(f"{error['type']}: {error['message']}"))
+            else:
+                request.future.set_result(result)
+
+    def metrics(self):
+        """
+        Return the service metrics: queue depth, batches in flight, request and batch counts, the
+        mean batch size, and latency percentiles (in seconds) over the last requests, both end to
+        end and waiting in the queue.
+        """
+        latencies = np.asarray(self.latencies)
+        waits = np.asarray(self.queue_waits)
+
+        def percentiles(samples):
+            if len(samples) == 0:
+                return {'p50': None, 'p90': None, 'p99': None}
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99)}
+
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight_batches': self.in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests / self.batches if self.batches else 0.0,
+            'latency_seconds': percentiles(latencies),
+            'queue_wait_seconds': percentiles(waits),
+            'uptime_seconds': time.monotonic() - self._started if self._started is not None else 0.0,
+        }
+
+    def to_prometheus(self, prefix='acousynth_service'):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        metrics = self.metrics()
+        lines = []
+        for name, kind in (('queue_depth', 'gauge'), ('max_queue_depth', 'gauge'), ('in_flight_batches', 'gauge'),
+                           ('requests', 'counter'), ('errors', 'counter'), ('batches', 'counter'), ('mean_batch_size', 'gauge')):
+            metric = f'{prefix}_{name}_total' if kind == 'counter' else f'{prefix}_{name}'
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.append(f'{metric} {metrics[name]:.17g}')
+        for name in ('latency_seconds', 'queue_wait_seconds'):
+            metric = f'{prefix}_{name}'
+            lines.append(f'# TYPE {metric} summary')
+            for quantile, value in metrics[name].items():
+                if value is not None:
+                    lines.append(f'{metric}{{quantile="0.{quantile[1:]}"}} {value:.17g}')
+        return '\n'.join(lines) + '\n'
+
+    async def _handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        replies = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self._send(writer, lock, {'id': None, 'error': {'type': 'ServiceError', 'message': 'Request line too long'}})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    message = json.loads(line)
+                    request_id = message.get('id')
+                    method = message['method']
+                    if method == 'metrics':
+                        await self._send(writer, lock, {'id': request_id, 'result': self.metrics()})
+                        continue
+                    # Waits while the queue is full, which stops this connection from being read.
+                    future = await self.submit(method, _from_json(message.get('params', {})), message.get('encoding', 'list'))
+                except (ValueError, KeyError, TypeError, AttributeError, ServiceError) as exception:
+                    await self._send(writer, lock, {'id': request_id, 'error': _error(exception)})
+                    continue
+                reply = asyncio.ensure_future(self._reply(writer, lock, request_id, future))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _reply(self, writer, lock, request_id, future):
+        try:
+            response = {'id': request_id, 'result': await future}
+        except ServiceError as exception:
+            response = {'id': request_id, 'error': {'type': 'ServiceError', 'message': str(exception)}}
+        await self._send(writer, lock, response)
+
+    async def _send(self, writer, lock, response):
+        async with lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+class RenderClient:
+    """
+    An asyncio client for the render service that multiplexes concurrent calls over one connection.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._pending = {}
+        self._next_id = 0
+        self._lock = asyncio.Lock()
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT, path=None, max_line_bytes=64 * 1024 * 1024):
+        """
+        Connect to a service on a TCP port, or on a Unix socket if `path` is given.
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=max_line_bytes)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=max_line_bytes)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self._pending.pop(message.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in message:
+                    future.set_exception(ServiceError(message['error']['message']))
+                else:
+                    future.set_result(_from_json(message['result']))
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The render service closed the connection"))
+            self._pending.clear()
+
+    async def call(self, method, encoding='base64', **params):
+        """
+        Call a service method and return its result, with arrays decoded.
+
+        Parameters:
+        - method: The method name.
+        - encoding: The array encoding used in both directions (see `encode_array`).
+        - params: The keyword arguments of the method; numpy arrays are encoded automatically.
+
+        Returns:
+        - The result of the method.
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = {'id': request_id, 'method': method, 'params': _to_json(params, encoding), 'encoding': encoding}
+        async with self._lock:
+            self._writer.write(json.dumps(message).encode() + b'\n')
+            await self._writer.drain()
+        return await future
+
+    async def close(self):
+        """
+        Close the connection.
+        """
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
+
+def main(argv=None):
+    """
+    Run the render service from the command line until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve AcouSynth analysis and synthesis over JSON lines.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-batch-delay', type=float, default=0.002, help="Batching latency budget (in seconds).")
+    parser.add_argument('--max-queue', type=int, default=1024)
+    parser.add_argument('--workers', type=int, default=None)
+    options = parser.parse_args(argv)
+
+    async def serve():
+        service = RenderService(options.max_batch_size, options.max_batch_delay, options.max_queue, options.workers)
+        await service.start(options.host, options.port, options.unix)
+        print(f"Serving on {service.address}", flush=True)
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+import numpy as np
+from src.instrumentation_module import instrumented
+
+@lru_cache(maxsize=4096)
+def resonator_sos(freq, bandwidth, sample_rate=44100, kind='bandpass'):
+    """
+    Return the second-order section of a two-pole resonator, cached per (freq, bandwidth, sample_rate, kind).
+
+    The poles sit at radius exp(-pi * bandwidth / sample_rate) and angle 2 * pi * freq / sample_rate.
+
+    Parameters:
+    - freq: The resonance frequency (in Hz).
+    - bandwidth: The -3 dB bandwidth of the resonance (in Hz).
+    - sample_rate: The sample rate (in samples per second).
+    - kind: 'bandpass' for zeros at DC and Nyquist with unit gain at the resonance (for parallel
+      banks), or 'allpole' for unit gain at DC (for cascades, as in a Klatt synthesizer).
+
+    Returns:
+    - A read-only (1, 6) numpy array [b0, b1, b2, 1, a1, a2] for scipy.signal.sosfilt.
+    """
+    radius = np.exp(-np.pi * bandwidth / sample_rate)
+    theta = 2 * np.pi * freq / sample_rate
+    a1 = -2 * radius * np.cos(theta)
+    a2 = radius * radius
+    if kind == 'bandpass':
+        gain = (1 - a2) / 2
+        sos = np.array([[gain, 0.0, -gain, 1.0, a1, a2]])
+    elif kind == 'allpole':
+        sos = np.array([[1 + a1 + a2, 0.0, 0.0, 1.0, a1, a2]])
+    else:
+        raise ValueError(f"Unknown resonator kind: {kind}")
+    sos.flags.writeable = False
+    return sos
+
+def _resonator_sections(formant_freqs, bandwidths, sample_rate, kind):
+    count = min(len(formant_freqs), len(bandwidths))
+    if count == 0:
+        return np.zeros((0, 6))
+    return np.concatenate([resonator_sos(float(freq), float(bandwidth), sample_rate, kind)
+                           for freq, bandwidth in zip(formant_freqs[:count], bandwidths[:count])])
+
+class ResonatorBank:
+    """
+    Many independent resonator channels filtered block by block with carried-over state.
+
+    Channels that share coefficients (the same formant on many voices, say) are filtered together
+    in one batched `sosfilt` call. Channels with distinct resonances still cost one call each, so
+    the batching only pays off when many channels repeat a few resonances. Filter state is kept
+    per channel between calls to `process`, so a signal fed in blocks gives the same output as in
+    one call.
+    """
+
+    def __init__(self, formant_freqs, bandwidths, sample_rate=44100, kind='bandpass'):
+        """
+        Parameters:
+        - formant_freqs: A list of resonance frequencies, one per channel.
+        - bandwidths: A list of bandwidths, one per channel.
+        - sample_rate: The sample rate (in samples per second).
+        - kind: 'bandpass' or 'allpole' (see `resonator_sos`).
+        """
+        self.sample_rate = sample_rate
+        self.sos = _resonator_sections(formant_freqs, bandwidths, sample_rate, kind)
+        self.num_channels = len(self.sos)
+        self.zi = np.zeros((self.num_channels, 2))
+        unique, inverse = np.unique(self.sos, axis=0, return_inverse=True)
+        inverse = np.asarray(inverse).reshape(-1)
+        self._groups = [(unique[group:group + 1], np.flatnonzero(inverse == group)) for group in range(len(unique))]
+
+    def reset(self):
+        """
+        Clear the filter state of every channel.
+        """
+        self.zi.fill(0)
+
+    @instrumented()
+    def process(self, block):
+        """
+        Filter the next block.
+
+        Parameters:
+        - block: A 1-D numpy array fed to every channel, or a (channels, samples) array with one
+          input per channel.
+
+        Returns:
+        - A (channels, samples) numpy array with the output of each channel.
+        """
+        from scipy.signal import sosfilt
+        block = np.asarray(block, dtype=np.float64)
+        output = np.empty((self.num_channels, block.shape[-1]))
+        for sos, channels in self._groups:
+            if block.ndim == 1:
+                inputs = np.broadcast_to(block, (len(channels), len(block)))
+            else:
+                inputs = block[channels]
+            output[channels], zf = sosfilt(sos, inputs, axis=-1, zi=self.zi[channels][None])
+            self.zi[channels] = zf[0]
+        return output
+
+    def process_mix(self, block, gains=None):
+        """
+        Filter the next block through every channel and sum the outputs (a parallel formant filter).
+
+        Parameters:
+        - block: A 1-D numpy array containing the next samples of the input.
+        - gains: Optional per-channel gains (defaults to 1).
+
+        Returns:
+        - A 1-D numpy array containing the mixed output.
+        """
+        output = self.process(block)
+        if gains is None:
+            return output.sum(axis=0)
+        return np.asarray(gains, dtype=np.float64) @ output
+
+class FormantCascade:
+    """
+    Resonators in series, filtered with one `sosfilt` call per block and state carried between blocks.
+    """
+
+    def __init__(self, formant_freqs, bandwidths, sample_rate=44100, kind='allpole'):
+        """
+        Parameters:
+        - formant_freqs: A list of formant frequencies.
+        - bandwidths: A list of bandwidths for each formant frequency.
+        - sample_rate: The sample rate (in samples per second).
+        - kind: 'allpole' or 'bandpass' (see `resonator_sos`).
+        """
+        self.sample_rate = sample_rate
+        self.sos = _resonator_sections(formant_freqs, bandwidths, sample_rate, kind)
+        self.zi = np.zeros((len(self.sos), 2))
+
+    def reset(self):
+        """
+        Clear the filter state.
+        """
+        self.zi.fill(0)
+
+    @instrumented()
+    def process(self, block):
+        """
+        Filter the next block.
+
+        Parameters:
+        - block: A 1-D numpy array containing the next samples of the input.
+
+        Returns:
+        - A 1-D numpy array containing the filtered block.
+        """
+        from scipy.signal import sosfilt
+        block = np.asarray(block, dtype=np.float64)
+        if len(self.sos) == 0:
+            return block.copy()
+        output, self.zi = sosfilt(self.sos, block, zi=self.zi)
+        return output
+
+def filter_formants(signal, formant_freqs, bandwidths, sample_rate=44100, topology='parallel'):
+    """
+    Filter a signal through formant resonators.
+
+    Parameters:
+    - signal: A 1-D numpy array containing the signal.
+    - formant_freqs: A list of formant frequencies.
+    - bandwidths: A list of bandwidths for each formant frequency.
+    - sample_rate: The sample rate (in samples per second).
+    - topology: 'parallel' to sum unit-peak band-pass resonators, or 'cascade' to chain
+      unit-DC-gain all-pole resonators.
+
+    Returns:
+    - A numpy array containing the filtered signal.
+    """
+    if topology == 'parallel':
+        return ResonatorBank(formant_freqs, bandwidths, sample_rate).process_mix(signal)
+    if topology == 'cascade':
+        return FormantCascade(formant_freqs, bandwidths, sample_rate).process(signal)
+    raise ValueError(f"Unknown resonator topology: {topology}")
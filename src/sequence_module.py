@@ -0,0 +1,116 @@
+from bisect import bisect_right
+
+import numpy as np
+from src.precision_module import OutputShapeError
+
+class SegmentSequence:
+    """
+    Sounds laid end to end, optionally crossfaded, without copying them until asked to.
+
+    The layout is computed once from the segment lengths: every output sample belongs either to
+    one segment (a plain copy) or to the overlap of two neighbouring segments (a crossfade).
+    `to_array` writes each region straight into a single preallocated output, and `iter_blocks`
+    assembles the output one block at a time for callers that stream it.
+    """
+
+    def __init__(self, segments, crossfade_samples=0):
+        """
+        Parameters:
+        - segments: A list of 1-D numpy arrays, in playback order.
+        - crossfade_samples: The number of samples by which consecutive segments overlap.
+        """
+        self.segments = [np.asarray(segment) for segment in segments]
+        self.crossfade_samples = int(crossfade_samples)
+        if self.crossfade_samples < 0:
+            raise ValueError("crossfade_samples must not be negative")
+        if len(self.segments) > 1 and min(len(segment) for segment in self.segments) < 2 * self.crossfade_samples:
+            raise ValueError("Every segment must be at least twice as long as the crossfade")
+        self.dtype = np.result_type(*self.segments) if self.segments else np.dtype(np.float64)
+        fade = self.crossfade_samples
+        self._fade_in = np.arange(1, fade + 1, dtype=np.float64) / (fade + 1)
+        self._fade_out = self._fade_in[::-1]
+
+        self.segment_index = []
+        self._regions = []
+        start = 0
+        for position, segment in enumerate(self.segments):
+            stop = start + len(segment)
+            self.segment_index.append((start, stop, segment))
+            head = fade if position > 0 else 0
+            tail = fade if position < len(self.segments) - 1 else 0
+            if head:
+                previous = self.segments[position - 1]
+                self._regions.append((start, start + head, previous[len(previous) - head:], segment[:head]))
+            if len(segment) - head - tail > 0:
+                self._regions.append((start + head, stop - tail, segment[head:len(segment) - tail], None))
+            start = stop - tail
+        self.length = start
+        self._region_starts = [region[0] for region in self._regions]
+
+    def __len__(self):
+        return self.length
+
+    def _write_region(self, region, out, lo, hi, offset):
+        start, _, first, second = region
+        target = out[lo - offset:hi - offset]
+        if second is None:
+            target[...] = first[lo - start:hi - start]
+        else:
+            np.multiply(first[lo - start:hi - start], self._fade_out[lo - start:hi - start], out=target, casting='unsafe')
+            target += second[lo - start:hi - start] * self._fade_in[lo - start:hi - start]
+
+    def to_array(self, out=None):
+        """
+        Assemble the whole sequence.
+
+        Parameters:
+        - out: An optional preallocated array of length len(self) to write into.
+
+        Returns:
+        - A numpy array containing the assembled sound.
+        """
+        if out is None:
+            out = np.empty(self.length, dtype=self.dtype)
+        elif len(out) != self.length:
+            raise OutputShapeError(out.shape, (self.length,))
+        for region in self._regions:
+            self._write_region(region, out, region[0], region[1], 0)
+        return out
+
+    def iter_blocks(self, block_size):
+        """
+        Yield the assembled sequence in consecutive blocks.
+
+        Blocks that lie entirely inside one segment are yielded as views of that segment; other
+        blocks are assembled into a fresh array.
+
+        Parameters:
+        - block_size: The number of samples per block (the last block may be shorter).
+        """
+        for block_start in range(0, self.length, block_size):
+            block_stop = min(block_start + block_size, self.length)
+            first = bisect_right(self._region_starts, block_start) - 1
+            region = self._regions[first]
+            if region[3] is None and block_stop <= region[1]:
+                yield region[2][block_start - region[0]:block_stop - region[0]]
+                continue
+            block = np.empty(block_stop - block_start, dtype=self.dtype)
+            for region in self._regions[first:]:
+                if region[0] >= block_stop:
+                    break
+                self._write_region(region, block, max(region[0], block_start), min(region[1], block_stop), block_start)
+            yield block
+
+def assemble_segments(segments, crossfade_samples=0, out=None):
+    """
+    Lay sounds end to end in a single preallocated array.
+
+    Parameters:
+    - segments: A list of 1-D numpy arrays, in playback order.
+    - crossfade_samples: The number of samples by which consecutive segments overlap.
+    - out: An optional preallocated array to write into.
+
+    Returns:
+    - A numpy array containing the assembled sound.
+    """
+    return SegmentSequence(segments, crossfade_samples).to_array(out)
@@ -0,0 +1,104 @@
+import numpy as np
+from src.fft_backend_module import get_fft_backend
+
+class StreamingSTFT:
+    """
+    Stateful short-time Fourier transform for audio that arrives in chunks.
+
+    The most recent `nperseg` samples are kept in a fixed-size ring buffer, so memory use
+    does not grow with the length of the stream. Frames use the same window, detrending
+    and PSD scaling as `scipy.signal.spectrogram`, so feeding a whole signal in any chunking
+    yields the same frames as the offline call.
+    """
+
+    def __init__(self, sample_rate=44100, nperseg=256, noverlap=None, window=('tukey', 0.25), callback=None):
+        """
+        Create a streaming STFT.
+
+        Parameters:
+        - sample_rate: The sample rate of the stream (in samples per second).
+        - nperseg: The length of each frame (in samples).
+        - noverlap: The number of samples shared by consecutive frames (defaults to nperseg // 8).
+        - window: The window specification passed to `scipy.signal.get_window`.
+        - callback: An optional function called as callback(time, frame) for every emitted frame.
+        """
+        if noverlap is None:
+            noverlap = nperseg // 8
+        if not 0 <= noverlap < nperseg:
+            raise ValueError("noverlap must be in [0, nperseg)")
+        self.sample_rate = sample_rate
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.step = nperseg - noverlap
+        self.callback = callback
+        from scipy.signal import get_window
+        self.window = get_window(window, nperseg)
+        self.frequencies = np.fft.rfftfreq(nperseg, 1 / sample_rate)
+        self._scale = np.full(len(self.frequencies), 2.0 / (sample_rate * np.sum(self.window ** 2)))
+        self._scale[0] /= 2
+        if nperseg % 2 == 0:
+            self._scale[-1] /= 2
+        self._ring = np.zeros(nperseg)
+        self._frame = np.empty(nperseg)
+        self._order = np.arange(nperseg)
+        self.reset()
+
+    def reset(self):
+        """
+        Discard any buffered samples and restart the stream at time zero.
+        """
+        self._ring.fill(0)
+        self._samples_written = 0
+        self._next_frame_start = 0
+
+    def _write(self, samples):
+        position = self._samples_written % self.nperseg
+        head = min(len(samples), self.nperseg - position)
+        self._ring[position:position + head] = samples[:head]
+        self._ring[:len(samples) - head] = samples[head:]
+        self._samples_written += len(samples)
+
+    def process(self, chunk):
+        """
+        Feed a chunk of audio and yield every frame it completes.
+
+        Parameters:
+        - chunk: A 1-D numpy array containing the next samples of the stream (any length).
+
+        Yields:
+        - Tuples of (time, frame), where time is the centre of the frame (in seconds) and frame
+          contains the power spectral density of each frequency in `frequencies`.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        backend = get_fft_backend()
+        position = 0
+        while position < len(chunk):
+            frame_end = self._next_frame_start + self.nperseg
+            take = min(len(chunk) - position, frame_end - self._samples_written)
+            self._write(chunk[position:position + take])
+            position += take
+            if self._samples_written < frame_end:
+                continue
+            offset = self._next_frame_start % self.nperseg
+            np.take(self._ring, self._order + offset, mode='wrap', out=self._frame)
+            self._frame -= self._frame.mean()
+            self._frame *= self.window
+            spectrum = backend.rfft(self._frame)
+            frame = (spectrum.real ** 2 + spectrum.imag ** 2) * self._scale
+            time = (self._next_frame_start + self.nperseg / 2) / self.sample_rate
+            self._next_frame_start += self.step
+            if self.callback is not None:
+                self.callback(time, frame)
+            yield time, frame
+
+    def push(self, chunk):
+        """
+        Feed a chunk of audio, delivering completed frames to the callback.
+
+        Parameters:
+        - chunk: A 1-D numpy array containing the next samples of the stream.
+
+        Returns:
+        - The number of frames emitted.
+        """
+        return sum(1 for _ in self.process(chunk))
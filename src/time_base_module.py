@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+class TimeBaseCache:
+    """
+    Bounded cache of read-only time axes and phase tables keyed by (length, sample_rate).
+
+    Entries are evicted least-recently-used once their total size exceeds `max_bytes`.
+    Arrays larger than `max_bytes` on their own are returned without being cached.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Create a time-base cache.
+
+        Parameters:
+        - max_bytes: The maximum total size (in bytes) of the cached arrays.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, kind, num_samples, sample_rate, build):
+        key = (kind, int(num_samples), float(sample_rate))
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                return array
+        array = build()
+        array.setflags(write=False)
+        if array.nbytes > self.max_bytes:
+            return array
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = array
+                self._bytes += array.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+            return self._entries.get(key, array)
+
+    def time_base(self, num_samples, sample_rate=44100):
+        """
+        Return the read-only time axis n / sample_rate for n in [0, num_samples) (in seconds).
+        """
+        return self._get('time', num_samples, sample_rate, lambda: np.arange(int(num_samples)) / sample_rate)
+
+    def phase_table(self, num_samples, sample_rate=44100):
+        """
+        Return the read-only phase table 2 * pi * n / sample_rate, so that np.sin(freq * table) is a
+        sinusoid of frequency `freq`.
+        """
+        return self._get('phase', num_samples, sample_rate, lambda: (2 * np.pi / sample_rate) * np.arange(int(num_samples)))
+
+    def clear(self):
+        """
+        Drop every cached array.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cache_info(self):
+        """
+        Return a dictionary describing the cache (number of entries, bytes held and capacity).
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+_default_cache = TimeBaseCache()
+
+def get_time_base(num_samples, sample_rate=44100):
+    """
+    Return a shared read-only time axis (in seconds) of `num_samples` samples.
+
+    Parameters:
+    - num_samples: The number of samples.
+    - sample_rate: The sample rate (in samples per second).
+
+    Returns:
+    - A read-only numpy array of sample times.
+    """
+    return _default_cache.time_base(num_samples, sample_rate)
+
+def get_phase_table(num_samples, sample_rate=44100):
+    """
+    Return a shared read-only table of 2 * pi * t for `num_samples` samples.
+
+    Parameters:
+    - num_samples: The number of samples.
+    - sample_rate: The sample rate (in samples per second).
+
+    Returns:
+    - A read-only numpy array; np.sin(freq * table) is a sinusoid of frequency `freq`.
+    """
+    return _default_cache.phase_table(num_samples, sample_rate)
+
+def get_time_base_cache():
+    """
+    Return the process-wide TimeBaseCache used by every generator and effect.
+    """
+    return _default_cache
@@ -0,0 +1,296 @@
+import numpy as np
+from src.instrumentation_module import instrumented
+from src.precision_module import blocks, prepare_output
+from src.time_base_module import get_phase_table
+
+DEFAULT_TABLE_SIZE = 2048
+# Samples looked up per pass; the positions, indices and neighbours of a block stay in cache.
+WAVETABLE_BLOCK_SIZE = 16384
+INTERPOLATIONS = ('linear', 'cubic')
+
+class Wavetable:
+    """
+    Band-limited single-cycle waveform rendered by interpolated table lookup.
+
+    The waveform is described by its harmonic amplitudes. One table is built per octave of
+    harmonic count (all harmonics, half of them, a quarter, ... down to the fundamental) and
+    rendering picks the richest table whose highest harmonic stays below Nyquist, so bright
+    waveforms can be played at any pitch without aliasing.
+    """
+
+    def __init__(self, harmonic_amplitudes=(1.0,), table_size=DEFAULT_TABLE_SIZE):
+        """
+        Create a wavetable.
+
+        Parameters:
+        - harmonic_amplitudes: A list of sine amplitudes for harmonics 1, 2, 3, ...
+        - table_size: The number of samples in one cycle of each table.
+        """
+        harmonic_amplitudes = np.asarray(harmonic_amplitudes, dtype=np.float64)
+        if len(harmonic_amplitudes) == 0:
+            raise ValueError("A wavetable needs at least one harmonic")
+        if len(harmonic_amplitudes) >= table_size // 2:
+            raise ValueError("table_size must be more than twice the number of harmonics")
+        self.harmonic_amplitudes = harmonic_amplitudes
+        self.table_size = table_size
+        self.harmonic_limits = []
+        self._tables = []
+        limit = len(harmonic_amplitudes)
+        while True:
+            spectrum = np.zeros(table_size // 2 + 1, dtype=np.complex128)
+            spectrum[1:limit + 1] = -0.5j * table_size * harmonic_amplitudes[:limit]
+            table = np.fft.irfft(spectrum, table_size)
+            # One guard sample before and two after the cycle let both interpolators index without wrapping.
+            self._tables.append(np.concatenate((table[-1:], table, table[:2])))
+            self.harmonic_limits.append(limit)
+            if limit == 1:
+                break
+            limit //= 2
+
+    @classmethod
+    def sawtooth(cls, num_harmonics=64, table_size=DEFAULT_TABLE_SIZE):
+        """
+        Create a band-limited sawtooth wavetable.
+        """
+        harmonics = np.arange(1, num_harmonics + 1)
+        return cls((2 / np.pi) * (-1.0) ** (harmonics + 1) / harmonics, table_size)
+
+    @classmethod
+    def square(cls, num_harmonics=64, table_size=DEFAULT_TABLE_SIZE):
+        """
+        Create a band-limited square wavetable.
+        """
+        harmonics = np.arange(1, num_harmonics + 1)
+        return cls(np.where(harmonics % 2 == 1, 4 / (np.pi * harmonics), 0.0), table_size)
+
+    def _table_for(self, freq, sample_rate):
+        max_harmonic = (sample_rate / 2) / max(abs(freq), 1e-12)
+        for limit, table in zip(self.harmonic_limits, self._tables):
+            if limit <= max_harmonic:
+                return table
+        return self._tables[-1]
+
+    def render(self, freq, num_samples, sample_rate=44100, phase=0.0, interpolation='linear', out=None):
+        """
+        Render the waveform at a constant frequency.
+
+        The lookup runs WAVETABLE_BLOCK_SIZE samples at a time with reused buffers, so it costs a
+        few passes over cache-resident blocks per sample and no signal-length temporaries.
+
+        Parameters:
+        - freq: The frequency of the waveform (in Hz).
+        - num_samples: The number of samples to render.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        - phase: The starting phase (in cycles, 0 to 1).
+        - interpolation: 'linear' or 'cubic'.
+        - out: An optional array of length num_samples to write into.
+
+        Returns:
+        - A tuple containing the rendered samples and the phase (in cycles) after the last sample.
+        """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        result = prepare_output(out, num_samples, np.float64)
+        table = self._table_for(freq, sample_rate)
+        increment = freq / sample_rate
+        block_size = max(min(num_samples, WAVETABLE_BLOCK_SIZE), 1)
+        buffers = self._buffers(block_size, interpolation)
+        # Table positions of a block relative to its first sample, whose phase is reduced to one
+        # cycle; a falling phase starts enough whole cycles up that no position is negative.
+        ramp = np.arange(block_size, dtype=np.float64)
+        ramp *= increment * self.table_size
+        lift = self.table_size * np.ceil(-ramp[-1] / self.table_size) if increment < 0 else 0.0
+        positions = np.empty(block_size)
+        samples = result if result.dtype == np.float64 else np.empty(block_size)
+        for start in range(0, num_samples, block_size):
+            stop = min(start + block_size, num_samples)
+            offset = ((phase + start * increment) % 1.0) * self.table_size + lift
+            block = np.add(ramp[:stop - start], offset, out=positions[:stop - start])
+            target = samples[start:stop] if samples is result else samples[:stop - start]
+            self._lookup_block(table, block, interpolation, target, buffers)
+            if samples is not result:
+                result[start:stop] = target
+        next_phase = (phase + num_samples * increment) % 1.0
+        return result, next_phase
+
+    def render_phases(self, freqs, cycles, sample_rate=44100, interpolation='linear'):
+        """
+        Look up many waveforms at once, one row per frequency, each from its own band-limited table.
+
+        Parameters:
+        - freqs: A 1-D array with the frequency of each row (in Hz), which selects its table.
+        - cycles: A (rows, samples) array of phases (in cycles); it may be overwritten.
+        - sample_rate: The sample rate of the sound (in samples per second).
+        - interpolation: 'linear' or 'cubic'.
+
+        Returns:
+        - A (rows, samples) numpy array.
+        """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        freqs = np.asarray(freqs, dtype=np.float64)
+        output = np.empty(cycles.shape)
+        max_harmonics = (sample_rate / 2) / np.maximum(np.abs(freqs), 1e-12)
+        # The richest table whose harmonic limit stays below Nyquist, as in `_table_for`.
+        limits = np.asarray(self.harmonic_limits)
+        choice = np.argmax(limits[None, :] <= max_harmonics[:, None], axis=1)
+        choice[~(limits[None, :] <= max_harmonics[:, None]).any(axis=1)] = len(limits) - 1
+        buffers = self._buffers(WAVETABLE_BLOCK_SIZE, interpolation)
+        for index in np.unique(choice):
+            # The rows sharing a table are looked up together, a block of their samples at a time.
+            rows = np.flatnonzero(choice == index)
+            positions = cycles[rows].reshape(-1)
+            np.mod(positions, 1.0, out=positions)
+            positions *= self.table_size
+            samples = np.empty(len(positions))
+            for start in range(0, len(positions), WAVETABLE_BLOCK_SIZE):
+                stop = min(start + WAVETABLE_BLOCK_SIZE, len(positions))
+                self._lookup_block(self._tables[index], positions[start:stop], interpolation, samples[start:stop], buffers)
+            output[rows] = samples.reshape(len(rows), -1)
+        return output
+
+    def _buffers(self, block_size, interpolation):
+        # An index buffer and the scratch blocks of one interpolation pass.
+        return np.empty(block_size, dtype=np.int64), [np.empty(block_size) for _ in range(1 if interpolation == 'linear' else 5)]
+
+    def _lookup_block(self, table, positions, interpolation, out, buffers):
+        """
+        Interpolate `table` at `positions` (in table samples, non-negative; overwritten with their
+        fractional parts) into the float64 block `out`.
+        """
+        length = len(positions)
+        index = buffers[0][:length]
+        scratch = [buffer[:length] for buffer in buffers[1]]
+        # Floor in floating point: subtracting float64 is cheaper than subtracting the int64 index.
+        whole = np.floor(positions, out=scratch[0])
+        np.copyto(index, whole, casting='unsafe')
+        frac = np.subtract(positions, whole, out=positions)
+        if self.table_size & (self.table_size - 1) == 0:
+            np.bitwise_and(index, self.table_size - 1, out=index)
+        else:
+            np.remainder(index, self.table_size, out=index)
+        # Views shifted past the leading guard sample, so `index` needs no offset.
+        if interpolation == 'linear':
+            y0 = np.take(table[1:], index, out=scratch[0], mode='clip')
+            np.take(table[2:], index, out=out, mode='clip')
+            out -= y0
+            out *= frac
+            out += y0
+            return out
+        ym1, y0, y1, y2 = (np.take(table[shift:], index, out=buffer, mode='clip') for shift, buffer in zip(range(4), scratch))
+        temp = scratch[4]
+        # Catmull-Rom spline through the four neighbouring samples, ((c3 * frac + c2) * frac + c1) * frac + y0.
+        np.subtract(y2, ym1, out=temp)
+        temp *= 0.5
+        np.subtract(y0, y1, out=out)
+        out *= 1.5
+        out += temp
+        out *= frac
+        # c2 = ym1 - 2.5 * y0 + 2 * y1 - 0.5 * y2
+        y2 *= 0.5
+        np.multiply(y1, 2.0, out=temp)
+        temp += ym1
+        temp -= y2
+        np.multiply(y0, 2.5, out=y2)
+        temp -= y2
+        out += temp
+        out *= frac
+        # c1 = 0.5 * (y1 - ym1)
+        np.subtract(y1, ym1, out=temp)
+        temp *= 0.5
+        out += temp
+        out *= frac
+        out += y0
+        return out
+
+class WavetableOscillator:
+    """
+    Wavetable oscillator with a running phase, for rendering one block after another.
+    """
+
+    def __init__(self, wavetable, freq, sample_rate=44100, phase=0.0, interpolation='linear'):
+        """
+        Parameters:
+        - wavetable: The Wavetable to play.
+        - freq: The frequency of the oscillator (in Hz).
+        - sample_rate: The sample rate of the sound (in samples per second).
+        - phase: The starting phase (in cycles, 0 to 1).
+        - interpolation: 'linear' or 'cubic'.
+        """
+        self.wavetable = wavetable
+        self.freq = freq
+        self.sample_rate = sample_rate
+        self.phase = phase
+        self.interpolation = interpolation
+
+    def render(self, num_samples):
+        """
+        Render the next `num_samples` samples, continuing from the previous block.
+        """
+        block, self.phase = self.wavetable.render(self.freq, num_samples, self.sample_rate, self.phase, self.interpolation)
+        return block
+
+_sine_table = None
+
+def get_sine_table():
+    """
+    Return the shared sine Wavetable used by `oscillator='wavetable'`.
+    """
+    global _sine_table
+    if _sine_table is None:
+        _sine_table = Wavetable((1.0,))
+    return _sine_table
+
+_sawtooth_table = None
+
+def get_sawtooth_table():
+    """
+    Return the shared band-limited sawtooth Wavetable used as the source of resonator formant synthesis.
+    """
+    global _sawtooth_table
+    if _sawtooth_table is None:
+        _sawtooth_table = Wavetable.sawtooth(num_harmonics=512)
+    return _sawtooth_table
+
+@instrumented()
+def render_oscillator(freq, num_samples, sample_rate=44100, oscillator='sine', interpolation='linear', dtype=None, out=None):
+    """
+    Render sin(2 * pi * freq * t) (or another waveform) with the selected oscillator.
+
+    Parameters:
+    - freq: The frequency of the oscillator (in Hz).
+    - num_samples: The number of samples to render.
+    - sample_rate: The sample rate of the sound (in samples per second).
+    - oscillator: 'sine' to evaluate np.sin, 'wavetable' for interpolated lookup in a sine table, or
+      a Wavetable instance to play its waveform.
+    - interpolation: 'linear' or 'cubic' table lookup; ignored by the 'sine' oscillator.
+    - dtype: The sample dtype (defaults to the precision policy).
+    - out: An optional array of length num_samples to write into.
+
+    Returns:
+    - A numpy array containing the rendered oscillator.
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation: {interpolation}")
+    result = prepare_output(out, num_samples, dtype)
+    if isinstance(oscillator, Wavetable):
+        oscillator.render(freq, num_samples, sample_rate, interpolation=interpolation, out=result)
+    elif oscillator == 'wavetable':
+        get_sine_table().render(freq, num_samples, sample_rate, interpolation=interpolation, out=result)
+    elif oscillator == 'sine':
+        phase = get_phase_table(num_samples, sample_rate)
+        if result.dtype == np.float64:
+            np.multiply(phase, freq, out=result)
+            np.sin(result, out=result)
+        else:
+            # Reduce the (possibly large) phase in double precision before narrowing.
+            scratch = np.empty(min(num_samples, 16384))
+            for start, stop in blocks(num_samples, len(scratch)):
+                block = np.multiply(phase[start:stop], freq, out=scratch[:stop - start])
+                np.sin(block, out=block)
+                result[start:stop] = block
+    else:
+        raise ValueError(f"Unknown oscillator: {oscillator}")
+    return result
+
+render_oscillator.output_length = lambda num_samples, **params: int(num_samples)
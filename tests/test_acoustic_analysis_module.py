@@ -1,6 +1,18 @@
 import unittest
+from unittest import mock
 import numpy as np
+from scipy.signal import lfilter
+from src.fft_backend_module import get_fft_backend
+from src.formant_tracking_module import autocorrelate_frames, levinson_durbin, track_formants
+from src.pitch_tracking_module import median_pitch, track_pitch
 from src.acoustic_analysis_module import (
+    SpectrumAnalysis,
+    analyze_frequency_spectrum,
+    detect_formants,
+    calculate_harmonic_ratios,
+    analyze_frequency_spectrum_batch,
+    detect_formants_batch,
+    calculate_harmonic_ratios_batch,
     filter_noise_for_formants,
     manipulate_spectral_envelope,
     apply_subharmonics,
@@ -18,6 +30,142 @@ class TestAcousticAnalysisModule(unittest.TestCase):
         self.sound = np.sin(2 * np.pi * 440 * self.t)
         self.noise = np.random.normal(0, 1, int(self.sample_rate * self.duration))
 
+    def test_analyze_frequency_spectrum(self):
+        freqs, spectrum = analyze_frequency_spectrum(self.sound, self.sample_rate)
+        self.assertEqual(len(freqs), len(self.sound) // 2)
+        self.assertEqual(len(spectrum), len(self.sound) // 2)
+        self.assertAlmostEqual(freqs[np.argmax(spectrum)], 440)
+
+    def _vowel(self, formants):
+        sound = np.zeros(len(self.t))
+        sound[::self.sample_rate // 120] = 1
+        for freq, bandwidth in formants:
+            radius = np.exp(-np.pi * bandwidth / self.sample_rate)
+            theta = 2 * np.pi * freq / self.sample_rate
+            sound = lfilter([1 - radius], [1, -2 * radius * np.cos(theta), radius ** 2], sound)
+        return sound
+
+    def test_detect_formants(self):
+        formants = detect_formants(self._vowel([(700, 80), (1200, 90), (2600, 120)]), self.sample_rate, num_formants=3)
+        self.assertEqual(len(formants), 3)
+        for (freq, bandwidth), expected in zip(formants, (700, 1200, 2600)):
+            self.assertAlmostEqual(freq, expected, delta=0.05 * expected)
+            self.assertTrue(0 < bandwidth < 400)
+
+    def test_detect_formants_peaks(self):
+        formants = detect_formants(self.sound, self.sample_rate, method='peaks')
+        self.assertEqual(len(formants), 1)
+        self.assertAlmostEqual(formants[0][0], 440)
+        self.assertTrue(0 < formants[0][1] < 5)
+        with self.assertRaises(ValueError):
+            detect_formants(self.sound, self.sample_rate, method='cepstrum')
+
+    def test_track_formants(self):
+        times, frequencies, bandwidths = track_formants(self._vowel([(500, 60), (1500, 100)]), self.sample_rate, num_formants=3)
+        self.assertEqual(frequencies.shape, (len(times), 3))
+        self.assertEqual(bandwidths.shape, frequencies.shape)
+        self.assertTrue(np.all(np.diff(times) > 0))
+        voiced = frequencies[2:-2]
+        np.testing.assert_allclose(np.nanmedian(voiced[:, :2], axis=0), [500, 1500], rtol=0.05)
+
+    def test_track_formants_silence(self):
+        times, frequencies, bandwidths = track_formants(np.zeros(self.sample_rate // 10), self.sample_rate)
+        self.assertTrue(len(times) > 0)
+        self.assertTrue(np.all(np.isnan(frequencies)))
+        self.assertTrue(np.all(np.isnan(bandwidths)))
+
+    def test_levinson_durbin_matches_solve(self):
+        frames = np.random.RandomState(0).randn(4, 400)
+        r = autocorrelate_frames(frames, 8)
+        a, _ = levinson_durbin(r, 8)
+        for row, coefficients in zip(r, a):
+            toeplitz = row[np.abs(np.subtract.outer(np.arange(8), np.arange(8)))]
+            np.testing.assert_allclose(coefficients[1:], np.linalg.solve(toeplitz, -row[1:]), atol=1e-9)
+
+    def test_calculate_harmonic_ratios(self):
+        sound = self.sound + 0.5 * np.sin(2 * np.pi * 880 * self.t) + 0.25 * np.sin(2 * np.pi * 1320 * self.t)
+        harmonic_ratios = calculate_harmonic_ratios(sound, self.sample_rate)
+        np.testing.assert_allclose(harmonic_ratios, [1, 2, 3], rtol=1e-3)
+        self.assertEqual(len(calculate_harmonic_ratios(self.sound, self.sample_rate)), 1)
+
+    def test_calculate_harmonic_ratios_tolerance(self):
+        # A slightly inharmonic partial is only accepted with a wide enough band.
+        sound = self.sound + 0.1 * np.sin(2 * np.pi * 960 * self.t)
+        self.assertEqual(len(calculate_harmonic_ratios(sound, self.sample_rate)), 1)
+        self.assertEqual(len(calculate_harmonic_ratios(sound, self.sample_rate, tolerance=0.1)), 2)
+
+    def test_calculate_harmonic_ratios_noise(self):
+        self.assertEqual(calculate_harmonic_ratios(self.noise, self.sample_rate), [])
+
+    def test_track_pitch(self):
+        times, pitch, periodicity = track_pitch(self._clips()[1], self.sample_rate)
+        self.assertEqual(len(pitch), len(times))
+        np.testing.assert_allclose(pitch, 220, rtol=1e-3)
+        self.assertTrue(np.all(periodicity > 0.9))
+        _, pitch, _ = track_pitch(self.noise, self.sample_rate)
+        self.assertTrue(np.mean(np.isnan(pitch)) > 0.9)
+
+    def test_track_pitch_batch(self):
+        clips = self._clips()
+        times, pitch, periodicity = track_pitch(clips, self.sample_rate)
+        self.assertEqual(pitch.shape, (3, len(times)))
+        np.testing.assert_allclose(median_pitch(pitch), [110, 220, 440], rtol=1e-3)
+        np.testing.assert_allclose(pitch[2], track_pitch(clips[2], self.sample_rate)[1])
+
+    def test_spectrum_analysis_computes_fft_once(self):
+        backend = get_fft_backend()
+        with mock.patch.object(backend, 'rfft', wraps=backend.rfft) as rfft:
+            analysis = SpectrumAnalysis(self.sound, self.sample_rate)
+            freqs, spectrum = analyze_frequency_spectrum(analysis)
+            self.assertEqual(rfft.call_count, 1)
+            formants = detect_formants(analysis)
+            harmonic_ratios = calculate_harmonic_ratios(analysis)
+            calls = rfft.call_count
+            analyze_frequency_spectrum(analysis)
+            detect_formants(analysis, method='peaks')
+            calculate_harmonic_ratios(analysis)
+            self.assertEqual(rfft.call_count, calls)
+        np.testing.assert_allclose(analysis.power, spectrum ** 2)
+        self.assertEqual(formants, detect_formants(self.sound, self.sample_rate))
+        self.assertEqual(harmonic_ratios, calculate_harmonic_ratios(self.sound, self.sample_rate))
+        self.assertAlmostEqual(analysis.fundamental, 440)
+        self.assertAlmostEqual(analysis.pitch, 440, delta=0.5)
+
+    def _clips(self):
+        return np.stack([np.sin(2 * np.pi * freq * self.t) + 0.5 * np.sin(2 * np.pi * 3 * freq * self.t) for freq in (110, 220, 440)])
+
+    def test_analyze_frequency_spectrum_batch(self):
+        clips = self._clips()
+        freqs, spectra = analyze_frequency_spectrum_batch(clips, self.sample_rate)
+        self.assertEqual(spectra.shape, (3, self.sample_rate // 2))
+        for clip, spectrum in zip(clips, spectra):
+            expected_freqs, expected_spectrum = analyze_frequency_spectrum(clip, self.sample_rate)
+            np.testing.assert_allclose(freqs, expected_freqs)
+            np.testing.assert_allclose(spectrum, expected_spectrum, atol=1e-6)
+
+    def test_analyze_frequency_spectrum_batch_ragged(self):
+        freqs, spectra = analyze_frequency_spectrum_batch([self.sound[:1000], self.sound], self.sample_rate)
+        self.assertEqual(spectra.shape, (2, len(self.sound) // 2))
+
+    def test_detect_formants_batch(self):
+        clips = self._clips()
+        formants = detect_formants_batch(clips, self.sample_rate, num_formants=3)
+        self.assertEqual(formants.shape, (3, 3))
+        for clip, row in zip(clips, formants):
+            expected = SpectrumAnalysis(clip, self.sample_rate).formants(num_formants=3)
+            found = row[~np.isnan(row['frequency'])]
+            np.testing.assert_allclose(found['frequency'], [freq for freq, _ in expected])
+            np.testing.assert_allclose(found['magnitude'], [magnitude for _, magnitude in expected], rtol=1e-9)
+
+    def test_calculate_harmonic_ratios_batch(self):
+        clips = self._clips()
+        result = calculate_harmonic_ratios_batch(clips, self.sample_rate)
+        np.testing.assert_allclose(result['fundamental'], [110, 220, 440], rtol=1e-3)
+        np.testing.assert_array_equal(result['num_ratios'], [2, 2, 2])
+        for clip, row in zip(clips, result):
+            expected = calculate_harmonic_ratios(clip, self.sample_rate)
+            np.testing.assert_allclose(row['ratios'][:row['num_ratios']], expected)
+
     def test_filter_noise_for_formants(self):
         formant_freqs = [500, 1500, 2500]
         bandwidths = [50, 75, 100]
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.io import wavfile
+from src.audio_io_module import create_raw, create_wav, open_raw, open_wav
+from src.acoustic_analysis_module import analyze_frequency_spectrum
+from src.harmonic_sounds_module import generate_harmonic_sound
+
+class TestAudioIOModule(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sample_rate = 8000
+        self.duration = 0.5
+        self.sound = generate_harmonic_sound(440, [(1, 0.5), (2, 0.25)], self.duration, self.sample_rate)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_read_float_wav_is_zero_copy(self):
+        path = self.path('float.wav')
+        wavfile.write(path, self.sample_rate, self.sound.astype(np.float32))
+        with open_wav(path) as audio:
+            self.assertEqual(audio.sample_rate, self.sample_rate)
+            self.assertEqual(audio.num_frames, len(self.sound))
+            self.assertIsInstance(audio.data, np.memmap)
+            samples = audio.read(dtype=np.float32)
+            self.assertTrue(np.shares_memory(samples, audio.data))
+            np.testing.assert_allclose(samples, self.sound, atol=1e-6)
+            freqs, spectrum = analyze_frequency_spectrum(audio.channel(), self.sample_rate)
+            self.assertAlmostEqual(freqs[np.argmax(spectrum)], 440, delta=2)
+
+    def test_read_int16_stereo(self):
+        path = self.path('stereo.wav')
+        stereo = np.stack([self.sound, -self.sound], axis=1)
+        wavfile.write(path, self.sample_rate, (stereo * 32767).astype(np.int16))
+        with open_wav(path) as audio:
+            self.assertEqual(audio.channels, 2)
+            np.testing.assert_allclose(audio.read(channel=1), -self.sound, atol=1e-4)
+            blocks = list(audio.iter_blocks(1000))
+            self.assertEqual(sum(len(block) for block in blocks), len(self.sound))
+
+    def test_frames_are_views(self):
+        path = self.path('frames.wav')
+        wavfile.write(path, self.sample_rate, self.sound.astype(np.float32))
+        with open_wav(path) as audio:
+            frames = audio.frames(256, 128)
+            self.assertEqual(frames.shape, ((len(self.sound) - 256) // 128 + 1, 256))
+            self.assertTrue(np.shares_memory(frames, audio.data))
+            np.testing.assert_array_equal(frames[3], audio.data[384:640])
+
+    def test_render_into_mapped_wav(self):
+        path = self.path('render.wav')
+        num_samples = len(self.sound)
+        with create_wav(path, num_samples, self.sample_rate) as audio:
+            generate_harmonic_sound(440, [(1, 0.5), (2, 0.25)], self.duration, self.sample_rate, out=audio.channel())
+        sample_rate, data = wavfile.read(path)
+        self.assertEqual(sample_rate, self.sample_rate)
+        self.assertEqual(data.dtype, np.float32)
+        np.testing.assert_allclose(data, self.sound, atol=1e-6)
+
+    def test_write_int16_wav(self):
+        path = self.path('int16.wav')
+        with create_wav(path, len(self.sound), self.sample_rate, dtype=np.int16) as audio:
+            audio.write(0, self.sound)
+        _, data = wavfile.read(path)
+        np.testing.assert_allclose(data / 32768, self.sound, atol=1e-4)
+
+    def test_raw_round_trip(self):
+        path = self.path('render.raw')
+        with create_raw(path, len(self.sound), self.sample_rate, channels=2, dtype=np.float64) as audio:
+            audio.write(0, self.sound, channel=0)
+            audio.write(0, self.sound * 0.5, channel=1)
+        with open_raw(path, self.sample_rate, np.float64, channels=2) as audio:
+            np.testing.assert_array_equal(audio.channel(0), self.sound)
+            np.testing.assert_array_equal(audio.channel(1), self.sound * 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from src.automation_module import ADSR, Breakpoints
+from src.render_graph_module import Oscillator, render
+from src.acoustic_analysis_module import manipulate_spectral_envelope
+from src.harmonic_sounds_module import generate_complex_acoustic_phenomena
+
+class TestAutomationModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 1000
+        self.num_samples = 10000
+        self.t = np.arange(self.num_samples) / self.sample_rate
+        self.sound = np.sin(2 * np.pi * 50 * self.t)
+
+    def test_breakpoints_match_interpolation(self):
+        times = [0.5, 2.0, 2.0, 4.0037, 6.0]
+        values = [0.2, 1.0, 0.3, 0.3, -1.0]
+        automation = Breakpoints(times, values)
+        expected = np.where(self.t < 2.0, np.interp(self.t, times[:2], values[:2]), np.interp(self.t, times[2:], values[2:]))
+        for tile_size in (64, 1000, 4096):
+            result = render(automation, self.num_samples, self.sample_rate, tile_size=tile_size)
+            np.testing.assert_allclose(result, expected, atol=1e-12)
+        self.assertEqual(automation.render(self.num_samples, self.sample_rate, dtype=np.float32).dtype, np.float32)
+        np.testing.assert_allclose(automation.at([0, 3, 7]), [0.2, 0.3, -1.0])
+        np.testing.assert_allclose(Breakpoints.from_points([(0, 0), (1, 2)]).at(0.5), 1.0)
+        with self.assertRaises(ValueError):
+            Breakpoints([1, 0], [0, 1])
+
+    def test_adsr(self):
+        envelope = ADSR(attack=1, decay=1, sustain=0.5, release=2, duration=8).render(self.num_samples, self.sample_rate)
+        np.testing.assert_allclose(envelope, np.interp(self.t, [0, 1, 2, 6, 8], [0, 1, 0.5, 0.5, 0]), atol=1e-12)
+        short = ADSR.from_dict({'attack': 2, 'decay': 1, 'sustain': 0.5, 'release': 1}, duration=2)
+        np.testing.assert_allclose(short.at([0.5, 1, 1.5, 2, 3]), [0.25, 0.5, 0.25, 0, 0])
+        held = ADSR(0.5, 0.5, 0.7)
+        np.testing.assert_allclose(held.at([0.25, 1, 100]), [0.5, 0.7, 0.7])
+
+    def test_envelope_functions_accept_automation(self):
+        automation = Breakpoints([0, 10], [1, 0])
+        envelope = automation.render(self.num_samples, self.sample_rate)
+        np.testing.assert_allclose(manipulate_spectral_envelope(self.sound, automation, self.sample_rate),
+                                   manipulate_spectral_envelope(self.sound, envelope, self.sample_rate), atol=1e-12)
+        noise = np.random.default_rng(0).normal(0, 1, self.num_samples)
+        np.testing.assert_allclose(generate_complex_acoustic_phenomena([self.sound] * 2, [noise] * 2, [automation, ADSR(1, 1, 0.5)], self.sample_rate),
+                                   generate_complex_acoustic_phenomena([self.sound] * 2, [noise] * 2,
+                                                                       [envelope, ADSR(1, 1, 0.5).render(self.num_samples, self.sample_rate)],
+                                                                       self.sample_rate), atol=1e-12)
+        graph = Oscillator(50) * ADSR(1, 1, 0.5, 1, duration=10)
+        np.testing.assert_allclose(render(graph, self.num_samples, self.sample_rate),
+                                   self.sound * np.interp(self.t, [0, 1, 2, 9, 10], [0, 1, 0.5, 0.5, 0]), atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.benchmark_module import (
+    BenchmarkSuite,
+    compare_results,
+    default_suite,
+    format_regressions,
+    load_results,
+    measure,
+    measure_import_time,
+    save_results
+)
+
+class TestBenchmarkModule(unittest.TestCase):
+
+    def test_measure(self):
+        calls = []
+        result = measure(lambda size: calls.append(np.ones(size)), (100000,), warmup=3, repeat=4, number=2)
+        self.assertEqual(len(calls), 3 + 4 * 2 + 1)
+        self.assertGreater(result['median'], 0)
+        self.assertLessEqual(result['min'], result['median'])
+        self.assertGreaterEqual(result['peak_bytes'], 100000 * 8)
+
+    def test_suite_keys_and_filter(self):
+        suite = BenchmarkSuite()
+        suite.add('numpy.ones', np.ones, lambda length: ((length,), {}), length=10)
+        suite.add('numpy.zeros', np.zeros, lambda length: ((length,), {}), length=10)
+        results = suite.run('numpy.ones*', warmup=0, repeat=2, memory=False)
+        self.assertEqual(list(results['results']), ['numpy.ones[length=10]'])
+        self.assertEqual(results['results']['numpy.ones[length=10]']['params'], {'length': 10})
+        self.assertIn('numpy', results['metadata'])
+
+    def test_default_suite_covers_public_functions(self):
+        from src import acoustic_analysis_module, harmonic_sounds_module, integration_module
+        names = {case.name for case in default_suite(quick=True).cases}
+        for prefix, module in (('harmonic', harmonic_sounds_module), ('acoustic', acoustic_analysis_module), ('integration', integration_module)):
+            public = {name for name, value in vars(module).items()
+                      if callable(value) and not name.startswith('_') and getattr(value, '__module__', None) == module.__name__
+                      and not isinstance(value, type)}
+            for name in public:
+                self.assertIn(f'{prefix}.{name}', names)
+
+    def test_quick_suite_runs(self):
+        results = default_suite(quick=True).run('acoustic.analyze*', warmup=0, repeat=1)
+        self.assertTrue(results['results'])
+
+    def test_compare_results(self):
+        baseline = {'results': {'a': {'median': 1.0, 'peak_bytes': 100}, 'b': {'median': 1.0, 'peak_bytes': 100}, 'gone': {'median': 1.0}}}
+        current = {'results': {'a': {'median': 1.05, 'peak_bytes': 100}, 'b': {'median': 1.5, 'peak_bytes': 200}, 'new': {'median': 9.0}}}
+        regressions = compare_results(current, baseline, threshold=0.1)
+        self.assertEqual(sorted((item['key'], item['metric']) for item in regressions), [('b', 'median'), ('b', 'peak_bytes')])
+        self.assertEqual(compare_results(current, baseline, threshold=0.1, memory_threshold=2.0, thresholds={'b': 0.6}), [])
+        self.assertEqual(len(compare_results(current, baseline, threshold=0.01, memory_threshold=2.0)), 2)
+        self.assertIn('b median', format_regressions(regressions))
+        self.assertEqual(format_regressions([]), "No regressions.")
+
+    def test_import_time_avoids_heavy_dependencies(self):
+        for module in ('src.acoustic_analysis_module', 'src.integration_module'):
+            timing = measure_import_time(module, repeat=1)
+            self.assertGreater(timing['seconds'], 0)
+            self.assertEqual(timing['heavy_modules'], [])
+
+    def test_results_round_trip(self):
+        results = BenchmarkSuite().run()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            save_results(results, path)
+            self.assertEqual(load_results(path), json.loads(json.dumps(results)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from src.block_processors_module import (
+    SubharmonicProcessor,
+    PitchModulationProcessor,
+    JitterProcessor,
+    FormantNoiseFilterProcessor
+)
+from src.acoustic_analysis_module import (
+    apply_subharmonics,
+    apply_pitch_modulation,
+    apply_jitter_effects,
+    filter_noise_for_formants
+)
+
+class TestBlockProcessorsModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.t = np.arange(self.sample_rate) / self.sample_rate
+        self.sound = np.sin(2 * np.pi * 440 * self.t)
+        self.block_sizes = [1000, 1, 4096, 333, 20000]
+
+    def _process_in_blocks(self, processor, signal):
+        blocks = []
+        start = 0
+        for size in self.block_sizes + [len(signal)]:
+            blocks.append(processor.process(signal[start:start + size]))
+            start += size
+        return np.concatenate(blocks)
+
+    def test_subharmonic_processor_matches_one_shot(self):
+        expected = apply_subharmonics(self.sound, [220, 110], [0.5, 0.25], self.sample_rate)
+        processor = SubharmonicProcessor([220, 110], [0.5, 0.25], self.sample_rate)
+        np.testing.assert_allclose(self._process_in_blocks(processor, self.sound), expected, atol=1e-9)
+
+    def test_pitch_modulation_processor_matches_one_shot(self):
+        expected = apply_pitch_modulation(self.sound, 5, 0.1, self.sample_rate)
+        processor = PitchModulationProcessor(5, 0.1, self.sample_rate)
+        np.testing.assert_allclose(self._process_in_blocks(processor, self.sound), expected, atol=1e-9)
+
+    def test_jitter_processor_matches_one_shot(self):
+        expected = apply_jitter_effects(self.sound, 0.05, self.sample_rate, rng=7)
+        processor = JitterProcessor(0.05, self.sample_rate, random_state=7)
+        np.testing.assert_array_equal(self._process_in_blocks(processor, self.sound), expected)
+        processor.reset()
+        np.testing.assert_array_equal(processor.process_signal(self.sound, 512), expected)
+
+    def test_formant_noise_filter_processor_matches_one_shot(self):
+        noise = np.random.default_rng(0).normal(0, 1, len(self.t))
+        for method in ('resonator', 'envelope'):
+            expected = filter_noise_for_formants(noise, [500, 1500], [5, 7], self.sample_rate, method=method)
+            processor = FormantNoiseFilterProcessor([500, 1500], [5, 7], self.sample_rate, method=method)
+            np.testing.assert_allclose(self._process_in_blocks(processor, noise), expected, atol=1e-9)
+
+    def test_reset_restarts_time(self):
+        processor = SubharmonicProcessor([220], [1.0], self.sample_rate)
+        first = processor.process(np.zeros(100))
+        processor.process(np.zeros(57))
+        processor.reset()
+        np.testing.assert_array_equal(processor.process(np.zeros(100)), first)
+        self.assertEqual(processor.position, 100)
+
+if __name__ == '__main__':
+    unittest.main()
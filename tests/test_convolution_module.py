@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from src.convolution_module import PartitionedConvolver, clear_ir_cache, convolve_ir, ir_partition_spectra
+
+class TestConvolutionModule(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.sound = rng.normal(0, 1, 20000)
+        self.ir = rng.normal(0, 1, 3001) * np.exp(-np.arange(3001) / 500)
+        self.expected = np.convolve(self.sound, self.ir)
+
+    def test_matches_direct_convolution(self):
+        for block_size in (64, 512, 4096):
+            np.testing.assert_allclose(convolve_ir(self.sound, self.ir, block_size), self.expected, atol=1e-10)
+        np.testing.assert_allclose(convolve_ir(self.sound, self.ir, 256, include_tail=False), self.expected[:len(self.sound)], atol=1e-10)
+        result = convolve_ir(self.sound, self.ir, dtype=np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, self.expected, atol=1e-3)
+
+    def test_channels(self):
+        clips = np.stack([self.sound[:5000], self.sound[5000:10000], self.sound[10000:15000]])
+        result = convolve_ir(clips, self.ir, 128)
+        self.assertEqual(result.shape, (3, 5000 + len(self.ir) - 1))
+        for clip, row in zip(clips, result):
+            np.testing.assert_allclose(row, np.convolve(clip, self.ir), atol=1e-10)
+
+    def test_blocks_of_any_size_have_fixed_latency(self):
+        convolver = PartitionedConvolver(self.ir, 256)
+        lengths = [1, 300, 7, 5000, 256, 12000]
+        starts = np.cumsum([0] + lengths)
+        output = np.concatenate([convolver.process(self.sound[start:start + length]) for start, length in zip(starts, lengths)])
+        self.assertEqual(convolver.latency, 256)
+        np.testing.assert_array_equal(output[:256], 0)
+        np.testing.assert_allclose(output[256:], self.expected[:len(output) - 256], atol=1e-10)
+        convolver.reset()
+        np.testing.assert_allclose(convolver.process(self.sound[:1000])[256:], self.expected[:744], atol=1e-10)
+
+    def test_partition_spectra_are_cached(self):
+        clear_ir_cache()
+        spectra = ir_partition_spectra(self.ir, 512)
+        self.assertEqual(spectra.shape, (6, 513))
+        self.assertFalse(spectra.flags.writeable)
+        self.assertIs(ir_partition_spectra(self.ir.copy(), 512), spectra)
+        self.assertIsNot(ir_partition_spectra(self.ir, 256), spectra)
+        self.assertIs(PartitionedConvolver(self.ir, 512).spectra, spectra)
+        with self.assertRaises(ValueError):
+            ir_partition_spectra(np.zeros(0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import sys
+from unittest import mock
+from src.fft_backend_module import (
+    FFTBackend,
+    NumpyFFTBackend,
+    ScipyFFTBackend,
+    available_fft_backends,
+    create_fft_backend,
+    get_fft_backend,
+    register_fft_backend,
+    set_fft_backend
+)
+
+class TestFFTBackendModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.t = np.arange(4096) / self.sample_rate
+        self.sound = np.sin(2 * np.pi * 440 * self.t)
+        self.backend = FFTBackend(planner_effort='FFTW_ESTIMATE', max_plans=2)
+
+    def test_rfft_matches_numpy(self):
+        np.testing.assert_allclose(self.backend.rfft(self.sound), np.fft.rfft(self.sound), atol=1e-8)
+
+    def test_rfft_float32(self):
+        spectrum = self.backend.rfft(self.sound.astype(np.float32))
+        self.assertEqual(spectrum.dtype, np.complex64)
+        np.testing.assert_allclose(spectrum, np.fft.rfft(self.sound), atol=1e-2)
+
+    def test_irfft_round_trip(self):
+        spectrum = self.backend.rfft(self.sound)
+        np.testing.assert_allclose(self.backend.irfft(spectrum, len(self.sound)), self.sound, atol=1e-10)
+
+    def test_plan_cache_lru_eviction(self):
+        self.backend.rfft(np.zeros(64))
+        self.backend.rfft(np.zeros(128))
+        self.backend.rfft(np.zeros(64))
+        self.backend.rfft(np.zeros(256))
+        keys = self.backend.cache_info()['keys']
+        self.assertEqual(len(keys), 2)
+        self.assertEqual([key[0] for key in keys], [(64,), (256,)])
+
+    def test_results_do_not_alias_plan_buffers(self):
+        first = self.backend.rfft(self.sound)
+        expected = first.copy()
+        self.backend.rfft(np.zeros_like(self.sound))
+        np.testing.assert_array_equal(first, expected)
+
+    def test_wisdom_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'wisdom.fftw')
+            self.backend.rfft(self.sound)
+            self.backend.save_wisdom(path)
+            self.assertTrue(os.path.exists(path))
+            loaded = FFTBackend(planner_effort='FFTW_ESTIMATE', wisdom_path=path)
+            np.testing.assert_allclose(loaded.rfft(self.sound), np.fft.rfft(self.sound), atol=1e-8)
+
+    def test_wisdom_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'wisdom.fftw')
+            self.backend.save_wisdom(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            for contents in (pickle.dumps(self.backend._pyfftw.export_wisdom()), data[:-1], data + b'\x00'):
+                with open(path, 'wb') as f:
+                    f.write(contents)
+                with self.assertRaises(ValueError):
+                    self.backend.load_wisdom(path)
+
+    def test_default_backend_is_shared(self):
+        self.assertIs(get_fft_backend(), get_fft_backend())
+
+    def test_alternative_backends_match(self):
+        for backend in (ScipyFFTBackend(), NumpyFFTBackend()):
+            np.testing.assert_allclose(backend.rfft(self.sound), np.fft.rfft(self.sound), atol=1e-8)
+            np.testing.assert_allclose(backend.irfft(backend.rfft(self.sound), len(self.sound)), self.sound, atol=1e-10)
+            self.assertEqual(backend.rfft(self.sound.astype(np.float32)).dtype, np.complex64)
+            self.assertEqual(backend.irfft(backend.rfft(self.sound.astype(np.float32)), len(self.sound)).dtype, np.float32)
+
+    def test_create_backend_by_preference(self):
+        self.assertIn('numpy', available_fft_backends())
+        self.assertIsInstance(create_fft_backend('numpy'), NumpyFFTBackend)
+        self.assertIsInstance(create_fft_backend('scipy,numpy', threads=2), ScipyFFTBackend)
+        with mock.patch.dict(os.environ, {'ACOUSYNTH_FFT_BACKEND': 'numpy'}):
+            self.assertIsInstance(create_fft_backend(), NumpyFFTBackend)
+        with self.assertRaises(ValueError):
+            create_fft_backend('cufft')
+
+    def test_fallback_when_library_is_missing(self):
+        with mock.patch.dict(sys.modules, {'pyfftw': None, 'pyfftw.builders': None}):
+            self.assertIsInstance(create_fft_backend(['pyfftw', 'scipy']), ScipyFFTBackend)
+            with self.assertRaises(ImportError):
+                create_fft_backend(['pyfftw'])
+
+    def test_register_and_set_backend(self):
+        register_fft_backend('test-numpy', NumpyFFTBackend)
+        previous = get_fft_backend()
+        try:
+            set_fft_backend('test-numpy')
+            self.assertIsInstance(get_fft_backend(), NumpyFFTBackend)
+        finally:
+            set_fft_backend(previous)
+
+if __name__ == '__main__':
+    unittest.main()
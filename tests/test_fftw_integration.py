@@ -1,7 +1,7 @@
 import numpy as np
 import pyfftw.interfaces.numpy_fft as fftw
-import time
 import unittest
+from src.benchmark_module import BenchmarkSuite
 
 class TestFFTWIntegration(unittest.TestCase):
 
@@ -26,25 +26,19 @@ class TestFFTWIntegration(unittest.TestCase):
 
     def test_fftw_performance(self):
         input_sizes = [1024, 2048, 4096, 8192, 16384, 32768, 65536]
-        np_times = []
-        fftw_times = []
-
+        suite = BenchmarkSuite()
+        signal = lambda size: ((np.sin(2 * np.pi * 440 * np.linspace(0, self.duration, size, endpoint=False)),), {})
         for size in input_sizes:
-            sound = np.sin(2 * np.pi * 440 * np.linspace(0, self.duration, size, endpoint=False))
-
-            # Measure numpy FFT time
-            start_time = time.time()
-            np.fft.fft(sound)
-            np_times.append(time.time() - start_time)
+            suite.add('numpy.fft', np.fft.fft, signal, size=size)
+            suite.add('fftw.fft', fftw.fft, signal, size=size)
+        results = suite.run(warmup=1, repeat=5)['results']
 
-            # Measure FFTW time
-            start_time = time.time()
-            fftw.fft(sound)
-            fftw_times.append(time.time() - start_time)
-
-        print("Input Sizes:", input_sizes)
-        print("NumPy FFT Times:", np_times)
-        print("FFTW FFT Times:", fftw_times)
+        self.assertEqual(len(results), 2 * len(input_sizes))
+        for size in input_sizes:
+            for name in ('numpy.fft', 'fftw.fft'):
+                result = results[f'{name}[size={size}]']
+                self.assertGreater(result['median'], 0)
+                self.assertGreaterEqual(result['peak_bytes'], size * 16)
 
 if __name__ == '__main__':
     unittest.main()
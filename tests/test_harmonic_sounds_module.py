@@ -1,12 +1,14 @@
 import unittest
 import numpy as np
 from src.harmonic_sounds_module import (
+    render_additive,
     generate_harmonic_sound,
     generate_formant_sound,
     generate_noise,
     combine_sine_and_noise,
     generate_syllabic_sound,
     real_time_spectral_analysis,
+    stream_spectral_analysis,
     control_parameters,
     generate_complex_acoustic_phenomena
 )
@@ -37,10 +39,47 @@ class TestHarmonicSoundsModule(unittest.TestCase):
         self.assertEqual(len(sound), len(self.t))
         self.assertTrue(np.any(sound))
 
+    def test_generate_harmonic_sound_matches_sine_sum(self):
+        expected = sum(amplitude * np.sin(2 * np.pi * harmonic * self.fundamental_freq * self.t) for harmonic, amplitude in self.harmonics)
+        for method in ('direct', 'rotation'):
+            sound = generate_harmonic_sound(self.fundamental_freq, self.harmonics, self.duration, self.sample_rate, method=method)
+            np.testing.assert_allclose(sound, expected, atol=1e-9)
+
+    def test_render_additive_many_partials(self):
+        freqs = 55.0 * np.arange(1, 201)
+        amplitudes = 1.0 / np.arange(1, 201)
+        direct = render_additive(freqs, amplitudes, 10000, self.sample_rate, method='direct')
+        rotation = render_additive(freqs, amplitudes, 10000, self.sample_rate, method='rotation', block_size=1000)
+        np.testing.assert_allclose(rotation, direct, atol=1e-9)
+
+    def test_render_additive_envelopes(self):
+        freqs = [220.0, 330.0]
+        amplitudes = [1.0, 0.5]
+        amplitude_envelopes = [[1.0, 0.0], [0.0, 1.0]]
+        sound = render_additive(freqs, amplitudes, 1001, self.sample_rate, amplitude_envelopes=amplitude_envelopes, block_size=256)
+        t = np.arange(1001) / self.sample_rate
+        ramp = np.linspace(0, 1, 1001)
+        expected = (1 - ramp) * np.sin(2 * np.pi * 220 * t) + 0.5 * ramp * np.sin(2 * np.pi * 330 * t)
+        np.testing.assert_allclose(sound, expected, atol=1e-9)
+        glide = render_additive([220.0], [1.0], 1001, self.sample_rate, frequency_envelopes=[[1.0, 2.0]], block_size=256)
+        phase = np.concatenate(([0.0], np.cumsum(2 * np.pi * 220 * (1 + ramp[:-1]) / self.sample_rate)))
+        np.testing.assert_allclose(glide, np.sin(phase), atol=1e-9)
+
     def test_generate_formant_sound(self):
         sound = generate_formant_sound(self.fundamental_freq, self.formants, self.duration, self.sample_rate)
         self.assertEqual(len(sound), len(self.t))
         self.assertTrue(np.any(sound))
+        self.assertAlmostEqual(np.max(np.abs(sound)), 1.0)
+        legacy = generate_formant_sound(self.fundamental_freq, self.formants, self.duration, self.sample_rate, method='envelope')
+        self.assertEqual(len(legacy), len(self.t))
+
+    def test_generate_formant_sound_resonances(self):
+        sound = generate_formant_sound(110, [(1100, 60)], self.duration, self.sample_rate)
+        spectrum = np.abs(np.fft.rfft(sound))
+        freqs = np.fft.rfftfreq(len(sound), 1 / self.sample_rate)
+        harmonics = np.arange(1, 40) * 110
+        levels = spectrum[np.searchsorted(freqs, harmonics)]
+        self.assertEqual(harmonics[np.argmax(levels)], 1100)
 
     def test_generate_noise(self):
         noise = generate_noise(self.duration, self.sample_rate)
@@ -66,6 +105,14 @@ class TestHarmonicSoundsModule(unittest.TestCase):
         self.assertTrue(np.any(times))
         self.assertTrue(np.any(spectrogram_data))
 
+    def test_stream_spectral_analysis(self):
+        sound = np.sin(2 * np.pi * self.fundamental_freq * self.t)
+        frequencies, times, spectrogram_data = real_time_spectral_analysis(sound, self.sample_rate)
+        chunks = np.array_split(sound, 37)
+        frames = list(stream_spectral_analysis(chunks, self.sample_rate))
+        self.assertEqual(len(frames), len(times))
+        np.testing.assert_allclose(np.stack([frame for _, frame in frames], axis=1), spectrogram_data, rtol=1e-6, atol=1e-12)
+
     def test_control_parameters(self):
         sound = np.sin(2 * np.pi * self.fundamental_freq * self.t)
         manipulated_sound = control_parameters(
@@ -0,0 +1,108 @@
+import json
+import threading
+import timeit
+import unittest
+import numpy as np
+from src.instrumentation_module import Profile, instrumented, is_profiling, profile, stage
+from src.acoustic_analysis_module import SpectrumAnalysis, analyze_frequency_spectrum, detect_formants
+from src.harmonic_sounds_module import stream_spectral_analysis
+
+@instrumented('test.double')
+def _double(signal):
+    return signal * 2
+
+@instrumented('custom.name')
+def _fail():
+    raise RuntimeError("boom")
+
+class TestInstrumentationModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        t = np.arange(self.sample_rate) / self.sample_rate
+        self.sound = np.sin(2 * np.pi * 440 * t)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(is_profiling())
+        recorder = Profile()
+        _double(self.sound)
+        self.assertEqual(recorder.to_dict(), {})
+
+    def test_records_calls_and_arrays(self):
+        with profile() as recorder:
+            self.assertTrue(is_profiling())
+            _double(self.sound)
+            _double(self.sound[:10])
+        self.assertFalse(is_profiling())
+        stats = recorder.to_dict()['test.double']
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['input_elements'], len(self.sound) + 10)
+        self.assertEqual(stats['output_elements'], len(self.sound) + 10)
+        self.assertEqual(stats['max_array_bytes'], self.sound.nbytes)
+        self.assertGreater(stats['wall_seconds'], 0)
+        self.assertEqual(stats['allocated_bytes'], 0)
+
+    def test_library_stages(self):
+        with profile() as recorder:
+            analysis = SpectrumAnalysis(self.sound, self.sample_rate)
+            analyze_frequency_spectrum(analysis)
+            detect_formants(analysis, method='peaks')
+        stats = recorder.to_dict()
+        for name in ('acoustic_analysis.analyze_frequency_spectrum', 'acoustic_analysis.detect_formants',
+                     'fft_backend.FFTBackend.rfft', 'acoustic_analysis.SpectrumAnalysis.peaks'):
+            self.assertIn(name, stats)
+        self.assertEqual(stats['fft_backend.FFTBackend.rfft']['calls'], 1)
+
+    def test_generator_stages_time_consumption(self):
+        with profile() as recorder:
+            frames = stream_spectral_analysis(np.array_split(self.sound, 4), self.sample_rate)
+            self.assertNotIn('harmonic_sounds.stream_spectral_analysis', recorder.to_dict())
+            next(frames)
+            self.assertEqual(recorder.to_dict()['harmonic_sounds.stream_spectral_analysis']['calls'], 1)
+            count = 1 + len(list(frames))
+        stats = recorder.to_dict()['harmonic_sounds.stream_spectral_analysis']
+        # One step per frame, and one per chunk ending after its last frame.
+        self.assertEqual(stats['calls'], count + 4)
+        self.assertGreater(stats['wall_seconds'], 0)
+
+    def test_memory_tracking_and_nesting(self):
+        with profile(memory=True) as recorder:
+            with stage('outer'):
+                np.ones(100000)
+                _double(np.zeros(200000))
+        stats = recorder.to_dict()
+        self.assertGreaterEqual(stats['test.double']['allocated_bytes'], 200000 * 8)
+        self.assertGreaterEqual(stats['outer']['allocated_bytes'], stats['test.double']['allocated_bytes'])
+        self.assertGreaterEqual(stats['outer']['wall_seconds'], stats['test.double']['wall_seconds'])
+
+    def test_exceptions_are_recorded_and_propagate(self):
+        with profile(memory=True) as recorder:
+            with self.assertRaises(RuntimeError):
+                _fail()
+        self.assertEqual(recorder.to_dict()['custom.name']['calls'], 1)
+
+    def test_threads_share_profile(self):
+        with profile() as recorder:
+            threads = [threading.Thread(target=_double, args=(self.sound,)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(recorder.to_dict()['test.double']['calls'], 4)
+
+    def test_exports(self):
+        with profile() as recorder:
+            _double(self.sound)
+        self.assertEqual(json.loads(recorder.to_json()), recorder.to_dict())
+        text = recorder.to_prometheus(labels={'job': 'render "a"'})
+        self.assertIn('# TYPE acousynth_calls_total counter', text)
+        self.assertIn('acousynth_calls_total{stage="test.double",job="render \\"a\\""} 1\n', text)
+
+    def test_disabled_overhead_is_small(self):
+        plain = lambda: None
+        wrapped = instrumented()(plain)
+        overhead = min(timeit.repeat(wrapped, number=10000, repeat=5)) - min(timeit.repeat(plain, number=10000, repeat=5))
+        self.assertLess(overhead / 10000, 5e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,6 @@ from src.integration_module import (
     integrate_theoretical_acoustics_with_practical_synthesis,
     integrate_new_tools_with_existing_tools
 )
-from src.harmonic_sounds_module import generate_harmonic_sound, generate_noise
-from src.acoustic_analysis_module import generate_synthetic_speech
 
 class TestIntegrationModule(unittest.TestCase):
 
@@ -0,0 +1,75 @@
+import threading
+import unittest
+import numpy as np
+from src.noise_module import NOISE_BLOCK_SIZE, NoiseGenerator, make_rng, random_stream, render_noise, spawn_rngs
+from src.harmonic_sounds_module import generate_noise
+from src.acoustic_analysis_module import apply_jitter_effects
+
+class TestNoiseModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.num_samples = 1 << 18
+
+    def slope(self, noise):
+        # Average power spectrum of 4096-sample frames, fitted in dB per octave between 100 Hz and 10 kHz.
+        frames = noise[:len(noise) // 4096 * 4096].reshape(-1, 4096)
+        power = np.mean(np.abs(np.fft.rfft(frames, axis=1)) ** 2, axis=0)
+        freqs = np.fft.rfftfreq(4096, 1 / self.sample_rate)
+        band = (freqs > 100) & (freqs < 10000)
+        return np.polyfit(np.log2(freqs[band]), 10 * np.log10(power[band]), 1)[0]
+
+    def test_colors_have_expected_slope_and_level(self):
+        for color, slope in (('white', 0), ('pink', -3), ('brown', -6)):
+            noise = render_noise(self.num_samples, color, seed=3, sample_rate=self.sample_rate)
+            self.assertAlmostEqual(self.slope(noise), slope, delta=0.5)
+            self.assertAlmostEqual(np.std(noise), 1.0, delta=0.1)
+        with self.assertRaises(ValueError):
+            NoiseGenerator('blue')
+
+    def test_streaming_matches_one_call(self):
+        for color in ('white', 'pink', 'brown'):
+            expected = render_noise(2 * NOISE_BLOCK_SIZE + 100, color, seed=5)
+            generator = NoiseGenerator(color, seed=5)
+            blocks = [generator.render(length) for length in (1000, NOISE_BLOCK_SIZE, 7, NOISE_BLOCK_SIZE - 907)]
+            np.testing.assert_array_equal(np.concatenate(blocks), expected)
+            generator.reset()
+            np.testing.assert_array_equal(generator.render(len(expected)), expected)
+
+    def test_float32_output_buffer(self):
+        buffer = np.zeros(3 * NOISE_BLOCK_SIZE, dtype=np.float32)
+        result = render_noise(len(buffer) - 10, 'pink', seed=1, out=buffer[5:-5])
+        self.assertEqual(result.dtype, np.float32)
+        self.assertTrue(np.shares_memory(result, buffer))
+        np.testing.assert_allclose(result, render_noise(len(result), 'pink', seed=1), atol=1e-5)
+        self.assertEqual(generate_noise(0.1, self.sample_rate, dtype=np.float32).dtype, np.float32)
+
+    def test_seeded_streams_are_reproducible(self):
+        np.testing.assert_array_equal(generate_noise(0.1, rng=4), generate_noise(0.1, rng=4))
+        self.assertFalse(np.array_equal(generate_noise(0.1, rng=4), generate_noise(0.1, rng=5)))
+        first, second = spawn_rngs(9, 2)
+        self.assertFalse(np.array_equal(first.standard_normal(10), second.standard_normal(10)))
+        np.testing.assert_array_equal(spawn_rngs(9, 2)[1].standard_normal(10), spawn_rngs(9, 2)[1].standard_normal(10))
+        sound = np.ones(1000)
+        np.testing.assert_array_equal(apply_jitter_effects(sound, 0.1, rng=make_rng(2)), apply_jitter_effects(sound, 0.1, rng=2))
+
+    def test_random_stream_is_per_context(self):
+        def render_in_stream(results, index):
+            with random_stream(11):
+                results[index] = (generate_noise(0.05), generate_noise(0.05))
+        results = [None, None]
+        threads = [threading.Thread(target=render_in_stream, args=(results, index)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+        self.assertFalse(np.array_equal(results[0][0], results[0][1]))
+        np.random.seed(3)
+        legacy = generate_noise(0.05)
+        np.random.seed(3)
+        np.testing.assert_array_equal(generate_noise(0.05), legacy)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+from src.polyphony_module import PolyphonicEngine, render_voices
+from src.acoustic_analysis_module import generate_synthetic_speech
+from src.harmonic_sounds_module import generate_formant_sound
+from src.wavetable_module import Wavetable
+
+class TestPolyphonyModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 16000
+        self.formants = [(500, 50), (1500, 80)]
+
+    def speech(self, pitch, formants, duration):
+        return generate_synthetic_speech(pitch, [freq for freq, _ in formants], [bandwidth for _, bandwidth in formants],
+                                         duration, self.sample_rate)
+
+    def test_envelope_voice_matches_synthetic_speech(self):
+        engine = PolyphonicEngine(4, self.sample_rate)
+        engine.note_on(120, self.formants, gain=0.5, start=0.01, duration=0.2)
+        # Block splits that do not line up with the engine's blocks.
+        sound = np.concatenate([engine.render(1000), engine.render(3000), engine.render(1000)])
+        expected = np.zeros(5000)
+        expected[160:160 + 3200] = 0.5 * self.speech(120, self.formants, 0.2)
+        np.testing.assert_allclose(sound, expected, atol=1e-12)
+        self.assertEqual(engine.active_voices, 0)
+
+    def test_resonator_voice_matches_formant_sound(self):
+        formants = [(700, 80), (1200, 90)]
+        engine = PolyphonicEngine(2, self.sample_rate, method='resonator')
+        engine.note_on(150, formants, duration=0.3)
+        sound = engine.render(int(0.3 * self.sample_rate))
+        np.testing.assert_allclose(sound / np.max(np.abs(sound)), generate_formant_sound(150, formants, 0.3, self.sample_rate),
+                                   atol=1e-12)
+
+    def test_render_phases_matches_render(self):
+        wavetable = Wavetable.sawtooth(64)
+        freqs = np.array([100.0, 3000.0])
+        cycles = np.arange(500)[None, :] * (freqs[:, None] / self.sample_rate)
+        rows = wavetable.render_phases(freqs, cycles, self.sample_rate)
+        for freq, row in zip(freqs, rows):
+            np.testing.assert_allclose(row, wavetable.render(freq, 500, self.sample_rate)[0], atol=1e-12)
+
+    def test_voice_stealing(self):
+        engine = PolyphonicEngine(2, self.sample_rate, steal='oldest')
+        first = engine.note_on(100, self.formants)
+        second = engine.note_on(110, self.formants, gain=0.1)
+        third = engine.note_on(120, self.formants)
+        self.assertEqual(sorted(engine.note_ids.tolist()), [second, third])
+        self.assertNotIn(first, engine.note_ids)
+        quietest = PolyphonicEngine(2, self.sample_rate, steal='quietest')
+        quietest.note_on(100, self.formants)
+        quiet = quietest.note_on(110, self.formants, gain=0.1)
+        quietest.note_on(120, self.formants)
+        self.assertNotIn(quiet, quietest.note_ids)
+        self.assertEqual(quietest.stolen, 1)
+        none = PolyphonicEngine(1, self.sample_rate, steal='none')
+        none.note_on(100, self.formants)
+        self.assertIsNone(none.note_on(110, self.formants))
+        self.assertEqual(none.dropped, 1)
+        with self.assertRaises(ValueError):
+            PolyphonicEngine(steal='loudest')
+
+    def test_note_off_releases_voice(self):
+        engine = PolyphonicEngine(2, self.sample_rate)
+        note = engine.note_on(120, self.formants)
+        engine.render(1600)
+        engine.note_off(note, time=0.2)
+        sound = engine.render(3200 + 1600)
+        self.assertEqual(engine.active_voices, 0)
+        np.testing.assert_allclose(sound[:1600], self.speech(120, self.formants, 0.2)[1600:], atol=1e-12)
+        np.testing.assert_array_equal(sound[1600:], 0)
+        engine.reset()
+        engine.note_on(120, self.formants, release=0.05)
+        engine.note_off(0, time=0.1)
+        sound = engine.render(3200)
+        # A linear fade from the note-off over the 800 release samples.
+        ramp = (800 - np.arange(800)) / 800
+        np.testing.assert_allclose(sound[:1600], self.speech(120, self.formants, 0.1), atol=1e-12)
+        np.testing.assert_allclose(sound[1600:2400], self.speech(120, self.formants, 0.15)[1600:2400] * ramp, atol=1e-12)
+        np.testing.assert_array_equal(sound[1600 + 800:], 0)
+
+    def test_render_voices_matches_summed_voices(self):
+        rng = np.random.default_rng(0)
+        notes = [{'pitch': rng.uniform(90, 250), 'formants': [(rng.uniform(300, 900), 60), (rng.uniform(900, 2500), 90)],
+                  'gain': 0.1, 'start': rng.uniform(0, 0.3), 'duration': rng.uniform(0.05, 0.2)} for _ in range(40)]
+        mix = render_voices(notes, 0.5, self.sample_rate)
+        expected = np.zeros(len(mix))
+        for note in notes:
+            voice = note['gain'] * self.speech(note['pitch'], note['formants'], note['duration'])
+            start = int(round(note['start'] * self.sample_rate))
+            length = min(len(voice), len(expected) - start)
+            expected[start:start + length] += voice[:length]
+        np.testing.assert_allclose(mix, expected, atol=1e-12)
+        self.assertEqual(render_voices(notes, 0.5, self.sample_rate, dtype=np.float32).dtype, np.float32)
+        crowded = render_voices(notes, 0.5, self.sample_rate, max_voices=4, steal='none')
+        self.assertLess(np.abs(crowded).sum(), np.abs(mix).sum())
+
+if __name__ == '__main__':
+    unittest.main()
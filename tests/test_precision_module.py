@@ -0,0 +1,89 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.precision_module import OutputShapeError, get_default_dtype, precision, prepare_output, resolve_dtype, set_default_dtype
+from src.harmonic_sounds_module import generate_harmonic_sound, combine_sine_and_noise, generate_noise
+from src.acoustic_analysis_module import apply_pitch_modulation, apply_subharmonics, generate_synthetic_speech
+from src.wavetable_module import render_oscillator
+
+class TestPrecisionModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.duration = 0.1
+        self.num_samples = int(self.sample_rate * self.duration)
+
+    def test_default_is_float64(self):
+        self.assertEqual(get_default_dtype(), np.float64)
+        self.assertEqual(generate_harmonic_sound(440, [(1, 1.0)], self.duration, self.sample_rate).dtype, np.float64)
+
+    def test_precision_context(self):
+        with precision(np.float32):
+            self.assertEqual(get_default_dtype(), np.float32)
+            self.assertEqual(generate_noise(self.duration, self.sample_rate).dtype, np.float32)
+        self.assertEqual(get_default_dtype(), np.float64)
+
+    def test_process_default_reaches_threads(self):
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(executor.submit(get_default_dtype).result(), np.float64)
+            set_default_dtype(np.float32)
+            try:
+                self.assertEqual(executor.submit(get_default_dtype).result(), np.float32)
+                results = []
+                thread = threading.Thread(target=lambda: results.append(get_default_dtype()))
+                thread.start()
+                thread.join()
+                self.assertEqual(results, [np.float32])
+                with precision(np.float64):
+                    self.assertEqual(get_default_dtype(), np.float64)
+                    self.assertEqual(executor.submit(get_default_dtype).result(), np.float32)
+                self.assertEqual(get_default_dtype(), np.float32)
+            finally:
+                set_default_dtype(np.float64)
+
+    def test_set_default_dtype_rejects_other_types(self):
+        with self.assertRaises(ValueError):
+            set_default_dtype(np.int16)
+        with self.assertRaises(ValueError):
+            resolve_dtype(np.complex64)
+
+    def test_resolve_dtype_prefers_out(self):
+        out = np.empty(4, dtype=np.float32)
+        self.assertEqual(resolve_dtype(np.float64, out), np.float32)
+        self.assertEqual(resolve_dtype(np.float32), np.float32)
+
+    def test_prepare_output_checks_shape(self):
+        out = np.empty(10)
+        self.assertIs(prepare_output(out, 10), out)
+        with self.assertRaises(ValueError):
+            prepare_output(out, 11)
+        with self.assertRaises(OutputShapeError) as raised:
+            prepare_output(out, (2, 5))
+        self.assertEqual(raised.exception.expected, (2, 5))
+
+    def test_float32_matches_float64(self):
+        single = render_oscillator(1000.0, self.sample_rate * 10, self.sample_rate, dtype=np.float32)
+        double = render_oscillator(1000.0, self.sample_rate * 10, self.sample_rate)
+        self.assertEqual(single.dtype, np.float32)
+        np.testing.assert_allclose(single, double, atol=1e-6)
+
+    def test_chain_in_place(self):
+        buffer = np.empty(self.num_samples, dtype=np.float32)
+        result = generate_synthetic_speech(120, [500, 1500], [50, 100], self.duration, self.sample_rate, out=buffer)
+        self.assertIs(result, buffer)
+        self.assertIs(apply_subharmonics(buffer, [60], [0.5], self.sample_rate, out=buffer), buffer)
+        self.assertIs(apply_pitch_modulation(buffer, 5, 0.5, self.sample_rate, out=buffer), buffer)
+        expected = generate_synthetic_speech(120, [500, 1500], [50, 100], self.duration, self.sample_rate)
+        expected = apply_pitch_modulation(apply_subharmonics(expected, [60], [0.5], self.sample_rate), 5, 0.5, self.sample_rate)
+        np.testing.assert_allclose(buffer, expected, atol=1e-4)
+
+    def test_combine_into_input(self):
+        sine = generate_harmonic_sound(440, [(1, 1.0)], self.duration, self.sample_rate)
+        noise = np.ones_like(sine)
+        expected = combine_sine_and_noise(sine, noise)
+        self.assertIs(combine_sine_and_noise(sine, noise, out=sine), sine)
+        np.testing.assert_allclose(sine, expected)
+
+if __name__ == '__main__':
+    unittest.main()
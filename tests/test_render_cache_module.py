@@ -0,0 +1,134 @@
+import importlib
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import numpy as np
+from src.render_cache_module import RenderCache, cached_render, render_key
+from src.harmonic_sounds_module import generate_harmonic_sound, generate_noise
+from src.acoustic_analysis_module import generate_synthetic_speech
+from src.precision_module import precision
+from src.wavetable_module import Wavetable
+
+class TestRenderCacheModule(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.params = {'fundamental_freq': 220, 'harmonics': [(1, 1.0), (2, 0.5)], 'duration': 0.1}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_normalizes_parameters(self):
+        key = render_key(generate_harmonic_sound, self.params)
+        explicit = dict(self.params, fundamental_freq=220.0, harmonics=((1, 1), (2, 0.5)), sample_rate=44100)
+        self.assertEqual(key, render_key(generate_harmonic_sound, explicit))
+        self.assertNotEqual(key, render_key(generate_harmonic_sound, dict(self.params, sample_rate=48000)))
+        self.assertNotEqual(key, render_key(generate_harmonic_sound, dict(self.params, dtype=np.float32)))
+        self.assertNotEqual(key, render_key(generate_harmonic_sound, self.params, seed=1))
+        with precision(np.float32):
+            self.assertEqual(render_key(generate_harmonic_sound, dict(self.params, dtype=np.float32)),
+                             render_key(generate_harmonic_sound, self.params))
+        self.assertNotEqual(render_key(generate_harmonic_sound, dict(self.params, oscillator=Wavetable.sawtooth(8))),
+                            render_key(generate_harmonic_sound, dict(self.params, oscillator=Wavetable.square(8))))
+        with self.assertRaises(ValueError):
+            render_key(generate_harmonic_sound, dict(self.params, out=np.empty(4410)))
+
+    def test_memory_hits_return_same_array(self):
+        cache = RenderCache()
+        first = cache.render(generate_harmonic_sound, self.params)
+        np.testing.assert_array_equal(first, generate_harmonic_sound(**self.params))
+        self.assertFalse(first.flags.writeable)
+        self.assertIs(cache.render(generate_harmonic_sound, self.params), first)
+        info = cache.cache_info()
+        self.assertEqual((info['hits'], info['misses']), (1, 1))
+
+    def test_disk_tier_is_memory_mapped_and_persistent(self):
+        cache = RenderCache(self.directory.name)
+        params = {'pitch': 120, 'formant_freqs': [500, 1500], 'formant_bandwidths': [50, 80], 'duration': 0.1}
+        first = cache.render(generate_synthetic_speech, params)
+        self.assertIsInstance(first, np.memmap)
+        reopened = RenderCache(self.directory.name)
+        second = reopened.render(generate_synthetic_speech, params)
+        self.assertIsInstance(second, np.memmap)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(reopened.cache_info()['disk_hits'], 1)
+
+    def test_key_changes_with_the_code(self):
+        path = os.path.join(self.directory.name, 'cache_probe.py')
+        with open(path, 'w') as source:
+            source.write("def probe(length):\n    return [1.0] * length\n")
+        sys.path.insert(0, self.directory.name)
+        try:
+            probe = importlib.import_module('cache_probe').probe
+            key = render_key(probe, {'length': 4})
+            self.assertEqual(key, render_key(probe, {'length': 4}))
+            with open(path, 'w') as source:
+                source.write("def probe(length):\n    return [2.0] * length\n")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertNotEqual(key, render_key(probe, {'length': 4}))
+        finally:
+            sys.path.remove(self.directory.name)
+            sys.modules.pop('cache_probe', None)
+
+    def test_seeded_renders_on_threads(self):
+        expected = RenderCache().render(generate_noise, {'duration': 0.01}, seed=5)
+        results = [None] * 4
+        def render(index):
+            results[index] = RenderCache().render(generate_noise, {'duration': 0.01}, seed=5)
+        threads = [threading.Thread(target=render, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            np.testing.assert_array_equal(result, expected)
+
+    def test_seed_makes_random_renders_reproducible(self):
+        cache = RenderCache()
+        state = np.random.get_state()
+        first = cached_render(generate_noise, seed=5, cache=cache, duration=0.01)
+        self.assertEqual(np.random.get_state()[1].tolist(), state[1].tolist())
+        other = RenderCache()
+        np.testing.assert_array_equal(first, cached_render(generate_noise, seed=5, cache=other, duration=0.01))
+        self.assertFalse(np.array_equal(first, cached_render(generate_noise, seed=6, cache=other, duration=0.01)))
+
+    def test_unseeded_random_renders_are_not_cached(self):
+        cache = RenderCache()
+        first = cache.render(generate_noise, {'duration': 0.01})
+        second = cache.render(generate_noise, {'duration': 0.01})
+        self.assertFalse(np.array_equal(first, second))
+        self.assertEqual(cache.cache_info()['uncached'], 2)
+        self.assertEqual(cache.cache_info()['memory_entries'], 0)
+        seeded = cache.render(generate_noise, {'duration': 0.01, 'rng': 7})
+        self.assertIs(cache.render(generate_noise, {'duration': 0.01, 'rng': 7}), seeded)
+
+    def test_seed_sequence_arguments(self):
+        cache = RenderCache()
+        first = cache.render(generate_noise, {'duration': 0.01, 'rng': np.random.SeedSequence(3)})
+        np.testing.assert_array_equal(first, generate_noise(0.01, rng=np.random.SeedSequence(3)))
+        self.assertIs(cache.render(generate_noise, {'duration': 0.01, 'rng': np.random.SeedSequence(3)}), first)
+        self.assertNotEqual(render_key(generate_noise, {'duration': 0.01, 'rng': np.random.SeedSequence(3)}),
+                            render_key(generate_noise, {'duration': 0.01, 'rng': np.random.SeedSequence(4)}))
+        with self.assertRaisesRegex(TypeError, 'Generator'):
+            render_key(generate_noise, {'duration': 0.01, 'rng': np.random.default_rng(3)})
+
+    def test_lru_eviction_in_both_tiers(self):
+        entry_bytes = 4410 * 8
+        cache = RenderCache(self.directory.name, max_memory_bytes=2 * entry_bytes, max_disk_bytes=2 * entry_bytes + 512)
+        for freq in (100, 200, 300):
+            cache.render(generate_harmonic_sound, dict(self.params, fundamental_freq=freq))
+        info = cache.cache_info()
+        self.assertEqual(info['memory_entries'], 2)
+        self.assertEqual(info['disk_entries'], 2)
+        self.assertLessEqual(info['disk_bytes'], cache.max_disk_bytes)
+        self.assertEqual(len([name for name in os.listdir(self.directory.name) if name.endswith('.npy')]), 2)
+        cache.render(generate_harmonic_sound, dict(self.params, fundamental_freq=100))
+        self.assertEqual(cache.cache_info()['misses'], 4)
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+if __name__ == '__main__':
+    unittest.main()
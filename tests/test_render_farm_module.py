@@ -0,0 +1,73 @@
+import threading
+import unittest
+import numpy as np
+from src.render_farm_module import RenderFarm, render_batch
+from src.acoustic_analysis_module import generate_synthetic_speech
+from src.harmonic_sounds_module import generate_noise, generate_syllabic_sound
+from src.precision_module import output_length, prepare_output
+
+def _fill(length, out=None):
+    # Marks whether the farm passed its shared row as `out` (ones) or copied the result (twos).
+    result = prepare_output(out, length)
+    result[...] = 1.0 if out is not None else 2.0
+    return result
+
+_fill.output_length = lambda length, **params: length
+
+class TestRenderFarmModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 8000
+        self.param_sets = [
+            {'pitch': pitch, 'formant_freqs': [500, 1500], 'formant_bandwidths': [5, 7], 'duration': 0.25, 'sample_rate': self.sample_rate}
+            for pitch in (100, 150, 200, 250)
+        ]
+
+    def test_results_match_direct_render(self):
+        progress = []
+        with RenderFarm(max_workers=2).render(generate_synthetic_speech, self.param_sets, 2000,
+                                              progress=lambda done, total: progress.append((done, total))) as result:
+            self.assertTrue(result.completed.all())
+            self.assertEqual(list(result.lengths), [2000] * 4)
+            for row, params in zip(result.array, self.param_sets):
+                np.testing.assert_allclose(row, generate_synthetic_speech(**params))
+        self.assertEqual(progress[-1], (4, 4))
+
+    def test_rows_are_padded_and_dtype_respected(self):
+        rendered = render_batch(generate_synthetic_speech, self.param_sets[:2], 2500, max_workers=2, dtype=np.float32)
+        self.assertEqual(rendered.dtype, np.float32)
+        self.assertEqual(rendered.shape, (2, 2500))
+        self.assertFalse(np.any(rendered[:, 2000:]))
+
+    def test_functions_with_out_render_in_place(self):
+        with RenderFarm(max_workers=2).render(_fill, [{'length': 300}, {'length': 500}, {'length': 700}], 500) as result:
+            self.assertEqual(list(result.lengths), [300, 500, 500])
+            np.testing.assert_array_equal(result.array[0], np.r_[np.ones(300), np.zeros(200)])
+            np.testing.assert_array_equal(result.array[1], np.ones(500))
+            np.testing.assert_array_equal(result.array[2], np.full(500, 2.0))
+
+    def test_short_results_render_into_part_of_the_row(self):
+        params = {'vowels': [np.full(100, 0.5)], 'consonants': [np.full(50, -0.5)],
+                  'structure': [('vowel', 0), ('consonant', 0)], 'duration': 0.01}
+        self.assertEqual(output_length(generate_syllabic_sound, params), 150)
+        rendered = render_batch(generate_syllabic_sound, [params], 400, max_workers=1)
+        np.testing.assert_array_equal(rendered[0], np.r_[np.full(100, 0.5), np.full(50, -0.5), np.zeros(250)])
+        for params in self.param_sets:
+            self.assertEqual(output_length(generate_synthetic_speech, params), len(generate_synthetic_speech(**params)))
+
+    def test_seeding_is_deterministic(self):
+        param_sets = [{'duration': 0.1, 'sample_rate': self.sample_rate}] * 3
+        first = render_batch(generate_noise, param_sets, 800, max_workers=2, seed=42)
+        second = render_batch(generate_noise, param_sets, 800, max_workers=3, seed=42)
+        np.testing.assert_array_equal(first, second)
+        self.assertFalse(np.array_equal(first[0], first[1]))
+
+    def test_cancellation(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+        with RenderFarm(max_workers=1).render(generate_synthetic_speech, self.param_sets * 10, 2000, cancel_event=cancel_event) as result:
+            self.assertTrue(result.cancelled)
+            self.assertLess(result.completed.sum(), len(self.param_sets) * 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+from src.render_graph_module import (
+    Constant,
+    Decay,
+    Effect,
+    Filter,
+    Mix,
+    Noise,
+    Oscillator,
+    RenderGraph,
+    Signal,
+    Sum,
+    render
+)
+from src.resonator_module import FormantCascade
+from src.harmonic_sounds_module import control_parameters
+from src.acoustic_analysis_module import generate_synthetic_speech
+from src.wavetable_module import render_oscillator
+
+class TestRenderGraphModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.num_samples = 10000
+        self.t = np.arange(self.num_samples) / self.sample_rate
+        self.envelope = np.linspace(1, 0, self.num_samples)
+
+    def test_chain_matches_numpy(self):
+        graph = Oscillator(440, 0.5) * Signal(self.envelope) * Decay(20) * 2 + Oscillator(880) * 0.25 + 0.1
+        expected = 0.5 * np.sin(2 * np.pi * 440 * self.t) * self.envelope * np.exp(-20 * self.t) * 2
+        expected += 0.25 * np.sin(2 * np.pi * 880 * self.t) + 0.1
+        np.testing.assert_allclose(render(graph, self.num_samples, self.sample_rate), expected, atol=1e-12)
+
+    def test_tile_size_does_not_change_result(self):
+        graph = Mix([Oscillator(220), Oscillator(330, oscillator='wavetable')], [0.5, 0.5]) * Decay(5)
+        whole = render(graph, self.num_samples, self.sample_rate, tile_size=self.num_samples)
+        for tile_size in (1, 333, 4096):
+            np.testing.assert_allclose(render(graph, self.num_samples, self.sample_rate, tile_size=tile_size), whole, atol=1e-9)
+
+    def test_chains_are_fused(self):
+        graph = ((Oscillator(100) * 2) * (Decay(3) * Signal(self.envelope))) * 3
+        constant, operands = graph._fuse()
+        self.assertEqual(constant, 6.0)
+        self.assertEqual(len(operands), 3)
+        self.assertEqual(Sum(Constant(1), Constant(2))._fuse(), (3.0, []))
+
+    def test_buffer_pool_is_bounded(self):
+        graph = Sum(*[Oscillator(100 * k) * Decay(k) for k in range(1, 20)])
+        renderer = RenderGraph(graph, self.sample_rate, tile_size=512)
+        result = renderer.render(self.sample_rate)
+        self.assertEqual(len(result), self.sample_rate)
+        self.assertLessEqual(renderer.buffers_allocated, 2)
+
+    def test_filter_carries_state_between_tiles(self):
+        noise = np.random.default_rng(0).normal(0, 1, self.num_samples)
+        cascade = FormantCascade([500, 1500], [60, 90], self.sample_rate)
+        expected = FormantCascade([500, 1500], [60, 90], self.sample_rate).process(noise)
+        graph = Filter(Signal(noise), cascade)
+        np.testing.assert_allclose(render(graph, self.num_samples, self.sample_rate, tile_size=700), expected, atol=1e-12)
+        np.testing.assert_allclose(render(graph, self.num_samples, self.sample_rate, tile_size=1000), expected, atol=1e-12)
+
+    def test_effect_and_noise(self):
+        clipped = render(Effect(Oscillator(440) * 3, lambda block: np.clip(block, -1, 1, out=block)), self.num_samples, self.sample_rate)
+        self.assertAlmostEqual(clipped.max(), 1.0)
+        first = render(Noise(0.5, np.random.default_rng(1)), self.num_samples, self.sample_rate, tile_size=1000)
+        np.testing.assert_allclose(first, 0.5 * np.random.default_rng(1).standard_normal(self.num_samples))
+
+    def test_in_place_and_float32(self):
+        sound = np.sin(2 * np.pi * 440 * self.t)
+        expected = sound * self.envelope + render_oscillator(440, self.num_samples, self.sample_rate)
+        graph = Oscillator(440) + Signal(sound) * Signal(self.envelope)
+        self.assertIs(render(graph, self.num_samples, self.sample_rate, tile_size=999, out=sound), sound)
+        np.testing.assert_allclose(sound, expected, atol=1e-12)
+        single = render(Oscillator(440) * Decay(2), self.num_samples, self.sample_rate, dtype=np.float32)
+        self.assertEqual(single.dtype, np.float32)
+        np.testing.assert_allclose(single, np.sin(2 * np.pi * 440 * self.t) * np.exp(-2 * self.t), atol=1e-6)
+
+    def test_rewritten_functions_match_reference(self):
+        noise = np.random.default_rng(2).normal(0, 1, self.num_samples)
+        sound = np.sin(2 * np.pi * 440 * self.t)
+        adsr = {'attack': 0.05, 'decay': 0.05, 'sustain': 0.5, 'release': 0.05}
+        result = control_parameters(sound, self.envelope, [(1, 1.0), (2, 0.5)], noise, [500], adsr, self.sample_rate)
+        duration = self.num_samples / self.sample_rate
+        expected = sound * self.envelope + np.sin(2 * np.pi * self.t) + 0.5 * np.sin(4 * np.pi * self.t) + noise
+        expected *= np.sin(2 * np.pi * 500 * self.t) * np.interp(self.t, [0, 0.05, 0.1, duration - 0.05, duration], [0, 1, 0.5, 0.5, 0])
+        np.testing.assert_allclose(result, expected, atol=1e-9)
+        speech = generate_synthetic_speech(100, [500, 1500], [50, 75], self.num_samples / self.sample_rate, self.sample_rate)
+        expected = np.sin(2 * np.pi * 100 * self.t) * np.exp(-50 * self.t) * np.sin(2 * np.pi * 500 * self.t)
+        expected *= np.exp(-75 * self.t) * np.sin(2 * np.pi * 1500 * self.t)
+        np.testing.assert_allclose(speech, expected, atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from src.render_service_module import (
+    RenderClient,
+    RenderService,
+    ServiceError,
+    available_service_methods,
+    decode_array,
+    encode_array,
+    register_service_method
+)
+from src.acoustic_analysis_module import analyze_frequency_spectrum, detect_formants, generate_synthetic_speech
+
+class TestRenderServiceModule(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.sample_rate = 16000
+        rng = np.random.default_rng(0)
+        self.clips = [rng.normal(0, 1, 4000) for _ in range(6)]
+
+    def test_array_encodings(self):
+        array = np.arange(6, dtype=np.float32).reshape(2, 3)
+        np.testing.assert_array_equal(decode_array(encode_array(array, 'base64')), array)
+        np.testing.assert_array_equal(decode_array(encode_array(array, 'list')), array)
+        self.assertIn('detect_formants', available_service_methods())
+
+    async def test_concurrent_requests_are_batched(self):
+        async with RenderService(max_batch_delay=0.05) as service:
+            results = await asyncio.gather(*[service.call('analyze_frequency_spectrum', sound=clip, sample_rate=self.sample_rate)
+                                             for clip in self.clips])
+            metrics = service.metrics()
+        for clip, (freqs, amplitudes) in zip(self.clips, results):
+            expected_freqs, expected = analyze_frequency_spectrum(clip, self.sample_rate)
+            np.testing.assert_allclose(freqs, expected_freqs)
+            np.testing.assert_allclose(amplitudes, expected, atol=1e-9)
+        self.assertEqual(metrics['requests'], len(self.clips))
+        self.assertLess(metrics['batches'], len(self.clips))
+        self.assertGreater(metrics['mean_batch_size'], 1)
+        self.assertIsNotNone(metrics['latency_seconds']['p99'])
+
+    async def test_tcp_round_trip(self):
+        service = await RenderService(max_batch_delay=0.02).start(port=0)
+        host, port = service.address[:2]
+        client = await RenderClient.connect(host, port)
+        try:
+            formants = await asyncio.gather(*[client.call('detect_formants', sound=clip, sample_rate=self.sample_rate) for clip in self.clips[:3]])
+            for clip, found in zip(self.clips, formants):
+                np.testing.assert_allclose(np.asarray(found), np.asarray(detect_formants(clip, self.sample_rate)), atol=1e-6)
+            speech = await client.call('generate_synthetic_speech', encoding='list', pitch=120, formant_freqs=[500, 1500],
+                                       formant_bandwidths=[50, 80], duration=0.05, sample_rate=self.sample_rate)
+            np.testing.assert_allclose(speech, generate_synthetic_speech(120, [500, 1500], [50, 80], 0.05, self.sample_rate))
+            with self.assertRaises(ServiceError):
+                await client.call('no_such_method')
+            with self.assertRaises(ServiceError):
+                await client.call('analyze_frequency_spectrum', sample_rate=self.sample_rate)
+            metrics = await client.call('metrics')
+            self.assertEqual(metrics['queue_depth'], 0)
+        finally:
+            await client.close()
+            await service.close()
+        self.assertIn('acousynth_service_requests_total', service.to_prometheus())
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), "Unix sockets are not available")
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'service.sock')
+            service = await RenderService().start(path=path)
+            client = await RenderClient.connect(path=path)
+            try:
+                freqs, amplitudes = await client.call('analyze_frequency_spectrum', sound=self.clips[0], sample_rate=self.sample_rate)
+                self.assertEqual(len(amplitudes), len(self.clips[0]) // 2)
+            finally:
+                await client.close()
+                await service.close()
+
+    async def test_backpressure(self):
+        release = threading.Event()
+        register_service_method('test.wait', lambda value: release.wait(5) and value)
+        async with RenderService(max_batch_size=1, max_batch_delay=0, max_queue=2, max_workers=1) as service:
+            # Two batches in flight, one held by the batcher and two queued.
+            futures = [await service.submit('test.wait', {'value': index}) for index in range(5)]
+            await asyncio.sleep(0.05)
+            blocked = asyncio.ensure_future(service.submit('test.wait', {'value': 5}))
+            await asyncio.sleep(0.05)
+            self.assertFalse(blocked.done())
+            self.assertLessEqual(service.metrics()['queue_depth'], 2)
+            release.set()
+            futures.append(await blocked)
+            self.assertEqual(await asyncio.gather(*futures), [0, 1, 2, 3, 4, 5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from scipy.signal import sosfreqz
+from src.resonator_module import FormantCascade, ResonatorBank, filter_formants, resonator_sos
+
+class TestResonatorModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.noise = np.random.default_rng(0).normal(0, 1, self.sample_rate)
+
+    def test_resonator_peak_and_bandwidth(self):
+        sos = resonator_sos(1000, 100, self.sample_rate)
+        freqs, response = sosfreqz(sos, worN=2 ** 16, fs=self.sample_rate)
+        gain = np.abs(response)
+        self.assertAlmostEqual(freqs[np.argmax(gain)], 1000, delta=5)
+        self.assertAlmostEqual(gain.max(), 1.0, places=2)
+        passband = freqs[gain >= gain.max() / np.sqrt(2)]
+        self.assertAlmostEqual(passband[-1] - passband[0], 100, delta=5)
+        _, allpole = sosfreqz(resonator_sos(1000, 100, self.sample_rate, 'allpole'), worN=[0], fs=self.sample_rate)
+        self.assertAlmostEqual(abs(allpole[0]), 1.0)
+
+    def test_coefficients_are_cached(self):
+        first = resonator_sos(700.0, 80.0, self.sample_rate)
+        self.assertIs(first, resonator_sos(700.0, 80.0, self.sample_rate))
+        self.assertFalse(first.flags.writeable)
+        with self.assertRaises(ValueError):
+            resonator_sos(700.0, 80.0, self.sample_rate, 'comb')
+
+    def test_bank_matches_individual_filters(self):
+        freqs = [500, 1500, 500, 2500, 1500]
+        bandwidths = [60, 90, 60, 120, 90]
+        bank = ResonatorBank(freqs, bandwidths, self.sample_rate)
+        self.assertEqual(len(bank._groups), 3)
+        output = bank.process(self.noise)
+        for channel, (freq, bandwidth) in enumerate(zip(freqs, bandwidths)):
+            np.testing.assert_allclose(output[channel], filter_formants(self.noise, [freq], [bandwidth], self.sample_rate), atol=1e-12)
+
+    def test_bank_state_carries_across_blocks(self):
+        inputs = np.stack([self.noise, -self.noise, 0.5 * self.noise])
+        expected = ResonatorBank([400, 800, 400], [50, 50, 50], self.sample_rate).process(inputs)
+        bank = ResonatorBank([400, 800, 400], [50, 50, 50], self.sample_rate)
+        blocks = [bank.process(inputs[:, start:start + 1000]) for start in range(0, inputs.shape[1], 1000)]
+        np.testing.assert_allclose(np.hstack(blocks), expected, atol=1e-12)
+        bank.reset()
+        np.testing.assert_allclose(bank.process(inputs), expected, atol=1e-12)
+
+    def test_cascade_state_carries_across_blocks(self):
+        expected = filter_formants(self.noise, [500, 1500, 2500], [50, 75, 100], self.sample_rate, 'cascade')
+        cascade = FormantCascade([500, 1500, 2500], [50, 75, 100], self.sample_rate)
+        blocks = [cascade.process(self.noise[start:start + 777]) for start in range(0, len(self.noise), 777)]
+        np.testing.assert_allclose(np.concatenate(blocks), expected, atol=1e-9)
+
+    def test_filtered_noise_peaks_at_formants(self):
+        filtered = filter_formants(self.noise, [1000], [50], self.sample_rate)
+        spectrum = np.abs(np.fft.rfft(filtered))
+        freqs = np.fft.rfftfreq(len(filtered), 1 / self.sample_rate)
+        in_band = np.abs(freqs - 1000) < 100
+        self.assertGreater(spectrum[in_band].mean(), 10 * spectrum[freqs > 5000].mean())
+
+if __name__ == '__main__':
+    unittest.main()
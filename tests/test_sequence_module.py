@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from src.sequence_module import SegmentSequence, assemble_segments
+from src.harmonic_sounds_module import generate_syllabic_sound
+
+class TestSequenceModule(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.segments = [rng.normal(0, 1, length) for length in (100, 37, 250, 64)]
+
+    def test_matches_concatenate_without_crossfade(self):
+        np.testing.assert_array_equal(assemble_segments(self.segments), np.concatenate(self.segments))
+
+    def test_keeps_input_dtype(self):
+        segments = [segment.astype(np.float32) for segment in self.segments]
+        self.assertEqual(assemble_segments(segments).dtype, np.float32)
+
+    def test_crossfade(self):
+        fade = 10
+        sound = assemble_segments(self.segments, crossfade_samples=fade)
+        self.assertEqual(len(sound), sum(len(segment) for segment in self.segments) - fade * 3)
+        ramp = np.arange(1, fade + 1) / (fade + 1)
+        first, second = self.segments[:2]
+        np.testing.assert_allclose(sound[:90], first[:90])
+        np.testing.assert_allclose(sound[90:100], first[90:] * ramp[::-1] + second[:fade] * ramp)
+        np.testing.assert_allclose(sound[100:117], second[fade:27])
+
+    def test_crossfade_longer_than_segment(self):
+        with self.assertRaises(ValueError):
+            SegmentSequence(self.segments, crossfade_samples=20)
+
+    def test_iter_blocks_matches_to_array(self):
+        for fade in (0, 5):
+            sequence = SegmentSequence(self.segments, crossfade_samples=fade)
+            expected = sequence.to_array()
+            for block_size in (1, 16, 100, 1000):
+                np.testing.assert_allclose(np.concatenate(list(sequence.iter_blocks(block_size))), expected)
+
+    def test_lazy_segment_index_holds_views(self):
+        sequence = generate_syllabic_sound(self.segments[:2], self.segments[2:], [('vowel', 0), ('consonant', 1)], 0.0, lazy=True)
+        self.assertEqual([(start, stop) for start, stop, _ in sequence.segment_index], [(0, 100), (100, 164)])
+        self.assertIs(sequence.segment_index[1][2], self.segments[3])
+        self.assertTrue(np.shares_memory(next(sequence.iter_blocks(50)), self.segments[0]))
+
+if __name__ == '__main__':
+    unittest.main()
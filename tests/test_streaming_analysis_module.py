@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from scipy.signal import spectrogram
+from src.streaming_analysis_module import StreamingSTFT
+
+class TestStreamingAnalysisModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.sound = np.random.default_rng(0).normal(0, 1, 20000)
+
+    def _stream(self, stft, chunk_sizes):
+        frames = []
+        position = 0
+        for size in chunk_sizes:
+            frames.extend(stft.process(self.sound[position:position + size]))
+            position += size
+        return frames
+
+    def test_matches_offline_spectrogram_for_any_chunking(self):
+        frequencies, times, expected = spectrogram(self.sound, self.sample_rate)
+        for chunk_sizes in ([len(self.sound)], [1] * len(self.sound), [100, 7, 3000, 555] * 6):
+            stft = StreamingSTFT(self.sample_rate)
+            frames = self._stream(stft, chunk_sizes)
+            np.testing.assert_allclose([time for time, _ in frames], times)
+            np.testing.assert_allclose(np.stack([frame for _, frame in frames], axis=1), expected, rtol=1e-9, atol=1e-18)
+            np.testing.assert_allclose(stft.frequencies, frequencies)
+
+    def test_callback_receives_frames(self):
+        received = []
+        stft = StreamingSTFT(self.sample_rate, nperseg=512, noverlap=256, callback=lambda time, frame: received.append(time))
+        emitted = stft.push(self.sound)
+        self.assertEqual(emitted, len(received))
+        self.assertEqual(emitted, (len(self.sound) - 512) // 256 + 1)
+
+    def test_buffer_size_is_constant(self):
+        stft = StreamingSTFT(self.sample_rate)
+        for _ in range(20):
+            stft.push(self.sound)
+        self.assertEqual(stft._ring.shape, (256,))
+
+    def test_reset(self):
+        stft = StreamingSTFT(self.sample_rate)
+        first = list(stft.process(self.sound))
+        stft.reset()
+        second = list(stft.process(self.sound))
+        self.assertEqual(len(first), len(second))
+        np.testing.assert_array_equal(first[-1][1], second[-1][1])
+
+    def test_invalid_overlap(self):
+        with self.assertRaises(ValueError):
+            StreamingSTFT(self.sample_rate, nperseg=256, noverlap=256)
+
+if __name__ == '__main__':
+    unittest.main()
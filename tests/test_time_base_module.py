@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from src.time_base_module import TimeBaseCache, get_time_base, get_phase_table
+
+class TestTimeBaseModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+
+    def test_time_base_values(self):
+        t = get_time_base(1000, self.sample_rate)
+        np.testing.assert_allclose(t, np.arange(1000) / self.sample_rate)
+        np.testing.assert_allclose(get_phase_table(1000, self.sample_rate), 2 * np.pi * t)
+
+    def test_arrays_are_shared_and_read_only(self):
+        first = get_time_base(512, self.sample_rate)
+        self.assertIs(first, get_time_base(512, self.sample_rate))
+        self.assertFalse(first.flags.writeable)
+        with self.assertRaises(ValueError):
+            first[0] = 1.0
+
+    def test_lru_eviction_bounds_memory(self):
+        cache = TimeBaseCache(max_bytes=3 * 100 * 8)
+        first = cache.time_base(100, self.sample_rate)
+        cache.time_base(100, 22050)
+        cache.time_base(100, self.sample_rate)
+        cache.time_base(100, 48000)
+        cache.time_base(100, 96000)
+        info = cache.cache_info()
+        self.assertEqual(info['entries'], 3)
+        self.assertLessEqual(info['bytes'], info['max_bytes'])
+        self.assertIs(cache.time_base(100, self.sample_rate), first)
+
+    def test_oversized_arrays_are_not_cached(self):
+        cache = TimeBaseCache(max_bytes=80)
+        t = cache.phase_table(100, self.sample_rate)
+        self.assertEqual(len(t), 100)
+        self.assertEqual(cache.cache_info()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from src.wavetable_module import Wavetable, WavetableOscillator, get_sine_table, render_oscillator
+from src.harmonic_sounds_module import generate_harmonic_sound, generate_formant_sound
+from src.acoustic_analysis_module import apply_subharmonics, apply_pitch_modulation, generate_synthetic_speech
+
+class TestWavetableModule(unittest.TestCase):
+
+    def setUp(self):
+        self.sample_rate = 44100
+        self.t = np.arange(self.sample_rate) / self.sample_rate
+        self.sine = np.sin(2 * np.pi * 440 * self.t)
+
+    def test_linear_and_cubic_lookup_match_sine(self):
+        linear, _ = get_sine_table().render(440, len(self.t), self.sample_rate, interpolation='linear')
+        cubic, _ = get_sine_table().render(440, len(self.t), self.sample_rate, interpolation='cubic')
+        np.testing.assert_allclose(linear, self.sine, atol=1e-5)
+        np.testing.assert_allclose(cubic, self.sine, atol=1e-8)
+
+    def test_oscillator_phase_is_continuous_across_blocks(self):
+        oscillator = WavetableOscillator(get_sine_table(), 440, self.sample_rate, interpolation='cubic')
+        blocks = np.concatenate([oscillator.render(size) for size in (1000, 1, 4999, 4000)])
+        np.testing.assert_allclose(blocks, self.sine[:len(blocks)], atol=1e-8)
+
+    def test_tables_are_band_limited(self):
+        sawtooth = Wavetable.sawtooth(num_harmonics=128)
+        freq = 3000
+        block, _ = sawtooth.render(freq, 8192, self.sample_rate, interpolation='cubic')
+        spectrum = np.abs(np.fft.rfft(block * np.hanning(len(block))))
+        freqs = np.fft.rfftfreq(len(block), 1 / self.sample_rate)
+        # 7 harmonics of 3 kHz fit below Nyquist, so the 4-harmonic table is the richest safe one.
+        self.assertLess(spectrum[freqs > freq * 4.5].max(), 1e-2 * spectrum.max())
+
+    def test_oscillator_interpolation_and_output(self):
+        cubic = render_oscillator(440, len(self.t), self.sample_rate, 'wavetable', interpolation='cubic')
+        np.testing.assert_allclose(cubic, self.sine, atol=1e-8)
+        out = np.empty(len(self.t), dtype=np.float32)
+        self.assertIs(render_oscillator(440, len(self.t), self.sample_rate, 'wavetable', out=out), out)
+        np.testing.assert_allclose(out, self.sine, atol=1e-5)
+        formants = [(500, 50), (1500, 75)]
+        linear = generate_formant_sound(440, formants, 1.0, self.sample_rate, oscillator='wavetable', method='envelope')
+        cubic = generate_formant_sound(440, formants, 1.0, self.sample_rate, oscillator='wavetable', method='envelope', interpolation='cubic')
+        exact = generate_formant_sound(440, formants, 1.0, self.sample_rate, method='envelope')
+        self.assertLess(np.max(np.abs(cubic - exact)), np.max(np.abs(linear - exact)))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            Wavetable([])
+        with self.assertRaises(ValueError):
+            render_oscillator(440, 10, self.sample_rate, oscillator='triangle')
+        with self.assertRaises(ValueError):
+            render_oscillator(440, 10, self.sample_rate, oscillator='wavetable', interpolation='nearest')
+
+    def test_generators_accept_wavetable_oscillator(self):
+        harmonics = [(1, 1.0), (2, 0.5)]
+        formants = [(500, 50), (1500, 75)]
+        pairs = [
+            (generate_harmonic_sound(440, harmonics, 1.0, self.sample_rate),
+             generate_harmonic_sound(440, harmonics, 1.0, self.sample_rate, oscillator='wavetable')),
+            (generate_formant_sound(440, formants, 1.0, self.sample_rate, method='envelope'),
+             generate_formant_sound(440, formants, 1.0, self.sample_rate, oscillator='wavetable', method='envelope')),
+            (generate_synthetic_speech(100, [500, 1500], [50, 75], 1.0, self.sample_rate),
+             generate_synthetic_speech(100, [500, 1500], [50, 75], 1.0, self.sample_rate, oscillator='wavetable')),
+            (apply_subharmonics(self.sine, [220], [0.5], self.sample_rate),
+             apply_subharmonics(self.sine, [220], [0.5], self.sample_rate, oscillator='wavetable')),
+            (apply_pitch_modulation(self.sine, 5, 0.1, self.sample_rate),
+             apply_pitch_modulation(self.sine, 5, 0.1, self.sample_rate, oscillator='wavetable')),
+        ]
+        for expected, actual in pairs:
+            np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+if __name__ == '__main__':
+    unittest.main()